@@ -15,6 +15,96 @@ print_message () {
 }
 
 
+start_phase () {
+    # Run a phase in the background: name (first argument), working directory
+    # (second argument) and the command itself (the rest). The output goes
+    # to $LOGS/<name>.log, the exit status and duration to $LOGS/<name>.status.
+    local name=$1
+    local directory=$2
+    shift 2
+    (
+        cd "$directory" || exit 1
+        local started=$(date +%s.%N)
+        "$@" > "$LOGS/$name.log" 2>&1
+        local status=$?
+        local finished=$(date +%s.%N)
+        echo "$status $(awk "BEGIN { printf \"%.1f\", $finished - $started }")" > "$LOGS/$name.status"
+    ) &
+}
+
+phase_status () {
+    cut -d ' ' -f 1 "$LOGS/$1.status"
+}
+
+print_timings () {
+    local finished=$(date +%s.%N)
+    echo "Время этапов:" 1>&2
+    for name in flake8 structure ya_news ya_note; do
+        echo "    $name: $(cut -d ' ' -f 2 "$LOGS/$name.status") с" 1>&2
+    done
+    echo "    всего: $(awk "BEGIN { printf \"%.1f\", $finished - $STARTED }") с" 1>&2
+}
+
+run_parallel () {
+    # All phases start at once; each suite is split between pytest-xdist
+    # workers, and pytest-django gives every worker its own test database.
+    # The results are reported in the same order and with the same messages
+    # and exit codes as in the sequential run.
+    local workers="${PYTEST_WORKERS:-auto}"
+    LOGS=$(mktemp -d)
+    trap 'rm -rf "$LOGS"' EXIT
+    STARTED=$(date +%s.%N)
+    start_phase flake8 . python -m flake8 --config=setup.cfg
+    start_phase structure . python structure_test.py
+    start_phase ya_news ya_news env DJANGO_SETTINGS_MODULE="${DJANGO_SETTINGS_MODULE:-yanews.settings}" \
+        pytest --tb=line -n "$workers" --dist loadscope
+    start_phase ya_note ya_note env DJANGO_SETTINGS_MODULE="yanote.settings" \
+        pytest --tb=line -n "$workers" --dist loadscope
+    wait
+    print_timings
+
+    cat "$LOGS/flake8.log" 1>&2
+    status=$(phase_status flake8)
+    if [[ $status -ne 0 ]]; then
+        print_message " flake8 обнаружил отклонения от стандартов, приведите код в соответствие с PEP8 " "=" 1
+        echo \`\`\` 1>&2
+        exit $status
+    fi
+    print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
+    echo $LF 1>&2
+
+    cat "$LOGS/structure.log"
+    status=$(phase_status structure)
+    if [[ $status -ne 0 ]]; then
+        print_message " Убедитесь, что написанные вами тесты скопированы в указанные в ТЗ директории " "=" 1
+        echo \`\`\` 1>&2
+        exit $status
+    fi
+
+    cat "$LOGS/ya_news.log" 1>&2
+    status=$(phase_status ya_news)
+    if [[ $status -ne 0 ]]; then
+        print_message " При запуске упали ваши тесты для проекта YaNews. Проверьте тесты этого проекта " "=" 1
+        echo \`\`\` 1>&2
+        exit $status
+    fi
+
+    cat "$LOGS/ya_note.log" 1>&2
+    status=$(phase_status ya_note)
+    if [[ $status -ne 0 ]]; then
+        print_message " При запуске упали ваши тесты для проекта YaNote. Проверьте тесты этого проекта " "=" 1
+        echo \`\`\` 1>&2
+        exit $status
+    fi
+    exit 0
+}
+
+
+# Parallel mode: ./run_tests.sh --parallel or PARALLEL_TESTS=1.
+if [[ "$1" == "--parallel" || -n "$PARALLEL_TESTS" ]]; then
+    run_parallel
+fi
+
 if python -m flake8 --config=setup.cfg 1>&2;
 then
     print_message " flake8 завершил проверку кода, ошибок не обнаружено " "="
@@ -13,3 +13,12 @@ class NewsAdmin(admin.ModelAdmin):
     inlines = [
         CommentInline,
     ]
+    list_display = ('title', 'date', 'comment_count', 'last_comment_at')
+
+    def save_model(self, request, obj, form, change):
+        # Счётчики в obj прочитаны при открытии формы: полное сохранение
+        # затёрло бы комментарии, добавленные с тех пор.
+        if change and form.changed_data:
+            obj.save(update_fields=form.changed_data)
+        else:
+            super().save_model(request, obj, form, change)
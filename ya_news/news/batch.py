@@ -0,0 +1,73 @@
+"""Пакетное добавление комментариев для импорта и зеркал лент."""
+from django.db import transaction
+
+from .cache import HOME, touch_on_commit
+from .counters import comments_added
+from .forms import CommentForm
+from .models import Comment, News
+
+NOT_AN_OBJECT = 'Ожидается объект с полями news и text.'
+NEWS_NOT_FOUND = 'Новость не найдена.'
+
+
+def error(message, code):
+    return [{'message': message, 'code': code}]
+
+
+def news_id(item):
+    value = item.get('news')
+    return value if type(value) is int else None
+
+
+def validate(item, known_news):
+    """
+    Проверяет элемент пакета теми же правилами, что и форма на сайте.
+
+    Возвращает ошибки в формате Form.errors.get_json_data() или
+    несохранённый комментарий без автора.
+    """
+    if not isinstance(item, dict):
+        return {'__all__': error(NOT_AN_OBJECT, 'invalid')}, None
+    form = CommentForm(data={'text': item.get('text')})
+    errors = {} if form.is_valid() else form.errors.get_json_data()
+    if news_id(item) not in known_news:
+        errors['news'] = error(NEWS_NOT_FOUND, 'not_found')
+    if errors:
+        return errors, None
+    form.instance.news_id = news_id(item)
+    return None, form.instance
+
+
+def ingest_comments(items, author):
+    """
+    Сохраняет корректные комментарии пакета одним bulk_create.
+
+    Новости пакета проверяются одним запросом, а их счётчики меняются
+    одним UPDATE, поэтому число запросов не зависит от размера пакета.
+    Результат — по элементу на каждый входной: id нового комментария
+    или ошибки.
+    """
+    known_news = set(News.objects.filter(
+        pk__in={news_id(item) for item in items if isinstance(item, dict)}
+    ).order_by().values_list('pk', flat=True))
+    results, comments = [], []
+    for index, item in enumerate(items):
+        errors, comment = validate(item, known_news)
+        if errors:
+            results.append({'index': index, 'errors': errors})
+            continue
+        comment.author = author
+        # bulk_create не вызывает save(), HTML текста готовим сами.
+        comment.update_rendered()
+        comments.append(comment)
+        results.append({'index': index, 'comment': comment})
+    if comments:
+        with transaction.atomic():
+            Comment.objects.bulk_create(comments)
+            comments_added(comments)
+            # bulk_create не посылает post_save: версии страниц меняем сами.
+            touch_on_commit(HOME, *{comment.news_id for comment in comments})
+    for result in results:
+        if 'comment' in result:
+            result['id'] = result.pop('comment').pk
+    return results
@@ -0,0 +1,208 @@
+"""
+Кеш готовых страниц новостей для анонимных пользователей.
+
+Фрагменты шаблонов (блок новости на главной и список комментариев)
+кешируются тегом {% cache %} с временем изменения новости в ключе:
+оно хранится в базе и одинаково для всех процессов.
+
+Вместе со страницей хранятся её ETag и Last-Modified (news.conditional),
+поэтому попадание в кеш, в том числе ответ 304, обходится без базы.
+Версия страницы появляется только после успешного рендеринга: для
+несуществующих новостей ключи в кеше не заводятся.
+
+Страница и фрагменты, построенные по реплике, в кеш не попадают:
+реплика может отставать от версии, выданной после записи в default,
+и устаревшая копия осталась бы в кеше под новой версией.
+"""
+from functools import partial
+from uuid import uuid4
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import parse_http_date_safe
+
+from yacommon.replicas import reading_replica
+
+from .conditional import set_validators
+
+HOME = 'home'
+VERSION_KEY = 'news:version:{}'
+PAGE_KEY = 'news:page:{}:{}'
+HITS_KEY = 'news:cache:hits'
+MISSES_KEY = 'news:cache:misses'
+# Версии страниц у кеша в памяти свои в каждом процессе: запись в одном
+# не сбрасывает страницу в остальных (yacommon.auth.check_shared_cache).
+PAGE_TIMEOUTS = ('NEWS_PAGE_CACHE_TIMEOUT',)
+
+
+def new_version():
+    return uuid4().hex
+
+
+def touch(*scopes):
+    """Выдаёт страницам новые версии после изменения данных."""
+    cache.set_many(
+        {VERSION_KEY.format(scope): new_version() for scope in scopes}, None
+    )
+
+
+def touch_on_commit(*scopes):
+    """
+    Выдаёт страницам новые версии, когда транзакция зафиксирована.
+
+    Смени их раньше, читатель успел бы закешировать под новой версией
+    страницу без незафиксированного изменения. Вне транзакции версии
+    меняются сразу.
+    """
+    transaction.on_commit(partial(touch, *scopes))
+
+
+def forget(*scopes):
+    """Убирает версии страниц, которых больше нет."""
+    cache.delete_many([VERSION_KEY.format(scope) for scope in scopes])
+
+
+def count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 0, None)
+        cache.incr(key)
+
+
+async def acount(key):
+    try:
+        await cache.aincr(key)
+    except ValueError:
+        await cache.aadd(key, 0, None)
+        await cache.aincr(key)
+
+
+def get_stats():
+    """Счётчики попаданий и промахов кеша страниц."""
+    stats = cache.get_many((HITS_KEY, MISSES_KEY))
+    hits, misses = stats.get(HITS_KEY, 0), stats.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def is_cacheable(request):
+    """
+    Можно ли отдать ответ на запрос из кеша.
+
+    Кешируется только страница анонима без параметров запроса: у неё
+    одна копия на версию, и сброс по сигналам точно её затрагивает.
+    """
+    return not (request.user.is_authenticated or request.GET)
+
+
+def cached_response(request, page):
+    """Страница из кеша или 304, если такая копия у клиента уже есть."""
+    content, content_type, etag, last_modified = page
+    last_modified = parse_http_date_safe(last_modified)
+    response = None
+    if etag is not None:
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+    if response is None:
+        response = HttpResponse(content, content_type=content_type)
+    if etag is None:
+        return response
+    return set_validators(response, etag, last_modified)
+
+
+def store_page(response, scope, version):
+    """
+    Кладёт отрендеренную страницу в кеш под версией version.
+
+    Если версии ещё не было, она заводится только сейчас. Не вышло —
+    значит, за время рендеринга данные изменились и страница устарела.
+    """
+    if version is None:
+        version = new_version()
+        if not cache.add(VERSION_KEY.format(scope), version, None):
+            return
+    cache.set(
+        PAGE_KEY.format(scope, version),
+        (
+            response.content,
+            response['Content-Type'],
+            response.get('ETag'),
+            response.get('Last-Modified'),
+        ),
+        settings.NEWS_PAGE_CACHE_TIMEOUT,
+    )
+
+
+def store_on_render(response, scope, version):
+    """Сохраняет страницу в кеш, когда она будет отрендерена."""
+    if response.status_code == 200 and not reading_replica():
+        response.add_post_render_callback(
+            lambda response: store_page(response, scope, version)
+        )
+    return response
+
+
+class AnonymousPageCacheMixin:
+    """Отдаёт анонимным пользователям страницу из кеша."""
+
+    def get_cache_scope(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            return super().get(request, *args, **kwargs)
+        scope = self.get_cache_scope()
+        version = cache.get(VERSION_KEY.format(scope))
+        if version is not None:
+            page = cache.get(PAGE_KEY.format(scope, version))
+            if page is not None:
+                count(HITS_KEY)
+                return cached_response(request, page)
+        count(MISSES_KEY)
+        response = super().get(request, *args, **kwargs)
+        return store_on_render(response, scope, version)
+
+
+class AsyncAnonymousPageCacheMixin:
+    """Асинхронный вариант AnonymousPageCacheMixin."""
+
+    def get_cache_scope(self):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        if not is_cacheable(request):
+            return await super().get(request, *args, **kwargs)
+        scope = self.get_cache_scope()
+        version = await cache.aget(VERSION_KEY.format(scope))
+        if version is not None:
+            page = await cache.aget(PAGE_KEY.format(scope, version))
+            if page is not None:
+                await acount(HITS_KEY)
+                return cached_response(request, page)
+        await acount(MISSES_KEY)
+        response = await super().get(request, *args, **kwargs)
+        return store_on_render(response, scope, version)
+
+
+class FragmentCacheMixin:
+    """
+    Время жизни фрагментов шаблона для тега {% cache %}.
+
+    При чтении с реплики оно нулевое: готовые фрагменты читаются,
+    но новые не сохраняются.
+    """
+
+    def get_context_data(self, **kwargs):
+        timeout = settings.NEWS_FRAGMENT_CACHE_TIMEOUT
+        if reading_replica():
+            timeout = 0
+        return super().get_context_data(fragment_timeout=timeout, **kwargs)
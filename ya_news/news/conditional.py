@@ -0,0 +1,92 @@
+"""
+Условные GET-запросы (ETag и Last-Modified) для страниц новостей.
+
+Валидаторы строятся по полям строк новостей, показанных на странице,
+а не по версиям в кеше: версии у каждого процесса свои, строки
+новостей — общие. Кеш страниц хранит валидаторы вместе с ответом
+(news.cache), поэтому попадание в него обходится без базы.
+"""
+import hashlib
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+
+from yacommon.replicas import reading_replica
+
+# Дата и счётчики видны на странице; changed_at ловит правки текста
+# новости и комментариев, которых остальные поля не замечают.
+STATE_FIELDS = ('pk', 'date', 'comment_count', 'last_comment_at', 'changed_at')
+
+
+def validators(news, user):
+    """
+    Валидаторы страницы с новостями news: ETag и Last-Modified.
+
+    Last-Modified не различает двух изменений за одну секунду, точным
+    валидатором остаётся ETag. Без новостей валидаторов нет.
+    """
+    if not news:
+        return None, None
+    state = [tuple(getattr(item, name) for name in STATE_FIELDS)
+             for item in news]
+    key = repr((state, user.pk))
+    etag = 'W/"{}"'.format(hashlib.md5(key.encode()).hexdigest())
+    last_modified = max(item.changed_at for item in news)
+    return etag, int(last_modified.timestamp())
+
+
+def set_validators(response, etag, last_modified):
+    """Валидаторы получают только сама страница и ответ 304."""
+    if response.status_code in (200, 304):
+        response.headers['ETag'] = etag
+        response.headers['Last-Modified'] = http_date(last_modified)
+    return response
+
+
+class ConditionalGetMixin:
+    """
+    Отвечает 304 без рендеринга, если у клиента актуальная копия.
+
+    Новости страницы отдаёт get_page_news; представление берёт их
+    оттуда же, так что валидаторы не стоят отдельного запроса.
+    Страница с реплики уходит без валидаторов: ETag отстающей реплики
+    клиент хранил бы и после того, как она догонит default.
+    """
+
+    def get_page_news(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        if reading_replica():
+            return super().get(request, *args, **kwargs)
+        etag, last_modified = validators(self.get_page_news(), request.user)
+        if etag is None:
+            return super().get(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
+
+
+class AsyncConditionalGetMixin:
+    """Асинхронный вариант ConditionalGetMixin."""
+
+    async def get_page_news(self):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        if reading_replica():
+            return await super().get(request, *args, **kwargs)
+        etag, last_modified = validators(
+            await self.get_page_news(), request.user
+        )
+        if etag is None:
+            return await super().get(request, *args, **kwargs)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified
+        )
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        return set_validators(response, etag, last_modified)
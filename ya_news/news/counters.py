@@ -0,0 +1,99 @@
+"""
+Число комментариев и время последнего из них в строке новости.
+
+Поля меняются UPDATE с F-выражениями в транзакции записи комментария:
+новость не читается, а одновременные записи не теряют друг друга.
+Тот же UPDATE отмечает изменение новости в changed_at. recount()
+пересчитывает их по таблице комментариев, если что-то писало
+комментарии в обход этих функций.
+"""
+from collections import Counter
+
+from django.db.models import (
+    Case, Count, DateTimeField, F, Max, OuterRef, Subquery, Value, When
+)
+from django.db.models.functions import Coalesce, Greatest, Now
+
+from .models import Comment, News
+
+
+def comments_added(comments):
+    """Учитывает сохранённые комментарии одним UPDATE на все их новости."""
+    added, latest = Counter(), {}
+    for comment in comments:
+        added[comment.news_id] += 1
+        latest[comment.news_id] = max(
+            latest.get(comment.news_id, comment.created), comment.created
+        )
+    if not added:
+        return
+    newest = Case(
+        *(When(pk=pk, then=Value(created)) for pk, created in latest.items()),
+        output_field=DateTimeField(),
+    )
+    News.objects.filter(pk__in=added).update(
+        comment_count=F('comment_count') + Case(
+            *(When(pk=pk, then=Value(count)) for pk, count in added.items())
+        ),
+        # В SQLite MAX() с NULL даёт NULL, отсюда Coalesce.
+        last_comment_at=Coalesce(Greatest('last_comment_at', newest), newest),
+        changed_at=Now(),
+    )
+
+
+def comment_removed(comment):
+    """
+    Уменьшает счётчик, время последнего берёт из оставшихся.
+
+    Счётчик, отставший от комментариев (например, после loaddata),
+    не уходит ниже нуля: поле положительное, и SQLite отверг бы UPDATE.
+    """
+    News.objects.filter(pk=comment.news_id).update(
+        comment_count=Greatest(F('comment_count') - 1, 0),
+        last_comment_at=Subquery(
+            Comment.objects.filter(news=OuterRef('pk')).order_by(
+                '-created'
+            ).values('created')[:1]
+        ),
+        changed_at=Now(),
+    )
+
+
+def comment_edited(comment):
+    """Правка текста не меняет счётчиков, но меняет страницу новости."""
+    News.objects.filter(pk=comment.news_id).update(changed_at=Now())
+
+
+def actual_counters():
+    """Выражения для значений полей, посчитанных по комментариям."""
+    comments = Comment.objects.filter(news=OuterRef('pk')).order_by().values(
+        'news'
+    )
+    return {
+        'comment_count': Coalesce(
+            Subquery(comments.annotate(total=Count('pk')).values('total')), 0
+        ),
+        'last_comment_at': Subquery(
+            comments.annotate(last=Max('created')).values('last')
+        ),
+    }
+
+
+def drifted(queryset):
+    """Ключи новостей queryset, у которых поля разошлись с комментариями."""
+    actual = actual_counters()
+    rows = queryset.annotate(
+        actual_count=actual['comment_count'],
+        actual_last=actual['last_comment_at'],
+    ).values_list(
+        'pk', 'comment_count', 'last_comment_at', 'actual_count', 'actual_last'
+    )
+    return [
+        pk for pk, count, last, actual_count, actual_last in rows
+        if (count, last) != (actual_count, actual_last)
+    ]
+
+
+def recount(queryset):
+    """Пересчитывает поля новостей queryset одним UPDATE."""
+    return queryset.update(**actual_counters(), changed_at=Now())
@@ -0,0 +1,88 @@
+"""
+Потоковая выгрузка комментариев новости в JSON Lines и CSV.
+
+Комментарии читаются одним запросом порциями по chunk_size и сразу
+превращаются в строки, так что память не зависит от их числа. У
+каждой строки есть курсор: выгрузку, оборванную на середине, можно
+продолжить с последней полученной строки.
+"""
+import csv
+import json
+from itertools import islice
+
+from yacommon.pagination import after_cursor, decode_cursor, encode_cursor
+
+from .models import Comment
+
+FIELDS = ('id', 'created', 'author', 'text', 'cursor')
+FORMATS = ('jsonl', 'csv')
+CONTENT_TYPES = {
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+    'csv': 'text/csv; charset=utf-8',
+}
+ORDERING = ('created', 'pk')
+# Строк в одном куске потокового ответа: отдавать по строке слишком
+# дорого для сервера, а кусок в 100 строк ещё не нагружает память.
+LINES_PER_CHUNK = 100
+
+
+def guess_format(path):
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def thread_comments(news_id, cursor=None):
+    """
+    Комментарии новости в порядке (created, pk), после cursor.
+
+    Некорректный курсор даёт Http404 сразу, до начала выгрузки.
+    """
+    comments = Comment.objects.filter(news_id=news_id).select_related(
+        'author'
+    ).only('created', 'text', 'author__username').order_by(*ORDERING)
+    if cursor:
+        values = decode_cursor(cursor, Comment, ORDERING)
+        comments = comments.filter(after_cursor(ORDERING, values))
+    return comments
+
+
+def records(comments, chunk_size):
+    for comment in comments.iterator(chunk_size=chunk_size):
+        yield {
+            'id': comment.pk,
+            'created': comment.created.isoformat(),
+            'author': comment.author.username,
+            'text': comment.text,
+            'cursor': encode_cursor(comment, ORDERING),
+        }
+
+
+class Echo:
+    """Файл для csv.writer, который возвращает строку вместо записи."""
+
+    def write(self, value):
+        return value
+
+
+def lines(records, file_format, header=True):
+    """
+    Строки выгрузки по одной.
+
+    Продолжение выгрузки идёт без заголовка CSV, чтобы его можно было
+    просто дописать к уже полученной части.
+    """
+    if file_format == 'csv':
+        writer = csv.DictWriter(Echo(), FIELDS)
+        if header:
+            yield writer.writeheader()
+        for record in records:
+            yield writer.writerow(record)
+        return
+    for record in records:
+        yield json.dumps(record, ensure_ascii=False) + '\n'
+
+
+def chunks(lines):
+    """Склеивает строки в куски по LINES_PER_CHUNK."""
+    lines = iter(lines)
+    while chunk := ''.join(islice(lines, LINES_PER_CHUNK)):
+        yield chunk
@@ -1,7 +1,10 @@
+from functools import lru_cache
+
 from django.forms import ModelForm
 from django.core.exceptions import ValidationError
 
 from .models import Comment
+from .moderation import WordMatcher, load_words
 
 BAD_WORDS = (
     'редиска',
@@ -11,6 +14,12 @@ BAD_WORDS = (
 WARNING = 'Не ругайтесь!'
 
 
+@lru_cache(maxsize=None)
+def get_bad_words_matcher():
+    """Автомат для запрещённых слов; строится один раз на процесс."""
+    return WordMatcher(load_words(BAD_WORDS))
+
+
 class CommentForm(ModelForm):
 
     class Meta:
@@ -20,8 +29,6 @@ class CommentForm(ModelForm):
     def clean_text(self):
         """Не позволяем ругаться в комментариях."""
         text = self.cleaned_data['text']
-        lowered_text = text.lower()
-        for word in BAD_WORDS:
-            if word in lowered_text:
-                raise ValidationError(WARNING)
+        if get_bad_words_matcher().search(text):
+            raise ValidationError(WARNING)
         return text
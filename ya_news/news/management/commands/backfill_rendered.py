@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+from django.db import reset_queries, transaction
+
+from news.models import Comment, News
+
+# Поле, которое считает update_rendered() каждой модели.
+RENDERED = (
+    (News, 'teaser', 'Анонсы новостей'),
+    (Comment, 'text_html', 'HTML комментариев'),
+)
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет анонсы новостей и HTML комментариев у строк, '
+        'сохранённых до появления этих полей или в обход save(). '
+        'С --all пересчитывает все строки, например после смены вывода.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--all', action='store_true',
+            help='Пересчитать и уже заполненные строки.',
+        )
+
+    def handle(self, *args, **options):
+        for model, field, label in RENDERED:
+            rows = model.objects.only('pk', 'text').order_by('pk')
+            if not options['all']:
+                rows = rows.filter(**{field: ''})
+            total = self.backfill(rows, field, options['batch_size'])
+            self.stdout.write(
+                f'{label}: обновлено строк {total}.',
+                self.style.SUCCESS,
+            )
+
+    def backfill(self, rows, field, batch_size):
+        """Пересчитывает поле пачками по возрастанию ключа."""
+        total, last_pk = 0, 0
+        while batch := list(rows.filter(pk__gt=last_pk)[:batch_size]):
+            last_pk = batch[-1].pk
+            for item in batch:
+                item.update_rendered()
+            with transaction.atomic():
+                rows.model.objects.bulk_update(batch, [field])
+            # При DEBUG журнал запросов хранит SQL каждой пачки.
+            reset_queries()
+            total += len(batch)
+        return total
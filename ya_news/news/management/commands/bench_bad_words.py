@@ -0,0 +1,55 @@
+import random
+import timeit
+
+from django.core.management.base import BaseCommand
+
+from news.moderation import WordMatcher
+
+ALPHABET = 'абвгдеёжзийклмнопрстуфхцчшщъыьэюя'
+
+
+def naive_search(words, text):
+    """Прежняя проверка: отдельный поиск подстроки для каждого слова."""
+    lowered_text = text.lower()
+    for word in words:
+        if word in lowered_text:
+            return True
+    return False
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает скорость автомата запрещённых слов '
+        'с проверкой каждого слова по очереди.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--words', type=int, default=5000)
+        parser.add_argument('--length', type=int, default=1000)
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--seed', type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        words = [
+            ''.join(rng.choices(ALPHABET, k=rng.randint(6, 12)))
+            for _ in range(options['words'])
+        ]
+        # Чистый текст — худший случай: обе проверки доходят до конца.
+        text = ' '.join(
+            ''.join(rng.choices(ALPHABET[:10], k=5))
+            for _ in range(options['length'] // 6)
+        )
+        build = timeit.timeit(lambda: WordMatcher(words), number=1)
+        matcher = WordMatcher(words)
+        assert matcher.search(text) == naive_search(words, text)
+        repeat = options['repeat']
+        naive = timeit.timeit(lambda: naive_search(words, text), number=repeat)
+        compiled = timeit.timeit(lambda: matcher.search(text), number=repeat)
+        self.stdout.write(
+            f'Слов: {len(words)}, длина текста: {len(text)}\n'
+            f'Построение автомата: {build * 1000:.1f} мс\n'
+            f'Цикл по словам: {naive / repeat * 1000:.3f} мс на текст\n'
+            f'Автомат: {compiled / repeat * 1000:.3f} мс на текст\n'
+            f'Ускорение: {naive / compiled:.1f}x'
+        )
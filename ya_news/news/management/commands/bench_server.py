@@ -0,0 +1,233 @@
+import asyncio
+import io
+import random
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from importlib import reload
+from urllib.error import HTTPError
+from urllib.request import Request, urlopen
+
+from django.core.handlers.asgi import ASGIHandler
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+from django.urls import clear_url_caches, reverse
+
+from news import urls as news_urls
+from news.seeding import make_discussion
+from yacommon.benchmark import temporary_database
+from yacommon.request_stats import percentile
+from yanews import urls as project_urls
+
+# Сервер, представления.
+RUNS = (
+    ('WSGI, синхронные', 'wsgi', False),
+    ('ASGI, синхронные', 'asgi', False),
+    ('ASGI, асинхронные', 'asgi', True),
+)
+HOST = 'localhost'
+
+
+def reload_urls():
+    """Пересобирает маршруты после смены настройки ASYNC_VIEWS."""
+    reload(news_urls)
+    reload(project_urls)
+    clear_url_caches()
+
+
+def wsgi_get(application, path):
+    status = []
+    environ = {
+        'REQUEST_METHOD': 'GET',
+        'PATH_INFO': path,
+        'QUERY_STRING': '',
+        'SERVER_NAME': HOST,
+        'SERVER_PORT': '80',
+        'SERVER_PROTOCOL': 'HTTP/1.1',
+        'HTTP_HOST': HOST,
+        'wsgi.version': (1, 0),
+        'wsgi.url_scheme': 'http',
+        'wsgi.input': io.BytesIO(),
+        'wsgi.errors': sys.stderr,
+        'wsgi.multithread': True,
+        'wsgi.multiprocess': False,
+        'wsgi.run_once': False,
+    }
+    response = application(
+        environ, lambda line, headers: status.append(int(line.split()[0]))
+    )
+    try:
+        for _ in response:
+            pass
+    finally:
+        response.close()
+    return status[0]
+
+
+async def asgi_get(application, path):
+    status = []
+    requested = False
+
+    async def receive():
+        nonlocal requested
+        if not requested:
+            requested = True
+            return {'type': 'http.request', 'body': b'', 'more_body': False}
+        # Клиент не отключается: Django сам снимет ожидание после ответа.
+        await asyncio.Future()
+
+    async def send(message):
+        if message['type'] == 'http.response.start':
+            status.append(message['status'])
+
+    await application(
+        {
+            'type': 'http',
+            'asgi': {'version': '3.0'},
+            'http_version': '1.1',
+            'method': 'GET',
+            'scheme': 'http',
+            'path': path,
+            'raw_path': path.encode(),
+            'query_string': b'',
+            'root_path': '',
+            'headers': [(b'host', HOST.encode())],
+            'client': ('127.0.0.1', 0),
+            'server': (HOST, 80),
+        },
+        receive,
+        send,
+    )
+    return status[0]
+
+
+def timed(get, *args):
+    started = time.perf_counter()
+    status = get(*args)
+    return status, time.perf_counter() - started
+
+
+class Command(BaseCommand):
+    help = (
+        'Нагрузочный тест главной и страницы новости: WSGI с потоками '
+        'против ASGI с синхронными и асинхронными представлениями. '
+        'По умолчанию обработчики Django вызываются в процессе на временной '
+        'базе; с --url запросы идут к уже запущенному серверу, например '
+        '«uvicorn yanews.asgi:application» или «gunicorn yanews.wsgi».'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=16)
+        parser.add_argument('--news', type=int, default=50)
+        parser.add_argument('--comments', type=int, default=20)
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help='Не отключать кеш страниц для анонимов.',
+        )
+        parser.add_argument('--seed', type=int, default=0)
+        parser.add_argument(
+            '--url', help='Адрес запущенного сервера, например '
+                          'http://127.0.0.1:8000.',
+        )
+        parser.add_argument(
+            '--path', action='append',
+            help='Путь для запросов к серверу из --url, можно несколько.',
+        )
+        parser.add_argument(
+            '--cookie', help='Заголовок Cookie для запросов к серверу.',
+        )
+
+    def handle(self, *args, **options):
+        rng = random.Random(options['seed'])
+        if options['url']:
+            paths = options['path'] or ['/']
+            paths = [rng.choice(paths) for _ in range(options['requests'])]
+            self.report(options['url'], *self.run_remote(paths, options))
+            return
+        try:
+            with temporary_database():
+                paths = self.populate(rng, options)
+                for name, server, async_views in RUNS:
+                    self.report(name, *self.run_local(
+                        server, async_views, paths, options
+                    ))
+        finally:
+            reload_urls()
+
+    def populate(self, rng, options):
+        """Данные на временной базе и случайная смесь запросов к ним."""
+        _, news = make_discussion(options['news'], options['comments'])
+        home = reverse('news:home')
+        details = [reverse('news:detail', args=(item.pk,)) for item in news]
+        return [
+            rng.choice((home, rng.choice(details)))
+            for _ in range(options['requests'])
+        ]
+
+    def run_local(self, server, async_views, paths, options):
+        overrides = {'ASYNC_VIEWS': async_views}
+        if not options['page_cache']:
+            overrides['NEWS_PAGE_CACHE_TIMEOUT'] = 0
+        with override_settings(**overrides):
+            reload_urls()
+            started = time.perf_counter()
+            if server == 'wsgi':
+                application = WSGIHandler()
+                with ThreadPoolExecutor(options['concurrency']) as executor:
+                    results = list(executor.map(
+                        lambda path: timed(wsgi_get, application, path), paths
+                    ))
+            else:
+                results = asyncio.run(
+                    self.run_asgi(ASGIHandler(), paths, options)
+                )
+            elapsed = time.perf_counter() - started
+        return results, elapsed
+
+    async def run_asgi(self, application, paths, options):
+        semaphore = asyncio.Semaphore(options['concurrency'])
+
+        async def request(path):
+            async with semaphore:
+                started = time.perf_counter()
+                status = await asgi_get(application, path)
+                return status, time.perf_counter() - started
+
+        return await asyncio.gather(*(request(path) for path in paths))
+
+    def run_remote(self, paths, options):
+        base = options['url'].rstrip('/')
+        headers = {'Cookie': options['cookie']} if options['cookie'] else {}
+
+        def get(path):
+            try:
+                with urlopen(Request(base + path, headers=headers)) as page:
+                    page.read()
+                    return page.status
+            except HTTPError as error:
+                return error.code
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(options['concurrency']) as executor:
+            results = list(executor.map(lambda path: timed(get, path), paths))
+        return results, time.perf_counter() - started
+
+    def report(self, name, results, elapsed):
+        timings = sorted(
+            seconds * 1000 for status, seconds in results
+            if status == HTTPStatus.OK
+        )
+        errors = len(results) - len(timings)
+        if not timings:
+            self.stdout.write(f'{name}: успешных ответов нет')
+            return
+        self.stdout.write(
+            f'{name}: {len(results) / elapsed:.0f} запросов в секунду, '
+            f'p50 {percentile(timings, 50):.1f} мс, '
+            f'p95 {percentile(timings, 95):.1f} мс, '
+            f'p99 {percentile(timings, 99):.1f} мс, '
+            f'ошибок {errors}'
+        )
@@ -0,0 +1,175 @@
+import logging
+import random
+import threading
+import time
+from http import HTTPStatus
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import OperationalError, connection
+from django.test import Client, override_settings
+from django.urls import reverse
+
+from news.models import Comment
+from news.seeding import make_discussion
+from yacommon.benchmark import temporary_database
+from yacommon.request_stats import percentile
+
+# Настройки SQLite и Django по умолчанию: журнал отката, полная
+# синхронизация, новое соединение на каждый запрос.
+STOCK = {
+    'pragmas': {
+        'journal_mode': 'delete',
+        'synchronous': 'full',
+        'mmap_size': 0,
+        'cache_size': -2000,
+    },
+    'CONN_MAX_AGE': 0,
+    'OPTIONS': {},
+}
+
+
+def tuned():
+    """Профиль из настроек проекта."""
+    database = settings.DATABASES['default']
+    return {
+        'pragmas': settings.SQLITE_PRAGMAS,
+        'CONN_MAX_AGE': database.get('CONN_MAX_AGE', 0),
+        'OPTIONS': database.get('OPTIONS', {}),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        'Сравнивает чтение страницы новости под одновременной записью '
+        'комментариев с настройками SQLite по умолчанию и из SQLITE_PRAGMAS. '
+        'Работает на временной базе, рабочая база не меняется.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=2)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--news', type=int, default=20)
+        parser.add_argument('--comments', type=int, default=50)
+        parser.add_argument(
+            '--pause', type=float, default=5,
+            help='Пауза писателя между комментариями, мс.',
+        )
+
+    def handle(self, *args, **options):
+        profiles = {'stock': STOCK, 'tuned': tuned()}
+        with temporary_database():
+            self.author, news = make_discussion(
+                options['news'], options['comments']
+            )
+            self.news_ids = [item.pk for item in news]
+            for name, profile in profiles.items():
+                self.report(
+                    name,
+                    self.run_profile(profile, options),
+                    options['seconds'],
+                )
+
+    def run_profile(self, profile, options):
+        """Читатели и писатели работают параллельно заданное время."""
+        database = connection.settings_dict
+        saved = database['CONN_MAX_AGE'], database['OPTIONS']
+        database['CONN_MAX_AGE'] = profile['CONN_MAX_AGE']
+        database['OPTIONS'] = profile['OPTIONS']
+        results = {
+            'read': [], 'write': [], 'read_errors': 0, 'write_errors': 0
+        }
+        lock = threading.Lock()
+        deadline = time.perf_counter() + options['seconds']
+        self.pause = options['pause'] / 1000
+        workers = (
+            [self.reader] * options['readers']
+            + [self.writer] * options['writers']
+        )
+        # PRAGMA применяются к каждому новому соединению, а журнал
+        # переключается в файле базы.
+        connection.close()
+        # Ошибки блокировки считаются, а не пишутся в лог по одной.
+        logging.disable(logging.ERROR)
+        try:
+            with override_settings(
+                SQLITE_PRAGMAS=profile['pragmas'], NEWS_PAGE_CACHE_TIMEOUT=0
+            ):
+                threads = [
+                    threading.Thread(
+                        target=worker, args=(deadline, results, lock, index)
+                    )
+                    for index, worker in enumerate(workers)
+                ]
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+        finally:
+            logging.disable(logging.NOTSET)
+            database['CONN_MAX_AGE'], database['OPTIONS'] = saved
+            connection.close()
+        return results
+
+    def reader(self, deadline, results, lock, seed):
+        rng = random.Random(seed)
+        client = Client(
+            SERVER_NAME='localhost', raise_request_exception=False
+        )
+        timings = []
+        errors = 0
+        try:
+            while time.perf_counter() < deadline:
+                url = reverse('news:detail', args=(rng.choice(self.news_ids),))
+                started = time.perf_counter()
+                if client.get(url).status_code != HTTPStatus.OK:
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+        finally:
+            connection.close()
+        with lock:
+            results['read'].extend(timings)
+            results['read_errors'] += errors
+
+    def writer(self, deadline, results, lock, seed):
+        rng = random.Random(seed)
+        timings = []
+        errors = 0
+        try:
+            while time.perf_counter() < deadline:
+                started = time.perf_counter()
+                try:
+                    Comment.objects.create(
+                        news_id=rng.choice(self.news_ids),
+                        author=self.author,
+                        text='Новый комментарий',
+                    )
+                except OperationalError:
+                    errors += 1
+                    continue
+                timings.append(time.perf_counter() - started)
+                time.sleep(self.pause)
+        finally:
+            connection.close()
+        with lock:
+            results['write'].extend(timings)
+            results['write_errors'] += errors
+
+    def report(self, name, results, seconds):
+        lines = [f'Профиль {name}:']
+        for kind, label in (('read', 'Чтение'), ('write', 'Запись')):
+            timings = sorted(value * 1000 for value in results[kind])
+            errors = results[f'{kind}_errors']
+            if not timings:
+                lines.append(f'  {label}: успешных нет, ошибок {errors}')
+                continue
+            lines.append(
+                f'  {label}: {len(timings) / seconds:.0f} в секунду, '
+                f'p50 {percentile(timings, 50):.1f} мс, '
+                f'p95 {percentile(timings, 95):.1f} мс, '
+                f'p99 {percentile(timings, 99):.1f} мс, '
+                f'ошибок {errors}'
+            )
+        self.stdout.write('\n'.join(lines))
@@ -0,0 +1,119 @@
+import json
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Permission
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from news import urls as news_urls
+from news.models import Comment, News
+from yacommon.benchmark import BenchmarkCommand, case, url_names
+from yanews import urls as project_urls
+
+ROLES = ('anonymous', 'author', 'reader')
+
+
+class Command(BenchmarkCommand):
+    data_options = (
+        'users', 'news', 'comments', 'random_seed', 'page_cache',
+    )
+    help = (
+        'Замеряет каждый маршрут news и users от лица анонима, автора '
+        'и читателя на временной базе с синтетическими данными. Пишет '
+        'перцентили времени, число запросов и память в JSON и падает, '
+        'если маршрут ухудшился по сравнению с эталоном из --baseline.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--news', type=int, default=500)
+        parser.add_argument('--comments', type=int, default=20_000)
+        parser.add_argument(
+            '--page-cache', action='store_true',
+            help='Не отключать кеш страниц для анонимов.',
+        )
+
+    def overrides(self, options):
+        if options['page_cache']:
+            return {}
+        return {'NEWS_PAGE_CACHE_TIMEOUT': 0}
+
+    def route_names(self):
+        return (
+            url_names(news_urls.urlpatterns, 'news')
+            | url_names(project_urls.auth_urls[0], 'users')
+        )
+
+    def prepare(self, options):
+        call_command(
+            'seed', users=options['users'], news=options['news'],
+            comments=options['comments'],
+            random_seed=options['random_seed'], prefix='Нагрузка',
+            stdout=StringIO(),
+        )
+        users = get_user_model().objects
+        author = users.create_user(username='Автор')
+        reader = users.create_user(username='Читатель')
+        importer = users.create_user(username='Импорт')
+        importer.user_permissions.add(
+            Permission.objects.get(codename='add_comment')
+        )
+        staff = users.create_user(username='Редактор', is_staff=True)
+        hot = News.objects.first()
+        comment = Comment.objects.create(
+            news=hot, author=author, text='Комментарий автора'
+        )
+        clients = {'anonymous': Client(SERVER_NAME='localhost')}
+        for role, user in (
+            ('author', author), ('reader', reader),
+            ('importer', importer), ('staff', staff),
+        ):
+            clients[role] = Client(SERVER_NAME='localhost')
+            clients[role].force_login(user)
+
+        detail = reverse('news:detail', args=(hot.pk,))
+        edit = reverse('news:edit', args=(comment.pk,))
+        delete = reverse('news:delete', args=(comment.pk,))
+        form = {'text': 'Новый текст комментария'}
+        batch = json.dumps({'comments': [
+            {'news': hot.pk, 'text': f'Пакетный комментарий {index}'}
+            for index in range(20)
+        ]})
+        cases = []
+        for role in ROLES:
+            cases += [
+                case('news:home', role, reverse('news:home')),
+                case('news:archive', role, reverse('news:archive')),
+                case(
+                    'news:search', role, reverse('news:search'),
+                    data={'q': hot.title.split()[0]},
+                ),
+                case('news:detail', role, detail),
+                case(
+                    'news:comments', role,
+                    reverse('news:comments', args=(hot.pk,)),
+                ),
+                case('news:edit', role, edit),
+                case('news:delete', role, delete),
+                case('users:login', role, reverse('users:login')),
+                case('users:signup', role, reverse('users:signup')),
+                case('users:logout', role, reverse('users:logout'), 'post'),
+            ]
+        cases += [
+            case('news:detail', 'reader', detail, 'post', data=form),
+            case('news:edit', 'author', edit, 'post', data=form),
+            case('news:delete', 'author', delete, 'post'),
+            case(
+                'news:comments_batch', 'importer',
+                reverse('news:comments_batch'), 'post',
+                data=batch, content_type='application/json',
+            ),
+            case('news:cache_stats', 'staff', reverse('news:cache_stats')),
+            case(
+                'news:comments_export', 'staff',
+                reverse('news:comments_export', args=(hot.pk,)),
+            ),
+        ]
+        return cases, clients
@@ -0,0 +1,77 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.http import Http404
+
+from news.export import (
+    FORMATS, chunks, guess_format, lines, records, thread_comments
+)
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Выгружает комментарии новости в файл JSON Lines или CSV, не '
+        'держа их в памяти. С --cursor дописывает прерванную выгрузку.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('news_id', type=int)
+        parser.add_argument('path', help='Файл или - для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument(
+            '--cursor', help='Курсор последней выгруженной строки.'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int,
+            default=settings.COMMENTS_EXPORT_CHUNK_SIZE,
+        )
+
+    def handle(self, *args, **options):
+        if not News.objects.filter(pk=options['news_id']).exists():
+            raise CommandError(f'Нет новости {options["news_id"]}.')
+        cursor = options['cursor']
+        try:
+            comments = thread_comments(options['news_id'], cursor)
+        except Http404:
+            raise CommandError('Некорректный курсор.')
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        self.chunk_size = options['chunk_size']
+        self.exported = 0
+        self.started = time.monotonic()
+        rows = lines(self.records(comments), file_format, header=not cursor)
+        if path == '-':
+            for chunk in chunks(rows):
+                self.stdout.write(chunk, ending='')
+        else:
+            try:
+                file = open(
+                    path, 'a' if cursor else 'w', encoding='utf-8',
+                    newline='',
+                )
+            except OSError as error:
+                raise CommandError(error)
+            with file:
+                file.writelines(rows)
+        self.stderr.write(
+            f'Выгружено комментариев: {self.exported}.',
+            style_func=self.style.SUCCESS,
+        )
+
+    def records(self, comments):
+        for record in records(comments, self.chunk_size):
+            yield record
+            self.exported += 1
+            if self.exported % self.chunk_size == 0:
+                self.report_progress()
+
+    def report_progress(self):
+        """Прогресс пишется в stderr, чтобы не смешиваться с выгрузкой."""
+        elapsed = time.monotonic() - self.started
+        self.stderr.write(
+            f'Выгружено {self.exported} комментариев, '
+            f'{self.exported / elapsed:.0f} в секунду.',
+            style_func=str,
+        )
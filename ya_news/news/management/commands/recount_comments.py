@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from news.cache import HOME, touch_on_commit
+from news.counters import drifted, recount
+from news.models import News
+
+
+class Command(BaseCommand):
+    help = (
+        'Сверяет число комментариев и время последнего из них в строках '
+        'новостей с таблицей комментариев и исправляет расхождения. '
+        'Нужна после записи комментариев в обход сигналов: загрузки '
+        'фикстур, правок в базе вручную.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000)
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать новости с расхождениями.',
+        )
+
+    def handle(self, *args, **options):
+        ids = News.objects.order_by('pk').values_list('pk', flat=True)
+        fixed = []
+        last_pk = 0
+        while batch := list(ids.filter(pk__gt=last_pk)[
+            :options['batch_size']
+        ]):
+            last_pk = batch[-1]
+            # Сверка и исправление в одной транзакции, чтобы между ними
+            # не успел вклиниться новый комментарий.
+            with transaction.atomic():
+                found = drifted(News.objects.filter(pk__in=batch))
+                if found and not options['dry_run']:
+                    recount(News.objects.filter(pk__in=found))
+                    touch_on_commit(HOME, *found)
+            fixed += found
+        verb = 'Расходятся' if options['dry_run'] else 'Исправлены'
+        self.stdout.write(
+            f'{verb} счётчики новостей: {len(fixed)}.', self.style.SUCCESS
+        )
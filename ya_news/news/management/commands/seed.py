@@ -0,0 +1,51 @@
+from django.core.management.base import CommandError
+
+from news.cache import HOME, touch
+from news.counters import recount
+from news.models import Comment, News
+from news.seeding import iter_comments, iter_news
+from yacommon.seeding import SeedCommand
+
+
+class Command(SeedCommand):
+    default_prefix = 'Читатель'
+    help = (
+        'Заполняет базу синтетическими пользователями, новостями и '
+        'комментариями для нагрузочных замеров. Строки пишутся пачками, '
+        'поэтому память не растёт с их числом.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--news', type=int, default=1000)
+        parser.add_argument('--comments', type=int, default=100_000)
+        parser.add_argument(
+            '--hot', type=int, default=10,
+            help='Сколько самых свежих новостей собирают комментарии.',
+        )
+        parser.add_argument(
+            '--hot-share', type=float, default=0.3,
+            help='Доля комментариев к горячим новостям.',
+        )
+
+    def handle(self, *args, **options):
+        if options['comments'] and not (options['news'] and options['users']):
+            raise CommandError('Комментариям нужны новости и пользователи.')
+        if not 0 <= options['hot_share'] <= 1:
+            raise CommandError('--hot-share должна быть от 0 до 1.')
+        super().handle(*args, **options)
+
+    def seed(self, rng, options):
+        author_ids = self.save_users(options)
+        last_news = self.save(
+            News, iter_news(rng, options['news']), options['news']
+        )
+        news_ids = self.new_ids(News, last_news)
+        self.save(Comment, iter_comments(
+            rng, news_ids, author_ids, options['comments'],
+            hot=options['hot'], hot_share=options['hot_share'],
+        ), options['comments'])
+        # bulk_create не посылает post_save: счётчики новостей и версию
+        # главной обновляем сами.
+        recount(News.objects.filter(pk__gt=last_news))
+        touch(HOME)
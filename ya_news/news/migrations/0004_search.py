@@ -0,0 +1,21 @@
+from django.db import migrations
+
+from yacommon.search import drop_sql, index_sql
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0003_comment_news_created_idx'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            index_sql('news_news', ('title', 'text')),
+            drop_sql('news_news'),
+        ),
+        migrations.RunSQL(
+            index_sql('news_comment', ('text',)),
+            drop_sql('news_comment'),
+        ),
+    ]
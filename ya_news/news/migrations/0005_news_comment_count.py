@@ -0,0 +1,57 @@
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from yacommon.search import keep_triggers
+
+
+def recount(apps, schema_editor):
+    """Заполняет новые поля по уже сохранённым комментариям."""
+    News = apps.get_model('news', 'News')
+    Comment = apps.get_model('news', 'Comment')
+    comments = Comment.objects.filter(news=OuterRef('pk')).order_by().values(
+        'news'
+    )
+    News.objects.update(
+        comment_count=Coalesce(
+            Subquery(comments.annotate(total=Count('pk')).values('total')), 0
+        ),
+        last_comment_at=Subquery(
+            comments.annotate(last=Max('created')).values('last')
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0004_search'),
+    ]
+
+    # AddField со значением по умолчанию пересоздаёт таблицу новостей
+    # вместе с её триггерами поиска.
+    operations = keep_triggers(
+        [('news_news', ('title', 'text'))],
+        migrations.AddField(
+            model_name='news',
+            name='comment_count',
+            field=models.PositiveIntegerField(
+                default=0, editable=False, verbose_name='Комментариев'
+            ),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='last_comment_at',
+            field=models.DateTimeField(
+                blank=True, editable=False, null=True,
+                verbose_name='Последний комментарий',
+            ),
+        ),
+        migrations.AddIndex(
+            model_name='news',
+            index=models.Index(
+                fields=['-comment_count', '-id'], name='news_discussed_idx'
+            ),
+        ),
+        migrations.RunPython(recount, migrations.RunPython.noop),
+    )
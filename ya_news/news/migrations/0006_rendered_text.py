@@ -0,0 +1,27 @@
+# Generated by Django 5.1.1 on 2026-10-18 17:42
+
+from django.db import migrations, models
+
+from yacommon.search import keep_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0005_news_comment_count'),
+    ]
+
+    # Обе AddField пересоздают таблицы вместе с триггерами поиска.
+    operations = keep_triggers(
+        [('news_news', ('title', 'text')), ('news_comment', ('text',))],
+        migrations.AddField(
+            model_name='comment',
+            name='text_html',
+            field=models.TextField(blank=True, editable=False, verbose_name='HTML текста'),
+        ),
+        migrations.AddField(
+            model_name='news',
+            name='teaser',
+            field=models.TextField(blank=True, editable=False, verbose_name='Анонс'),
+        ),
+    )
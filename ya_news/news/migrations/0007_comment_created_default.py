@@ -0,0 +1,23 @@
+# Generated by Django 5.1.1 on 2026-10-18 21:05
+
+import django.utils.timezone
+from django.db import migrations, models
+
+from yacommon.search import keep_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0006_rendered_text'),
+    ]
+
+    # AlterField пересоздаёт таблицу комментариев вместе с триггерами поиска.
+    operations = keep_triggers(
+        [('news_comment', ('text',))],
+        migrations.AlterField(
+            model_name='comment',
+            name='created',
+            field=models.DateTimeField(default=django.utils.timezone.now, editable=False),
+        ),
+    )
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.1 on 2026-10-18 22:10
+
+import django.utils.timezone
+from django.db import migrations, models
+
+from yacommon.search import keep_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('news', '0007_comment_created_default'),
+    ]
+
+    # AddField пересоздаёт таблицу новостей вместе с триггерами поиска.
+    operations = keep_triggers(
+        [('news_news', ('title', 'text'))],
+        migrations.AddField(
+            model_name='news',
+            name='changed_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Изменена'),
+            preserve_default=False,
+        ),
+    )
@@ -2,21 +2,63 @@ from datetime import datetime
 
 from django.conf import settings
 from django.db import models
+from django.template.defaultfilters import linebreaksbr
+from django.utils import timezone
+from django.utils.text import Truncator
+
+# Столько слов текста новости выводится в списках, как truncatewords.
+TEASER_WORDS = 15
+
+
+def with_rendered(update_fields, source, target):
+    """update_fields для save(): с полем source сохраняется и target."""
+    if update_fields is None or source not in update_fields:
+        return update_fields
+    return {*update_fields, target}
 
 
 class News(models.Model):
     title = models.CharField(max_length=50)
     text = models.TextField()
     date = models.DateField(default=datetime.today)
+    # Поддерживаются при записи комментариев (news.counters), чтобы
+    # списки новостей не обращались к таблице комментариев.
+    comment_count = models.PositiveIntegerField(
+        'Комментариев', default=0, editable=False
+    )
+    last_comment_at = models.DateTimeField(
+        'Последний комментарий', null=True, blank=True, editable=False
+    )
+    # Начало текста для списков, считается при сохранении.
+    teaser = models.TextField('Анонс', blank=True, editable=False)
+    # Последнее изменение новости или её комментариев, в том числе
+    # правка текста комментария: по нему строятся валидаторы страниц.
+    changed_at = models.DateTimeField('Изменена', auto_now=True)
 
     class Meta:
-        ordering = ('-date',)
+        ordering = ('-date', '-pk')
+        indexes = (
+            models.Index(fields=('-date', '-id'), name='news_date_id_idx'),
+            models.Index(
+                fields=('-comment_count', '-id'), name='news_discussed_idx'
+            ),
+        )
         verbose_name_plural = 'Новости'
         verbose_name = 'Новость'
 
     def __str__(self):
         return self.title
 
+    def update_rendered(self):
+        self.teaser = Truncator(self.text).words(TEASER_WORDS, truncate=' …')
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.update_rendered()
+        update_fields = with_rendered(update_fields, 'text', 'teaser')
+        if update_fields is not None:
+            update_fields = {*update_fields, 'changed_at'}
+        super().save(*args, update_fields=update_fields, **kwargs)
+
 
 class Comment(models.Model):
     news = models.ForeignKey(
@@ -28,10 +70,29 @@ class Comment(models.Model):
         on_delete=models.CASCADE,
     )
     text = models.TextField()
-    created = models.DateTimeField(auto_now_add=True)
+    # Текст с переводами строк в <br>, считается при сохранении.
+    text_html = models.TextField('HTML текста', blank=True, editable=False)
+    # Не auto_now_add: генераторы данных задают время явно.
+    created = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
-        ordering = ('created',)
+        ordering = ('created', 'pk')
+        indexes = (
+            models.Index(
+                fields=('news', 'created'), name='comment_news_created_idx'
+            ),
+        )
 
     def __str__(self):
         return self.text[:50]
+
+    def update_rendered(self):
+        self.text_html = linebreaksbr(self.text, autoescape=True)
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.update_rendered()
+        super().save(
+            *args,
+            update_fields=with_rendered(update_fields, 'text', 'text_html'),
+            **kwargs,
+        )
@@ -0,0 +1,79 @@
+"""Поиск запрещённых слов за один проход по тексту."""
+from collections import deque
+
+from django.conf import settings
+
+
+class WordMatcher:
+    """
+    Автомат Ахо — Корасик над набором слов.
+
+    Строится один раз; проверка текста не зависит от размера словаря
+    и проходит по тексту ровно один раз.
+    """
+
+    def __init__(self, words):
+        self.transitions = [{}]
+        self.terminal = [False]
+        for word in words:
+            self._add(word.lower())
+        self.fallback = [0] * len(self.transitions)
+        self._link()
+
+    def _add(self, word):
+        if not word:
+            return
+        node = 0
+        for char in word:
+            child = self.transitions[node].get(char)
+            if child is None:
+                child = len(self.transitions)
+                self.transitions[node][char] = child
+                self.transitions.append({})
+                self.terminal.append(False)
+            node = child
+        self.terminal[node] = True
+
+    def _link(self):
+        """Проставляет переходы на самый длинный собственный суффикс."""
+        queue = deque(self.transitions[0].values())
+        while queue:
+            node = queue.popleft()
+            for char, child in self.transitions[node].items():
+                queue.append(child)
+                state = self.fallback[node]
+                while state and char not in self.transitions[state]:
+                    state = self.fallback[state]
+                self.fallback[child] = self.transitions[state].get(char, 0)
+                if self.terminal[self.fallback[child]]:
+                    self.terminal[child] = True
+
+    def search(self, text):
+        """Есть ли в тексте хотя бы одно слово из набора."""
+        transitions, fallback = self.transitions, self.fallback
+        terminal = self.terminal
+        node = 0
+        for char in text.lower():
+            while node and char not in transitions[node]:
+                node = fallback[node]
+            node = transitions[node].get(char, 0)
+            if terminal[node]:
+                return True
+        return False
+
+
+def load_words(default):
+    """
+    Набор запрещённых слов.
+
+    Берётся из файла NEWS_BAD_WORDS_FILE (по слову в строке, строки
+    с # пропускаются), иначе из NEWS_BAD_WORDS, иначе default.
+    """
+    path = getattr(settings, 'NEWS_BAD_WORDS_FILE', None)
+    if path:
+        with open(path, encoding='utf-8') as file:
+            return tuple(
+                line.strip() for line in file
+                if line.strip() and not line.lstrip().startswith('#')
+            )
+    return tuple(getattr(settings, 'NEWS_BAD_WORDS', None) or default)
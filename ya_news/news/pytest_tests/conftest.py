@@ -1,13 +1,67 @@
 from datetime import timedelta
+from importlib import reload
+from types import SimpleNamespace
 
 import pytest
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.db import connections, transaction
+from django.test import override_settings
 from django.test.client import Client
-from django.urls import reverse
+from django.urls import clear_url_caches, reverse
 from django.utils import timezone
 
+from news import urls as news_urls
 from news.models import Comment, News
+from news.seeding import make_comments, make_news
+from yacommon.seeding import make_users
+from yacommon.sqlite import forbid_working_databases
+from yanews import urls as project_urls
 from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
 
+LARGE_AUTHORS = 100
+LARGE_NEWS = 200
+LARGE_COMMENTS = 5000
+LARGE_HOT_COMMENTS = 2000
+
+forbid_working_databases()
+
+
+@pytest.fixture(autouse=True)
+def clear_cache():
+    """Откат транзакции теста не сбрасывает кеш страниц."""
+    cache.clear()
+
+
+def reload_urls():
+    reload(news_urls)
+    reload(project_urls)
+    clear_url_caches()
+
+
+@pytest.fixture
+def async_views():
+    """Маршруты с асинхронными вариантами главной и страницы новости."""
+    with override_settings(ASYNC_VIEWS=True):
+        reload_urls()
+        yield
+    reload_urls()
+
+
+@pytest.fixture
+def replica(settings):
+    """
+    Чтение с реплики через соединение default.
+
+    TEST MIRROR направляет реплику в тестовую базу, но отдельное
+    соединение не увидело бы данных из транзакции теста.
+    """
+    settings.DATABASE_REPLICAS = ['replica']
+    original = connections['replica']
+    connections['replica'] = connections['default']
+    yield
+    connections['replica'] = original
+
 
 @pytest.fixture
 def author(django_user_model):
@@ -19,6 +73,23 @@ def reader(django_user_model):
     return django_user_model.objects.create_user(username='Читатель')
 
 
+@pytest.fixture
+def importer(django_user_model):
+    """Пользователь с правом пакетной загрузки комментариев."""
+    user = django_user_model.objects.create_user(username='Импорт')
+    user.user_permissions.add(
+        Permission.objects.get(codename='add_comment')
+    )
+    return user
+
+
+@pytest.fixture
+def importer_client(importer):
+    client = Client()
+    client.force_login(importer)
+    return client
+
+
 @pytest.fixture
 def news():
     return News.objects.create(
@@ -36,6 +107,15 @@ def comment(news, author):
     )
 
 
+@pytest.fixture
+def staff_client(django_user_model):
+    client = Client()
+    client.force_login(
+        django_user_model.objects.create_user('Админ', is_staff=True)
+    )
+    return client
+
+
 @pytest.fixture
 def author_client(author):
     client = Client()
@@ -59,28 +139,44 @@ def login_redirect_to_detail(login_url, detail_url):
 @pytest.fixture
 def many_news(db):
     """Создаёт больше новостей, чем помещается на главной странице."""
-    News.objects.bulk_create(
-        News(
-            title=f'Новость {i}',
-            text='Текст',
-            date=timezone.now().date() - timedelta(days=i),
-        )
-        for i in range(NEWS_COUNT_ON_HOME_PAGE + 2)
-    )
+    make_news(NEWS_COUNT_ON_HOME_PAGE + 2)
 
 
 @pytest.fixture
 def many_comments(news, author):
     """Создаёт 222 комментария с разными датами."""
-    comments = []
-    for i in range(222):
-        comment = Comment.objects.create(
-            text=f'Комментарий {i}',
-            news=news, author=author
-        )
-        comment.created = comment.created.replace(microsecond=i)
-        comments.append(comment)
-    Comment.objects.bulk_update(comments, ['created'])
+    make_comments(
+        [news], [author], 222, step=timedelta(microseconds=1),
+        oldest=timezone.now().replace(microsecond=0),
+    )
+
+
+@pytest.fixture(scope='module')
+def large_dataset(django_db_setup, django_db_blocker):
+    """
+    Тысячи строк, общие для всех тестов модуля.
+
+    Данные создаются один раз в транзакции, которая откатывается после
+    модуля; каждый тест работает внутри неё в своей точке сохранения.
+    """
+    with django_db_blocker.unblock(), transaction.atomic():
+        authors = make_users(LARGE_AUTHORS)
+        news = make_news(LARGE_NEWS)
+        make_comments(news, authors, LARGE_COMMENTS)
+        # Горячая новость: на неё приходится почти половина комментариев.
+        make_comments(news[:1], authors, LARGE_HOT_COMMENTS)
+        yield SimpleNamespace(authors=authors, news=news, hot=news[0])
+        transaction.set_rollback(True)
+
+
+@pytest.fixture
+def archive_url():
+    return reverse('news:archive')
+
+
+@pytest.fixture
+def search_url():
+    return reverse('news:search')
 
 
 @pytest.fixture
@@ -88,6 +184,11 @@ def detail_url(news):
     return reverse('news:detail', args=(news.id,))
 
 
+@pytest.fixture
+def comments_url(news):
+    return reverse('news:comments', args=(news.id,))
+
+
 @pytest.fixture
 def edit_url(comment):
     return reverse('news:edit', args=(comment.id,))
@@ -98,6 +199,21 @@ def delete_url(comment):
     return reverse('news:delete', args=(comment.id,))
 
 
+@pytest.fixture
+def batch_url():
+    return reverse('news:comments_batch')
+
+
+@pytest.fixture
+def cache_stats_url():
+    return reverse('news:cache_stats')
+
+
+@pytest.fixture
+def export_url(news):
+    return reverse('news:comments_export', args=(news.id,))
+
+
 @pytest.fixture
 def login_url():
     return reverse('users:login')
@@ -0,0 +1,226 @@
+import csv
+import json
+import sqlite3
+from contextlib import closing
+from io import StringIO
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+
+from news import urls as news_urls
+from news.counters import drifted
+from news.management.commands.benchmark import Command as BenchmarkCommand
+from news.models import Comment, News
+from yacommon.benchmark import regressions, url_names
+from yacommon.replicas import sync_replica
+from yanews import urls as project_urls
+
+pytestmark = pytest.mark.django_db
+
+SEED = dict(
+    users=20, news=10, comments=300, hot=2, hot_share=0.5,
+    batch_size=7, random_seed=1,
+)
+
+
+def seed(**options):
+    call_command('seed', stdout=StringIO(), **{**SEED, **options})
+
+
+def test_seed_creates_skewed_dataset(django_user_model):
+    """Горячие новости собирают больше комментариев, даты по порядку."""
+    seed()
+    assert django_user_model.objects.count() == SEED['users']
+    assert News.objects.count() == SEED['news']
+    assert Comment.objects.count() == SEED['comments']
+    counts = dict(News.objects.annotate(
+        total=Count('comment')
+    ).values_list('pk', 'total'))
+    hot = News.objects.order_by('pk').values_list('pk', flat=True)[:2]
+    assert min(counts[pk] for pk in hot) > max(
+        total for pk, total in counts.items() if pk not in hot
+    )
+    created = list(Comment.objects.order_by('pk').values_list(
+        'created', flat=True
+    ))
+    assert created == sorted(created)
+
+
+def test_seed_refuses_taken_prefix():
+    """Повторный запуск с тем же префиксом не создаёт дублей."""
+    seed(comments=0)
+    with pytest.raises(CommandError):
+        seed(comments=0)
+    seed(comments=0, prefix='Гость')
+    assert News.objects.count() == 2 * SEED['news']
+
+
+def test_seed_fills_comment_counters():
+    """Счётчики новостей совпадают с таблицей комментариев."""
+    seed()
+    assert drifted(News.objects.all()) == []
+
+
+def test_recount_comments_fixes_drift(news, comment):
+    """Команда находит и исправляет счётчики, записанные в обход сигналов."""
+    News.objects.update(comment_count=5, last_comment_at=None)
+    out = StringIO()
+    call_command('recount_comments', dry_run=True, stdout=out)
+    assert 'Расходятся счётчики новостей: 1.' in out.getvalue()
+    assert drifted(News.objects.all()) == [news.pk]
+
+    call_command('recount_comments', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    assert (news.comment_count, news.last_comment_at) == (1, comment.created)
+
+
+@pytest.mark.django_db(transaction=True)
+def test_sync_replica_copies_committed_data(news, tmp_path):
+    """В файле реплики те же новости, что и в default; копия повторяема."""
+    path = tmp_path / 'replica.sqlite3'
+    sync_replica(path)
+    News.objects.create(title='Свежая', text='Текст')
+    sync_replica(path)
+    with closing(sqlite3.connect(path)) as replica:
+        titles = replica.execute(
+            'SELECT title FROM news_news ORDER BY id'
+        ).fetchall()
+    assert titles == [(news.title,), ('Свежая',)]
+
+
+def test_sync_replicas_requires_replicas():
+    """Без DATABASE_REPLICAS и аргументов копировать некуда."""
+    with pytest.raises(CommandError):
+        call_command('sync_replicas', stdout=StringIO())
+
+
+def test_backfill_rendered_fills_empty_rows(news, comment):
+    """Команда заполняет пустые поля и с --all пересчитывает остальные."""
+    News.objects.update(teaser='')
+    Comment.objects.update(text_html='Устаревший HTML')
+    call_command('backfill_rendered', batch_size=1, stdout=StringIO())
+    news.refresh_from_db()
+    comment.refresh_from_db()
+    assert news.teaser == news.text
+    assert comment.text_html == 'Устаревший HTML'
+
+    call_command('backfill_rendered', all=True, stdout=StringIO())
+    comment.refresh_from_db()
+    assert comment.text_html == comment.text
+
+
+def test_export_comments_resumes_into_same_file(news, many_comments,
+                                                tmp_path):
+    """Команда пишет выгрузку в файл и с --cursor дописывает её."""
+    path = tmp_path / 'comments.jsonl'
+    err = StringIO()
+    call_command(
+        'export_comments', news.pk, path, chunk_size=100, stderr=err
+    )
+    assert 'Выгружено комментариев: 222.' in err.getvalue()
+    rows = [json.loads(line) for line in path.read_text().splitlines()]
+    path.write_text(
+        ''.join(json.dumps(row, ensure_ascii=False) + '\n'
+                for row in rows[:150])
+    )
+    call_command(
+        'export_comments', news.pk, path, cursor=rows[149]['cursor'],
+        stderr=StringIO(),
+    )
+    assert [
+        json.loads(line) for line in path.read_text().splitlines()
+    ] == rows
+
+
+def test_export_comments_to_stdout(news, comment):
+    """С путём - выгрузка идёт в stdout команды."""
+    out = StringIO()
+    call_command(
+        'export_comments', news.pk, '-', format='csv', stdout=out,
+        stderr=StringIO(),
+    )
+    rows = list(csv.DictReader(StringIO(out.getvalue())))
+    assert [row['text'] for row in rows] == [comment.text]
+
+
+def test_export_comments_rejects_unknown_news(db, tmp_path):
+    """Для несуществующей новости файл не создаётся."""
+    with pytest.raises(CommandError):
+        call_command('export_comments', 0, tmp_path / 'comments.csv')
+    assert not (tmp_path / 'comments.csv').exists()
+
+
+def test_benchmark_covers_every_route_without_side_effects(settings):
+    """Замер проходит по всем маршрутам и не меняет данные."""
+    settings.NEWS_PAGE_CACHE_TIMEOUT = 0
+    options = dict(
+        users=5, news=3, comments=20, random_seed=0, repeat=1, warmup=0
+    )
+    results = BenchmarkCommand().run(options)
+    names = {route.split()[1] for route in results}
+    assert names == (
+        url_names(news_urls.urlpatterns, 'news')
+        | url_names(project_urls.auth_urls[0], 'users')
+    )
+    assert results['GET news:home']['anonymous']['queries'] == 1
+    assert results['POST news:delete']['author']['status'] == 302
+    assert Comment.objects.count() == options['comments'] + 1
+
+
+def test_benchmark_command_leaves_database_untouched(
+    news, comment, tmp_path
+):
+    """Замер идёт на временной базе, данные и соединение остаются."""
+    output = tmp_path / 'benchmark.json'
+    out = StringIO()
+    call_command(
+        'benchmark', users=5, news=3, comments=20, repeat=1, warmup=0,
+        output=output, stdout=out,
+    )
+    assert 'GET news:home' in out.getvalue()
+    report = json.loads(output.read_text())
+    assert report['options']['comments'] == 20
+    assert list(News.objects.values_list('pk', flat=True)) == [news.pk]
+    assert list(Comment.objects.values_list('pk', flat=True)) == [comment.pk]
+
+
+def test_bench_sqlite_leaves_database_untouched(news, comment):
+    """Сравнение профилей SQLite идёт на временной базе."""
+    out = StringIO()
+    call_command(
+        'bench_sqlite', readers=1, writers=1, seconds=0.2, news=2,
+        comments=3, stdout=out,
+    )
+    assert 'Профиль tuned' in out.getvalue()
+    assert list(News.objects.values_list('pk', flat=True)) == [news.pk]
+    assert list(Comment.objects.values_list('pk', flat=True)) == [comment.pk]
+
+
+def test_bench_server_leaves_database_untouched(news, comment):
+    """Замер серверов идёт на временной базе и без ошибок."""
+    out = StringIO()
+    call_command(
+        'bench_server', requests=20, concurrency=2, news=2, comments=3,
+        stdout=out,
+    )
+    assert out.getvalue().count('ошибок 0') == 3
+    assert list(News.objects.values_list('pk', flat=True)) == [news.pk]
+    assert list(Comment.objects.values_list('pk', flat=True)) == [comment.pk]
+
+
+def test_benchmark_reports_regressions():
+    """Рост медианы сверх порога, лишний запрос и смена статуса."""
+    old = {'status': 200, 'p50_ms': 10, 'queries': 2, 'alloc_kb': 100}
+    baseline = {'GET news:home': {'anonymous': old}}
+    assert regressions(
+        {'GET news:home': {'anonymous': {**old, 'p50_ms': 12}}},
+        baseline, threshold=0.3, min_ms=1,
+    ) == []
+    found = regressions(
+        {'GET news:home': {'anonymous': {
+            **old, 'status': 500, 'p50_ms': 14, 'queries': 3,
+        }}},
+        baseline, threshold=0.3, min_ms=1,
+    )
+    assert len(found) == 3
@@ -1,10 +1,33 @@
+import tracemalloc
+from http import HTTPStatus
+
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.db.models.functions import Now
+from django.urls import resolve, reverse
 
 from news.forms import CommentForm
+from news.models import Comment, News
+from news.seeding import make_comments
+from news.views import AsyncNewsList
 from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
 
 pytestmark = pytest.mark.django_db
 
+HOME_PAGE_QUERIES = 1
+COMMENTS_ON_HOT_NEWS = 1000
+
+
+def get_peak_memory(client, url):
+    """Пиковый объём памяти, выделенной при обработке запроса."""
+    tracemalloc.start()
+    try:
+        client.get(url)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
 
 def test_news_count_on_homepage(client, many_news, home_url):
     """На главной странице выводится ограниченное число новостей."""
@@ -23,6 +46,80 @@ def test_news_order_on_homepage(client, home_url):
     assert list(response.context['object_list']) == expected
 
 
+def test_home_page_cost_does_not_depend_on_comments(
+        client, home_url, news, comment, author, settings,
+        django_assert_num_queries
+):
+    """Число запросов и память главной не растут вместе с комментариями."""
+    settings.NEWS_PAGE_CACHE_TIMEOUT = 0
+    with django_assert_num_queries(HOME_PAGE_QUERIES):
+        client.get(home_url)
+    few_comments_peak = get_peak_memory(client, home_url)
+
+    make_comments([news], [author], COMMENTS_ON_HOT_NEWS)
+    with django_assert_num_queries(HOME_PAGE_QUERIES):
+        response = client.get(home_url)
+    many_comments_peak = get_peak_memory(client, home_url)
+
+    assert response.context['object_list'][0].comment_count == (
+        COMMENTS_ON_HOT_NEWS + 1
+    )
+    assert many_comments_peak < few_comments_peak * 1.5
+
+
+def test_archive_walks_all_news_in_order(
+        client, many_news, archive_url, settings, django_assert_num_queries
+):
+    """Архив по курсорам выводит все новости без повторов и по порядку."""
+    settings.NEWS_COUNT_ON_ARCHIVE_PAGE = 5
+    url, seen = archive_url, []
+    while url:
+        with django_assert_num_queries(1):
+            response = client.get(url)
+        page = list(response.context['object_list'])
+        assert len(page) <= settings.NEWS_COUNT_ON_ARCHIVE_PAGE
+        seen.extend(page)
+        cursor = response.context['next_cursor']
+        url = cursor and f'{archive_url}?cursor={cursor}'
+    assert seen == list(News.objects.all())
+
+
+def test_archive_sorts_by_discussion(client, many_news, archive_url,
+                                     author, settings):
+    """Обсуждаемые новости идут первыми, курсор сохраняет сортировку."""
+    settings.NEWS_COUNT_ON_ARCHIVE_PAGE = 5
+    stories = list(News.objects.order_by('pk'))
+    make_comments(stories[3:5], [author], 6)
+    make_comments(stories[4:5], [author], 2)
+    expected = sorted(
+        News.objects.all(), key=lambda item: (item.comment_count, item.pk),
+        reverse=True,
+    )
+    url, seen = f'{archive_url}?sort=discussed', []
+    while url:
+        response = client.get(url)
+        seen.extend(response.context['object_list'])
+        cursor = response.context['next_cursor']
+        url = cursor and f'{archive_url}?sort=discussed&cursor={cursor}'
+    assert seen == expected
+    assert seen[0].comment_count > seen[-1].comment_count
+
+
+def test_stored_html_matches_filters(client, author, news, home_url,
+                                     detail_url):
+    """Готовый HTML и запасной вывод через фильтры совпадают."""
+    news.text = 'Очень длинный текст <i>новости</i> ' * 10
+    news.save()
+    Comment.objects.create(news=news, author=author, text='<b>раз</b>\nдва')
+    pages = [client.get(url).content for url in (home_url, detail_url)]
+    News.objects.update(teaser='')
+    Comment.objects.update(text_html='')
+    cache.clear()
+    assert [client.get(url).content for url in (home_url, detail_url)] == (
+        pages
+    )
+
+
 def test_comments_order_on_detail_page(client, many_comments, detail_url):
     """Комментарии на странице новости отсортированы по возрастанию даты."""
     response = client.get(detail_url)
@@ -31,6 +128,71 @@ def test_comments_order_on_detail_page(client, many_comments, detail_url):
     assert created == sorted(created)
 
 
+def test_comments_are_paginated_on_detail_page(
+        client, many_comments, news, detail_url, comments_url, settings,
+        django_assert_num_queries
+):
+    """Комментарии выводятся страницами; подгрузка даёт все по порядку."""
+    settings.COMMENTS_COUNT_ON_PAGE = 50
+    response = client.get(detail_url)
+    seen = list(response.context['comments'])
+    assert len(seen) == settings.COMMENTS_COUNT_ON_PAGE
+    cursor = response.context['next_cursor']
+    while cursor:
+        with django_assert_num_queries(1):
+            response = client.get(comments_url, {'cursor': cursor})
+        seen.extend(response.context['comments'])
+        cursor = response.context['next_cursor']
+    assert seen == list(news.comment_set.all())
+
+
+@pytest.mark.parametrize('query', ('ЁЛКИ', 'елки', 'ёлк', 'Елк'))
+def test_search_finds_russian_word_forms(client, search_url, query):
+    """Поиск не зависит от регистра и «ё», находит формы по основе."""
+    found = News.objects.create(title='Про ёлки', text='Ёлки <b>зелёные</b>')
+    News.objects.create(title='Другое', text='Ничего общего')
+    response = client.get(search_url, {'q': query})
+    assert [news.pk for news in response.context['object_list']] == [
+        found.pk
+    ]
+
+
+def test_search_highlights_and_escapes_snippet(client, search_url):
+    """Найденные слова размечены, а HTML из текста экранирован."""
+    News.objects.create(title='Новость', text='<b>Зелёные</b> ёлки')
+    response = client.get(search_url, {'q': 'елки'})
+    snippet = response.context['object_list'][0].snippet
+    assert '<mark>елки</mark>' in snippet
+    assert '&lt;b&gt;' in snippet
+
+
+def test_search_ranks_and_paginates(client, search_url, settings):
+    """Совпадение в заголовке выше; результаты разбиты на страницы."""
+    settings.SEARCH_RESULTS_ON_PAGE = 2
+    News.objects.bulk_create(
+        News(title=f'Новость {i}', text='Про погоду') for i in range(3)
+    )
+    best = News.objects.create(title='Погода', text='Про погоду')
+    first = client.get(search_url, {'q': 'погод'})
+    assert first.context['object_list'][0].pk == best.pk
+    assert first.context['paginator'].count == 4
+    last = client.get(search_url, {'q': 'погод', 'page': 2})
+    assert len(last.context['object_list']) == 2
+
+
+def test_search_index_follows_changes(client, search_url, comment, news):
+    """Индекс обновляется при изменении и удалении записей."""
+    params = {'q': 'Поменяли', 'scope': 'comments'}
+    comment.text = 'Поменяли текст'
+    comment.save()
+    results = client.get(search_url, params).context['object_list']
+    assert [(c.pk, c.news_title) for c in results] == [
+        (comment.pk, news.title)
+    ]
+    comment.delete()
+    assert not client.get(search_url, params).context['object_list']
+
+
 def test_comment_form_not_visible_for_anonymous(client, detail_url):
     """Анонимный пользователь не видит форму комментария."""
     response = client.get(detail_url)
@@ -42,3 +204,85 @@ def test_comment_form_visible_for_authorized(author_client, detail_url):
     response = author_client.get(detail_url)
     assert 'form' in response.context
     assert isinstance(response.context['form'], CommentForm)
+
+
+def test_home_story_fragment_follows_changed_at(reader_client, news,
+                                                home_url):
+    """Блок новости на главной берётся из кеша, пока новость не изменится."""
+    reader_client.get(home_url)
+    title = 'Новый заголовок'
+    News.objects.filter(pk=news.pk).update(title=title)
+    assert title not in reader_client.get(home_url).content.decode()
+    News.objects.filter(pk=news.pk).update(changed_at=Now())
+    assert title in reader_client.get(home_url).content.decode()
+
+
+def test_comment_fragment_follows_new_comments(
+        author_client, reader_client, comment, detail_url,
+        django_capture_on_commit_callbacks
+):
+    """Новый комментарий сразу виден в закешированном списке."""
+    reader_client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, {'text': 'Свежий комментарий'})
+    assert 'Свежий комментарий' in (
+        reader_client.get(detail_url).content.decode()
+    )
+
+
+def test_comment_links_not_shared_through_fragment_cache(
+        author_client, reader_client, detail_url, edit_url
+):
+    """Ссылки правки из копии списка у автора не попадают к читателю."""
+    assert edit_url in author_client.get(detail_url).content.decode()
+    assert edit_url not in reader_client.get(detail_url).content.decode()
+    assert edit_url in author_client.get(detail_url).content.decode()
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_home_page(async_client, many_news, home_url,
+                         django_assert_num_queries):
+    """Асинхронная главная отдаёт те же новости за то же число запросов."""
+    assert resolve(home_url).func.view_class is AsyncNewsList
+    with django_assert_num_queries(HOME_PAGE_QUERIES):
+        response = async_to_sync(async_client.get)(home_url)
+    news = response.context['object_list']
+    assert len(news) == NEWS_COUNT_ON_HOME_PAGE
+    assert [item.pk for item in news] == list(
+        News.objects.values_list('pk', flat=True)[:NEWS_COUNT_ON_HOME_PAGE]
+    )
+    cached = async_to_sync(async_client.get)(
+        home_url, headers={'If-None-Match': response['ETag']}
+    )
+    assert cached.status_code == HTTPStatus.NOT_MODIFIED
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_detail_page(async_client, author, many_comments, detail_url,
+                           comments_url, settings):
+    """Асинхронная страница новости выводит комментарии постранично."""
+    response = async_to_sync(async_client.get)(detail_url)
+    comments = response.context['comments']
+    assert len(comments) == settings.COMMENTS_COUNT_ON_PAGE
+    assert comments == list(Comment.objects.order_by('created', 'pk')[
+        :settings.COMMENTS_COUNT_ON_PAGE
+    ])
+    assert 'form' not in response.context
+
+    async_client.force_login(author)
+    response = async_to_sync(async_client.get)(detail_url)
+    assert isinstance(response.context['form'], CommentForm)
+    next_page = async_to_sync(async_client.get)(
+        comments_url, {'cursor': response.context['next_cursor']}
+    )
+    assert next_page.context['comments'][0] == Comment.objects.order_by(
+        'created', 'pk'
+    )[settings.COMMENTS_COUNT_ON_PAGE]
+
+
+@pytest.mark.usefixtures('async_views')
+def test_async_detail_page_not_found(async_client, news, author):
+    """Несуществующая новость в асинхронном варианте даёт 404."""
+    url = reverse('news:detail', args=(news.pk + 1,))
+    response = async_to_sync(async_client.get)(url)
+    assert response.status_code == HTTPStatus.NOT_FOUND
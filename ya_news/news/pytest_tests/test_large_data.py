@@ -0,0 +1,52 @@
+import pytest
+from django.urls import reverse
+
+from news.models import Comment
+from yanews.settings import NEWS_COUNT_ON_HOME_PAGE
+from .conftest import LARGE_COMMENTS, LARGE_HOT_COMMENTS, LARGE_NEWS
+
+pytestmark = pytest.mark.django_db
+
+HOME_PAGE_QUERIES = 1
+# Новость и страница комментариев.
+DETAIL_PAGE_QUERIES = 2
+
+
+def test_home_page_on_large_dataset(client, large_dataset, home_url,
+                                    django_assert_num_queries):
+    """Главная с тысячами комментариев: один запрос и верные счётчики."""
+    with django_assert_num_queries(HOME_PAGE_QUERIES):
+        response = client.get(home_url)
+    news = response.context['object_list']
+    assert len(news) == NEWS_COUNT_ON_HOME_PAGE
+    per_news = LARGE_COMMENTS // LARGE_NEWS
+    assert news[0].pk == large_dataset.hot.pk
+    assert news[0].comment_count == per_news + LARGE_HOT_COMMENTS
+    assert {item.comment_count for item in news[1:]} == {per_news}
+
+
+def test_hot_news_detail_on_large_dataset(client, large_dataset, settings,
+                                          django_assert_num_queries):
+    """Страница горячей новости выводит только первую страницу комментариев."""
+    url = reverse('news:detail', args=(large_dataset.hot.pk,))
+    with django_assert_num_queries(DETAIL_PAGE_QUERIES):
+        response = client.get(url)
+    comments = response.context['comments']
+    assert len(comments) == settings.COMMENTS_COUNT_ON_PAGE
+    assert comments == list(
+        Comment.objects.filter(news=large_dataset.hot).order_by(
+            'created', 'pk'
+        )[:settings.COMMENTS_COUNT_ON_PAGE]
+    )
+
+
+@pytest.mark.parametrize('run', ('first', 'second'))
+def test_dataset_is_intact_in_every_test(large_dataset, run):
+    """
+    Каждый тест видит общий набор целиком.
+
+    Оба прогона удаляют комментарии горячей новости: тот, что идёт
+    вторым, проверяет откат точки сохранения первого в любом порядке.
+    """
+    assert Comment.objects.count() == LARGE_COMMENTS + LARGE_HOT_COMMENTS
+    Comment.objects.filter(news=large_dataset.hot).delete()
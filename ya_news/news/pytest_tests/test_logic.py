@@ -1,13 +1,41 @@
+import csv
+import json
+import sys
 from http import HTTPStatus
+from importlib import import_module
 
 import pytest
+from asgiref.sync import async_to_sync
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.test import Client
+from django.urls import reverse
 
-from news.forms import BAD_WORDS
-from news.models import Comment
+from news.cache import PAGE_TIMEOUTS, VERSION_KEY, get_stats, touch
+from news.forms import BAD_WORDS, WARNING, CommentForm
+from news.models import Comment, News
+from news.moderation import WordMatcher
+from news.search import NewsSearchResults
+from yacommon.auth import check_shared_cache
+from yacommon.replicas import PIN_COOKIE, current_replica
+from yacommon.request_stats import store
+from yacommon.sqlite import get_pragmas
 
 
 pytestmark = pytest.mark.django_db
 
+# Валидаторы страницы выводятся из строк её новостей; аноним получает
+# их вместе со страницей из кеша без обращения к базе.
+CONDITIONAL_GET_QUERIES = 1
+# Сессия и пользователь авторизованного клиента читаются из базы.
+AUTH_QUERIES = 2
+# Загрузка новости или комментария и запись изменения.
+WRITE_QUERIES = 2
+# Счётчик комментариев или время изменения в строке новости.
+COUNTER_QUERIES = 1
+# Права пользователя и его групп.
+PERMISSION_QUERIES = 2
 FORM_DATA = {'text': 'Текст формы'}
 FORM_DATA_BAD_WORDS = [{'text': word} for word in BAD_WORDS]
 
@@ -44,6 +72,29 @@ def test_comment_with_forbidden_words_not_published(author_client,
     assert 'text' in response.context['form'].errors
 
 
+@pytest.mark.parametrize('text, expected', [
+    ('Ушерс и херсонес', True),
+    ('Сам ты ХЕР', True),
+    ('Она же шер', False),
+    ('хе-хе, шеф', False),
+    ('', False),
+])
+def test_word_matcher_finds_overlapping_words(text, expected):
+    """Автомат находит слова внутри текста, в том числе перекрывающиеся."""
+    words = ('хер', 'шерс', 'херсон', 'ушерх')
+    naive = any(word in text.lower() for word in words)
+    assert WordMatcher(words).search(text) is expected is naive
+
+
+def test_bad_words_are_loaded_from_file(settings, tmp_path):
+    """Запрещённые слова читаются из файла, указанного в настройках."""
+    path = tmp_path / 'bad_words.txt'
+    path.write_text('# Словарь модерации\nкапуста\n', encoding='utf-8')
+    settings.NEWS_BAD_WORDS_FILE = str(path)
+    assert 'text' in CommentForm({'text': 'Кислая КАПУСТА'}).errors
+    assert CommentForm({'text': BAD_WORDS[0]}).is_valid()
+
+
 def test_author_can_edit_own_comment(author_client, edit_url, comment):
     """Автор может редактировать свой комментарий; привязки не меняются."""
     response = author_client.post(edit_url, data=FORM_DATA)
@@ -62,6 +113,77 @@ def test_author_can_delete_own_comment(author_client, delete_url, comment):
     assert Comment.objects.count() == 0
 
 
+@pytest.mark.parametrize('url, data', (
+    (pytest.lazy_fixture('detail_url'), FORM_DATA),
+    (pytest.lazy_fixture('edit_url'), FORM_DATA),
+    (pytest.lazy_fixture('delete_url'), {}),
+))
+def test_comment_writes_fit_query_budget(author_client, url, data,
+                                         django_assert_num_queries):
+    """Запрос объекта, запись и обновление строки новости."""
+    with django_assert_num_queries(
+        AUTH_QUERIES + WRITE_QUERIES + COUNTER_QUERIES
+    ):
+        response = author_client.post(url, data=data)
+    assert response.status_code == HTTPStatus.FOUND
+
+
+def test_comment_counters_follow_writes(author_client, detail_url,
+                                        delete_url, news, comment):
+    """Число и время последнего комментария хранятся в строке новости."""
+    author_client.post(detail_url, data=FORM_DATA)
+    news.refresh_from_db()
+    added = Comment.objects.latest('created')
+    assert (news.comment_count, news.last_comment_at) == (2, added.created)
+
+    added.delete()
+    news.refresh_from_db()
+    assert (news.comment_count, news.last_comment_at) == (1, comment.created)
+    author_client.post(delete_url)
+    news.refresh_from_db()
+    assert (news.comment_count, news.last_comment_at) == (0, None)
+
+
+def test_deleting_with_drifted_counter(author_client, delete_url, news,
+                                       comment):
+    """Отставший счётчик не мешает удалить комментарий и не уходит в минус."""
+    News.objects.filter(pk=news.pk).update(comment_count=0)
+    response = author_client.post(delete_url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert Comment.objects.count() == 0
+    news.refresh_from_db()
+    assert (news.comment_count, news.last_comment_at) == (0, None)
+
+
+def test_news_deletion_skips_counters(news, comment,
+                                      django_assert_num_queries):
+    """Удаление новости не обновляет счётчик на каждый комментарий."""
+    # Выборка комментариев и два DELETE, без UPDATE новости.
+    with django_assert_num_queries(3):
+        news.delete()
+    assert Comment.objects.count() == 0
+
+
+def test_comment_html_follows_text(author_client, detail_url, edit_url,
+                                   comment):
+    """HTML комментария считается при создании и правке, текст экранирован."""
+    author_client.post(detail_url, data={'text': '<b>раз</b>\nдва'})
+    added = Comment.objects.latest('created')
+    assert added.text_html == '&lt;b&gt;раз&lt;/b&gt;<br>два'
+
+    author_client.post(edit_url, data={'text': 'три\nчетыре'})
+    comment.refresh_from_db()
+    assert comment.text_html == 'три<br>четыре'
+
+
+def test_teaser_follows_text_with_update_fields(news):
+    """Анонс сохраняется вместе с текстом и при save(update_fields)."""
+    news.text = ' '.join(['слово'] * 20)
+    news.save(update_fields=['text'])
+    news.refresh_from_db()
+    assert news.teaser == ' '.join(['слово'] * 15) + ' …'
+
+
 def test_user_cannot_edit_foreign_comment(reader_client, edit_url, comment):
     """Пользователь не может редактировать чужой комментарий"""
     response = reader_client.post(edit_url, data=FORM_DATA)
@@ -84,3 +206,482 @@ def test_user_cannot_delete_foreign_comment(reader_client,
     assert still.text == comment.text
     assert still.author == comment.author
     assert still.news == comment.news
+
+
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('home_url'), pytest.lazy_fixture('detail_url')
+))
+def test_anonymous_pages_are_cached(client, url, django_assert_num_queries):
+    """Повторный запрос анонима отдаётся из кеша без обращения к базе."""
+    first = client.get(url)
+    with django_assert_num_queries(0):
+        second = client.get(url)
+    assert second.content == first.content
+    assert get_stats() == {'hits': 1, 'misses': 1, 'hit_ratio': 0.5}
+
+
+def test_versions_change_after_commit(news,
+                                      django_capture_on_commit_callbacks):
+    """Версия страницы меняется только после фиксации изменения."""
+    touch(news.pk)
+    key = VERSION_KEY.format(news.pk)
+    version = cache.get(key)
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+        assert cache.get(key) == version
+    assert cache.get(key) != version
+
+
+def test_authorized_pages_are_not_cached(author_client, detail_url):
+    """Страницы авторизованных пользователей не кешируются."""
+    author_client.get(detail_url)
+    author_client.get(detail_url)
+    assert get_stats()['hits'] == 0
+
+
+def test_comment_changes_invalidate_cache(
+        client, author_client, news, detail_url, home_url,
+        django_capture_on_commit_callbacks
+):
+    """Добавление, правка и удаление комментария сбрасывают кеш."""
+    client.get(home_url)
+    client.get(detail_url)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(detail_url, data=FORM_DATA)
+    assert FORM_DATA['text'] in client.get(detail_url).content.decode()
+    assert 'Комментариев: 1' in client.get(home_url).content.decode()
+
+    comment = Comment.objects.get()
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(
+            reverse('news:edit', args=(comment.id,)), data={'text': 'Правка'}
+        )
+    assert 'Правка' in client.get(detail_url).content.decode()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(reverse('news:delete', args=(comment.id,)))
+    assert 'Правка' not in client.get(detail_url).content.decode()
+    assert 'Комментариев' not in client.get(home_url).content.decode()
+    assert get_stats()['hits'] == 0
+
+
+def test_news_changes_invalidate_cache(client, news, detail_url, home_url,
+                                       django_capture_on_commit_callbacks):
+    """Изменение новости сбрасывает кеш её страницы и главной."""
+    client.get(home_url)
+    client.get(detail_url)
+    news.title = 'Новый заголовок'
+    with django_capture_on_commit_callbacks(execute=True):
+        news.save()
+    assert news.title in client.get(detail_url).content.decode()
+    assert news.title in client.get(home_url).content.decode()
+
+
+@pytest.mark.parametrize('mode, user_timeout, queries', (
+    ('db', 0, 2),
+    ('db', 60, 1),
+    ('cached_db', 60, 0),
+    ('signed_cookies', 60, 0),
+))
+def test_session_modes_cut_auth_queries(author, news, home_url, settings,
+                                        mode, user_timeout, queries,
+                                        django_assert_num_queries):
+    """Запросы на сессию и пользователя при каждом режиме сессий."""
+    settings.SESSION_ENGINE = f'django.contrib.sessions.backends.{mode}'
+    settings.USER_CACHE_TIMEOUT = user_timeout
+    client = Client()
+    client.force_login(author)
+    etag = client.get(home_url)['ETag']
+    with django_assert_num_queries(CONDITIONAL_GET_QUERIES + queries):
+        response = client.get(home_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_missing_news_gets_no_page_version(client):
+    """Запросы несуществующих новостей не заводят ключей в кеше."""
+    url = reverse('news:detail', args=(404,))
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND
+    assert cache.get(VERSION_KEY.format(404)) is None
+
+
+def test_validators_survive_lost_cache(client, news, detail_url):
+    """Другой процесс без кеша страниц выдаёт тот же ETag."""
+    etag = client.get(detail_url)['ETag']
+    cache.clear()
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED
+
+
+def test_comment_edit_changes_validators(author_client, detail_url,
+                                         edit_url, comment,
+                                         django_capture_on_commit_callbacks):
+    """Правка комментария меняет ETag страницы новости."""
+    etag = author_client.get(detail_url)['ETag']
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(edit_url, data={'text': 'Новый текст'})
+    assert author_client.get(detail_url)['ETag'] != etag
+
+
+@pytest.mark.parametrize('name, value', (
+    ('SESSION_ENGINE', 'django.contrib.sessions.backends.cached_db'),
+    ('USER_CACHE_TIMEOUT', 60),
+))
+def test_auth_cache_needs_shared_cache(settings, tmp_path, name, value):
+    """Кеш авторизации в памяти процесса запрещён, в общем кеше — нет."""
+    setattr(settings, name, value)
+    with pytest.raises(ImproperlyConfigured):
+        check_shared_cache()
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tmp_path,
+    }}
+    check_shared_cache()
+
+
+def test_page_cache_needs_shared_cache_with_many_processes(settings,
+                                                           tmp_path):
+    """Несколько процессов и кеш страниц в памяти несовместимы."""
+    check_shared_cache(PAGE_TIMEOUTS)
+    settings.SERVER_PROCESSES = 4
+    with pytest.raises(ImproperlyConfigured):
+        check_shared_cache(PAGE_TIMEOUTS)
+    settings.NEWS_PAGE_CACHE_TIMEOUT = 0
+    check_shared_cache(PAGE_TIMEOUTS)
+    settings.NEWS_PAGE_CACHE_TIMEOUT = 60
+    settings.CACHES = {'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': tmp_path,
+    }}
+    check_shared_cache(PAGE_TIMEOUTS)
+
+
+def test_cached_user_follows_changes(author_client, author, edit_url):
+    """Блокировка пользователя действует со следующего запроса."""
+    assert author_client.get(edit_url).status_code == HTTPStatus.OK
+    author.is_active = False
+    author.save()
+    assert author_client.get(edit_url).status_code == HTTPStatus.FOUND
+
+
+@pytest.mark.parametrize('client_fixture, url, queries', [
+    (pytest.lazy_fixture('client'), pytest.lazy_fixture('home_url'), 0),
+    (pytest.lazy_fixture('client'), pytest.lazy_fixture('detail_url'), 0),
+    (pytest.lazy_fixture('author_client'), pytest.lazy_fixture('home_url'),
+     CONDITIONAL_GET_QUERIES + AUTH_QUERIES),
+    (pytest.lazy_fixture('author_client'), pytest.lazy_fixture('detail_url'),
+     CONDITIONAL_GET_QUERIES + AUTH_QUERIES),
+])
+def test_conditional_get_returns_not_modified(client_fixture, url, queries,
+                                              news,
+                                              django_assert_num_queries):
+    """Актуальная копия у клиента: 304 без рендеринга шаблона."""
+    response = client_fixture.get(url)
+    with django_assert_num_queries(queries):
+        by_etag = client_fixture.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag']
+        )
+    by_date = client_fixture.get(
+        url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+    )
+    for not_modified in (by_etag, by_date):
+        assert not_modified.status_code == HTTPStatus.NOT_MODIFIED
+        assert not_modified.templates == []
+        assert not_modified['ETag'] == response['ETag']
+
+
+def test_etag_changes_with_comments(client, author_client, comment,
+                                    detail_url, home_url, edit_url,
+                                    django_capture_on_commit_callbacks):
+    """Новый или изменённый комментарий меняет ETag страниц."""
+    etags = {url: client.get(url)['ETag'] for url in (home_url, detail_url)}
+    with django_capture_on_commit_callbacks(execute=True):
+        author_client.post(edit_url, data=FORM_DATA)
+    for url, etag in etags.items():
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == HTTPStatus.OK
+        assert response['ETag'] != etag
+
+
+def test_etag_differs_between_users(client, author_client, detail_url):
+    """Страницы разных пользователей имеют разные ETag."""
+    assert client.get(detail_url)['ETag'] != (
+        author_client.get(detail_url)['ETag']
+    )
+
+
+def test_request_stats_are_opt_in(client, detail_url):
+    """Без настройки замеры не ведутся и заголовка нет."""
+    assert 'Server-Timing' not in client.get(detail_url)
+    assert client.get(reverse('request_stats')).status_code == (
+        HTTPStatus.FOUND
+    )
+
+
+def test_request_stats_headers_and_summary(client, settings, detail_url,
+                                           django_user_model,
+                                           django_assert_num_queries):
+    """Заголовок Server-Timing и сводка по имени URL."""
+    settings.REQUEST_STATS_ENABLED = True
+    store.clear()
+    with django_assert_num_queries(2) as captured:
+        response = client.get(detail_url)
+    queries = len(captured)
+    assert f'desc="{queries} queries"' in response['Server-Timing']
+
+    staff = django_user_model.objects.create_user('Админ', is_staff=True)
+    client.force_login(staff)
+    summary = client.get(reverse('request_stats')).json()
+    assert summary['news:detail']['requests'] == 1
+    assert summary['news:detail']['queries']['p99'] == queries
+    assert summary['news:detail']['size']['p50'] == len(response.content)
+    assert summary['news:detail']['render_ms']['p50'] > 0
+
+
+def test_sqlite_pragmas_applied(settings):
+    """Соединение с базой открыто с PRAGMA из настроек."""
+    names = ('synchronous', 'busy_timeout', 'cache_size')
+    assert get_pragmas(connection, names) == {
+        'synchronous': 1,
+        'busy_timeout': settings.SQLITE_PRAGMAS['busy_timeout'],
+        'cache_size': settings.SQLITE_PRAGMAS['cache_size'],
+    }
+
+
+def test_search_triggers_survive_migrations():
+    """Миграции, которые пересоздают таблицы, возвращают триггеры поиска."""
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger'")
+        triggers = {row[0] for row in cursor.fetchall()}
+    assert triggers >= {
+        f'{table}_fts_{event}'
+        for table in ('news_news', 'news_comment')
+        for event in ('insert', 'update', 'delete')
+    }
+
+
+def test_production_settings_come_from_environment(monkeypatch):
+    """Без ключа в окружении боевые настройки не загружаются."""
+    monkeypatch.delitem(sys.modules, 'yanews.settings_production', False)
+    monkeypatch.delenv('DJANGO_SECRET_KEY', raising=False)
+    monkeypatch.setenv('DJANGO_ALLOWED_HOSTS', 'news.example, example')
+    with pytest.raises(ImproperlyConfigured):
+        import_module('yanews.settings_production')
+
+    monkeypatch.setenv('DJANGO_SECRET_KEY', 'боевой-ключ')
+    production = import_module('yanews.settings_production')
+    assert production.SECRET_KEY == 'боевой-ключ'
+    assert production.ALLOWED_HOSTS == ['news.example', 'example']
+    assert production.DEBUG is False
+
+
+def post_batch(client, url, comments):
+    return client.post(
+        url, {'comments': comments}, content_type='application/json'
+    )
+
+
+def test_batch_creates_valid_comments_and_reports_errors(
+        importer_client, importer, batch_url, news
+):
+    """Пакет сохраняет корректные комментарии и объясняет остальные."""
+    other = News.objects.create(title='Другая', text='Текст')
+    response = post_batch(importer_client, batch_url, [
+        {'news': news.pk, 'text': 'Первый'},
+        {'news': other.pk, 'text': f'Какой {BAD_WORDS[0]}'},
+        {'news': other.pk + 1, 'text': 'Нет новости'},
+        {'news': news.pk},
+        'не объект',
+        {'news': other.pk, 'text': 'Второй'},
+    ])
+    assert response.status_code == HTTPStatus.OK
+    results = response.json()['results']
+    assert [result['index'] for result in results] == list(range(6))
+    created = [result['id'] for result in results if 'id' in result]
+    assert list(
+        Comment.objects.order_by('pk').values_list('pk', 'news', 'author')
+    ) == [
+        (created[0], news.pk, importer.pk), (created[1], other.pk, importer.pk)
+    ]
+    assert results[1]['errors']['text'][0]['message'] == WARNING
+    assert results[2]['errors']['news'][0]['code'] == 'not_found'
+    assert results[3]['errors']['text'][0]['code'] == 'required'
+    assert results[4]['errors']['__all__'][0]['code'] == 'invalid'
+
+
+@pytest.mark.parametrize('size', (1, 50))
+def test_batch_query_count_does_not_depend_on_size(
+        importer_client, batch_url, news, size, django_assert_num_queries
+):
+    """Пакет любого размера — проверка новостей, вставка и счётчики."""
+    comments = [{'news': news.pk, 'text': f'Текст {i}'} for i in range(size)]
+    # Новости пакета, точка сохранения, вставка, счётчики и освобождение.
+    with django_assert_num_queries(
+        AUTH_QUERIES + PERMISSION_QUERIES + 4 + COUNTER_QUERIES
+    ):
+        post_batch(importer_client, batch_url, comments)
+    assert Comment.objects.count() == size
+
+
+def test_batch_refreshes_cached_pages(client, importer_client, batch_url,
+                                      news, detail_url,
+                                      django_capture_on_commit_callbacks):
+    """После пакета страница новости и главная показывают новые данные."""
+    client.get(detail_url)
+    with django_capture_on_commit_callbacks(execute=True):
+        post_batch(
+            importer_client, batch_url, [{'news': news.pk, 'text': 'Тут'}]
+        )
+    response = client.get(detail_url)
+    assert [comment.text for comment in response.context['comments']] == [
+        'Тут'
+    ]
+
+
+def test_batch_csrf_token_flow(importer, batch_url, news):
+    """Без токена пакет отклоняется, с токеном из GET — принимается."""
+    client = Client(enforce_csrf_checks=True)
+    client.force_login(importer)
+    comments = [{'news': news.pk, 'text': 'Текст'}]
+    assert post_batch(
+        client, batch_url, comments
+    ).status_code == HTTPStatus.FORBIDDEN
+    token = client.get(batch_url).json()['csrf_token']
+    response = client.post(
+        batch_url, {'comments': comments}, content_type='application/json',
+        HTTP_X_CSRFTOKEN=token,
+    )
+    assert response.status_code == HTTPStatus.OK
+    assert Comment.objects.count() == 1
+
+
+@pytest.mark.parametrize(
+    'body',
+    (b'{', b'[]', b'{"comments": {}}', '{"comments": "x"}'.encode()),
+)
+def test_batch_rejects_malformed_payload(importer_client, batch_url, body):
+    """Тело не по формату — ошибка 400 без изменений в базе."""
+    response = importer_client.post(
+        batch_url, body, content_type='application/json'
+    )
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Comment.objects.count() == 0
+
+
+def test_batch_size_is_limited(importer_client, batch_url, news, settings):
+    """Слишком большой пакет отклоняется целиком."""
+    settings.COMMENTS_BATCH_SIZE = 2
+    comments = [{'news': news.pk, 'text': 'Текст'}] * 3
+    response = post_batch(importer_client, batch_url, comments)
+    assert response.status_code == HTTPStatus.BAD_REQUEST
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.parametrize(
+    'client_fixture', (pytest.lazy_fixture('client'),
+                       pytest.lazy_fixture('reader_client'))
+)
+def test_batch_requires_permission(client_fixture, batch_url, news):
+    """Без права news.add_comment пакет не принимается."""
+    response = post_batch(
+        client_fixture, batch_url, [{'news': news.pk, 'text': 'Текст'}]
+    )
+    assert response.status_code == HTTPStatus.FORBIDDEN
+    assert Comment.objects.count() == 0
+
+
+@pytest.mark.usefixtures('replica')
+def test_read_views_use_replica(author_client, home_url, detail_url, comment):
+    """Главная и новость читаются с реплики, пользователь — с default."""
+    response = author_client.get(home_url)
+    assert response.context['object_list'][0]._state.db == 'replica'
+    response = author_client.get(detail_url)
+    assert response.context['news']._state.db == 'replica'
+    assert response.context['comments'][0]._state.db == 'replica'
+    assert response.context['user']._state.db == 'default'
+
+
+@pytest.mark.usefixtures('replica')
+def test_commenter_reads_primary_after_comment(author_client, reader_client,
+                                               detail_url, news):
+    """Автор видит свой комментарий сразу: он читает с default."""
+    response = author_client.post(detail_url, data=FORM_DATA)
+    assert PIN_COOKIE in response.cookies
+    response = author_client.get(detail_url)
+    assert response.context['news']._state.db == 'default'
+    assert [item.text for item in response.context['comments']] == [
+        FORM_DATA['text']
+    ]
+    response = reader_client.get(detail_url)
+    assert response.context['news']._state.db == 'replica'
+
+
+@pytest.mark.usefixtures('replica')
+@pytest.mark.parametrize('url', (
+    pytest.lazy_fixture('home_url'), pytest.lazy_fixture('detail_url')
+))
+def test_replica_pages_are_not_cached(client, url, comment):
+    """Построенное по реплике не сохраняется в кеш и идёт без ETag."""
+    first = client.get(url)
+    assert 'ETag' not in first
+    assert first.context['fragment_timeout'] == 0
+    client.get(url)
+    assert get_stats() == {'hits': 0, 'misses': 2, 'hit_ratio': 0.0}
+
+
+@pytest.mark.usefixtures('replica')
+def test_search_counts_and_pages_on_one_database(news):
+    """Число найденного и страница берутся с базы, выбранной при поиске."""
+    token = current_replica.set('replica')
+    try:
+        results = NewsSearchResults(news.title)
+    finally:
+        current_replica.reset(token)
+    assert results.db == 'replica'
+    assert results.count() == 1
+    assert [item._state.db for item in results[0:1]] == ['replica']
+
+
+@pytest.mark.usefixtures('replica', 'async_views')
+def test_async_detail_uses_replica(async_client, detail_url, comment):
+    """Асинхронная страница новости тоже читает с реплики."""
+    response = async_to_sync(async_client.get)(detail_url)
+    assert response.context['news']._state.db == 'replica'
+    assert response.context['comments'][0]._state.db == 'replica'
+
+
+def exported(response):
+    return b''.join(response.streaming_content).decode()
+
+
+def test_export_streams_thread_in_order(staff_client, export_url, news,
+                                        many_comments):
+    """Выгрузка отдаёт все комментарии по порядку в обоих форматах."""
+    expected = list(
+        news.comment_set.order_by('created', 'pk').values_list('pk', flat=True)
+    )
+    response = staff_client.get(export_url)
+    assert response.streaming
+    assert response['Content-Disposition'] == (
+        f'attachment; filename="news-{news.pk}-comments.jsonl"'
+    )
+    rows = [json.loads(line) for line in exported(response).splitlines()]
+    assert [row['id'] for row in rows] == expected
+
+    response = staff_client.get(export_url, {'format': 'csv'})
+    rows = list(csv.DictReader(exported(response).splitlines()))
+    assert [int(row['id']) for row in rows] == expected
+    assert rows[0]['author'] == 'Автор'
+
+
+def test_export_resumes_after_cursor(staff_client, export_url, many_comments):
+    """С курсором строки выгрузка продолжается со следующей, без заголовка."""
+    lines = exported(staff_client.get(export_url, {'format': 'csv'}))
+    rows = list(csv.DictReader(lines.splitlines()))
+    response = staff_client.get(
+        export_url, {'format': 'csv', 'cursor': rows[99]['cursor']}
+    )
+    rest = exported(response)
+    assert list(csv.DictReader(
+        lines.splitlines()[:101] + rest.splitlines()
+    )) == rows
@@ -2,22 +2,30 @@ import pytest
 
 from http import HTTPStatus
 
+from django.urls import reverse
+
 
 pytestmark = pytest.mark.django_db
 
 OK = HTTPStatus.OK
 FOUND = HTTPStatus.FOUND
 NOT_FOUND = HTTPStatus.NOT_FOUND
+FORBIDDEN = HTTPStatus.FORBIDDEN
 
 CLIENT = pytest.lazy_fixture('client')
 AUTHOR_CLIENT = pytest.lazy_fixture('author_client')
 READER_CLIENT = pytest.lazy_fixture('reader_client')
 
 HOME_URL = pytest.lazy_fixture('home_url')
+ARCHIVE_URL = pytest.lazy_fixture('archive_url')
+SEARCH_URL = pytest.lazy_fixture('search_url')
 LOGIN_URL = pytest.lazy_fixture('login_url')
 DETAIL_URL = pytest.lazy_fixture('detail_url')
+COMMENTS_URL = pytest.lazy_fixture('comments_url')
 EDIT_URL = pytest.lazy_fixture('edit_url')
 DELETE_URL = pytest.lazy_fixture('delete_url')
+CACHE_STATS_URL = pytest.lazy_fixture('cache_stats_url')
+EXPORT_URL = pytest.lazy_fixture('export_url')
 LOGIN_URL_WITH_EDIT = pytest.lazy_fixture('login_url_with_edit')
 LOGIN_URL_WITH_DELETE = pytest.lazy_fixture('login_url_with_delete')
 
@@ -29,6 +37,14 @@ LOGIN_URL_WITH_DELETE = pytest.lazy_fixture('login_url_with_delete')
         (AUTHOR_CLIENT, HOME_URL, 'get', OK),
         (READER_CLIENT, HOME_URL, 'get', OK),
 
+        (CLIENT, ARCHIVE_URL, 'get', OK),
+        (AUTHOR_CLIENT, ARCHIVE_URL, 'get', OK),
+        (READER_CLIENT, ARCHIVE_URL, 'get', OK),
+
+        (CLIENT, SEARCH_URL, 'get', OK),
+        (AUTHOR_CLIENT, SEARCH_URL, 'get', OK),
+        (READER_CLIENT, SEARCH_URL, 'get', OK),
+
         (CLIENT, LOGIN_URL, 'get', OK),
         (AUTHOR_CLIENT, LOGIN_URL, 'get', OK),
         (READER_CLIENT, LOGIN_URL, 'get', OK),
@@ -37,6 +53,10 @@ LOGIN_URL_WITH_DELETE = pytest.lazy_fixture('login_url_with_delete')
         (AUTHOR_CLIENT, DETAIL_URL, 'get', OK),
         (READER_CLIENT, DETAIL_URL, 'get', OK),
 
+        (CLIENT, COMMENTS_URL, 'get', OK),
+        (AUTHOR_CLIENT, COMMENTS_URL, 'get', OK),
+        (READER_CLIENT, COMMENTS_URL, 'get', OK),
+
         (CLIENT, EDIT_URL, 'get', FOUND),
         (AUTHOR_CLIENT, EDIT_URL, 'get', OK),
         (READER_CLIENT, EDIT_URL, 'get', NOT_FOUND),
@@ -44,6 +64,12 @@ LOGIN_URL_WITH_DELETE = pytest.lazy_fixture('login_url_with_delete')
         (CLIENT, DELETE_URL, 'get', FOUND),
         (AUTHOR_CLIENT, DELETE_URL, 'get', OK),
         (READER_CLIENT, DELETE_URL, 'get', NOT_FOUND),
+
+        (CLIENT, CACHE_STATS_URL, 'get', FOUND),
+        (AUTHOR_CLIENT, CACHE_STATS_URL, 'get', FORBIDDEN),
+
+        (CLIENT, EXPORT_URL, 'get', FOUND),
+        (AUTHOR_CLIENT, EXPORT_URL, 'get', FORBIDDEN),
     ],
 )
 def test_status_codes_for_various_pages(client_fixture,
@@ -66,3 +92,25 @@ def test_status_codes_for_various_pages(client_fixture,
 def test_anonymous_redirects(client, url, expected_redirect):
     """Аноним перенаправляется на логин при попытке редактировать/удалить."""
     assert client.get(url).url == expected_redirect
+
+
+@pytest.mark.parametrize('name', ('news:detail', 'news:comments'))
+def test_missing_news_not_found(client, news, name):
+    """Страница и комментарии несуществующей новости дают 404."""
+    url = reverse(name, args=(news.id + 1,))
+    assert client.get(url).status_code == NOT_FOUND
+
+
+@pytest.mark.parametrize('cursor', ['мусор', 'WyJ4Il0', 'bnVsbA'])
+def test_archive_with_broken_cursor(client, archive_url, cursor):
+    """Испорченный курсор архива даёт 404, а не ошибку сервера."""
+    response = client.get(archive_url, {'cursor': cursor})
+    assert response.status_code == NOT_FOUND
+
+
+@pytest.mark.parametrize(
+    'params', [{'cursor': 'мусор'}, {'format': 'xml'}]
+)
+def test_export_with_broken_params(staff_client, export_url, params):
+    """Неизвестный формат или испорченный курсор выгрузки дают 404."""
+    assert staff_client.get(export_url, params).status_code == NOT_FOUND
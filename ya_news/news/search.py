@@ -0,0 +1,29 @@
+"""Полнотекстовый поиск по новостям и комментариям (SQLite FTS5)."""
+from yacommon.search import SearchResults
+
+from .models import Comment, News
+
+
+class NewsSearchResults(SearchResults):
+    model = News
+    fts = 'news_news_fts'
+    weights = (10.0, 1.0)
+    sql = (
+        'SELECT n.id, n.title, n.date, '
+        "snippet({fts}, -1, %s, %s, '…', %s) AS snippet "
+        'FROM {fts} JOIN news_news n ON n.id = {fts}.rowid '
+        'WHERE {fts} MATCH %s ORDER BY bm25({fts}, {weights})'
+    )
+
+
+class CommentSearchResults(SearchResults):
+    model = Comment
+    fts = 'news_comment_fts'
+    weights = (1.0,)
+    sql = (
+        'SELECT c.id, c.news_id, c.created, n.title AS news_title, '
+        "snippet({fts}, 0, %s, %s, '…', %s) AS snippet "
+        'FROM {fts} JOIN news_comment c ON c.id = {fts}.rowid '
+        'JOIN news_news n ON n.id = c.news_id '
+        'WHERE {fts} MATCH %s ORDER BY bm25({fts}, {weights})'
+    )
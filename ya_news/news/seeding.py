@@ -0,0 +1,116 @@
+"""
+Быстрое создание больших наборов данных для тестов и замеров.
+
+make_* пишут все строки одним bulk_create, а даты задаются явно,
+чтобы порядок записей не зависел от скорости вставки. iter_* выдают
+несохранённые объекты по одному для save_in_batches из yacommon.
+"""
+from datetime import timedelta
+from itertools import cycle
+
+from django.utils import timezone
+
+from yacommon.seeding import make_users, phrase, skewed
+
+from .counters import comments_added
+from .models import Comment, News
+
+WORDS = (
+    'новость', 'съезд', 'жильё', 'объявление', 'щедрый', 'ёлка', 'чиновник',
+    'подъезд', 'шёпот', 'экономика', 'юбилей', 'хоккей', 'цифровой',
+    'погода', 'выборы', 'школа', 'мост', 'дорога', 'учёный', 'открытие',
+    'музей', 'театр', 'город', 'район', 'жители', 'проект', 'мэрия',
+    'весна', 'урожай', 'сбор', 'фестиваль', 'выставка', 'сосед', 'двор',
+)
+
+
+def rendered(item):
+    """Заполняет поля, которые иначе считает save(), и возвращает item."""
+    item.update_rendered()
+    return item
+
+
+def make_news(count, newest=None, step=timedelta(days=1)):
+    """Новости от newest (по умолчанию сегодня) назад с шагом step."""
+    newest = newest or timezone.localdate()
+    return News.objects.bulk_create(
+        rendered(News(
+            title=f'Новость {index}',
+            text='Текст новости',
+            date=newest - step * index,
+        ))
+        for index in range(count)
+    )
+
+
+def make_comments(news, authors, count, oldest=None,
+                  step=timedelta(seconds=1)):
+    """
+    Комментарии к новостям news по кругу от авторов authors по кругу.
+
+    Время создания растёт от oldest с шагом step в порядке создания.
+    """
+    oldest = oldest or timezone.now() - step * count
+    comments = Comment.objects.bulk_create(
+        rendered(Comment(
+            news=item,
+            author=author,
+            text=f'Комментарий {index}',
+            created=oldest + step * index,
+        ))
+        for index, item, author in zip(
+            range(count), cycle(news), cycle(authors)
+        )
+    )
+    comments_added(comments)
+    return comments
+
+
+def make_discussion(news_count, comments_per_news):
+    """
+    Автор и news_count новостей с comments_per_news его комментариями.
+
+    Общие данные нагрузочных команд bench_sqlite и bench_server.
+    """
+    [author] = make_users(1, 'Автор')
+    news = make_news(news_count)
+    make_comments(news, [author], news_count * comments_per_news)
+    return author, news
+
+
+def iter_news(rng, count, newest=None):
+    """Новости с русскими заголовками, от newest назад по дню."""
+    newest = newest or timezone.localdate()
+    max_length = News._meta.get_field('title').max_length
+    for index in range(count):
+        yield rendered(News(
+            title=phrase(rng, WORDS, rng.randint(2, 5))[:max_length],
+            text=phrase(rng, WORDS, rng.randint(20, 80)),
+            date=newest - timedelta(days=index),
+        ))
+
+
+def iter_comments(rng, news_ids, author_ids, count, hot=0, hot_share=0,
+                  oldest=None, step=timedelta(seconds=1)):
+    """
+    Комментарии с перекосом, как на настоящем сайте.
+
+    Доля hot_share комментариев приходится на первые hot новостей
+    списка, остальные распределены поровну. Авторы — длинный хвост:
+    немногие пишут много, большинство — по одному-два комментария.
+    Счётчики новостей после сохранения нужно пересчитать через
+    news.counters.recount.
+    """
+    oldest = oldest or timezone.now() - step * count
+    hot_ids = news_ids[:hot]
+    for index in range(count):
+        if hot_ids and rng.random() < hot_share:
+            news_id = rng.choice(hot_ids)
+        else:
+            news_id = rng.choice(news_ids)
+        yield rendered(Comment(
+            news_id=news_id,
+            author_id=skewed(rng, author_ids),
+            text=phrase(rng, WORDS, rng.randint(3, 30)),
+            created=oldest + step * index,
+        ))
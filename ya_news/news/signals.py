@@ -0,0 +1,60 @@
+from functools import partial
+
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .cache import HOME, forget, touch_on_commit
+from .counters import comment_edited, comment_removed, comments_added
+from .forms import get_bad_words_matcher
+from .models import Comment, News
+
+
+@receiver(post_save, sender=News)
+def news_changed(sender, instance, **kwargs):
+    """Новость видна на своей странице и, возможно, на главной."""
+    touch_on_commit(HOME, instance.pk)
+
+
+@receiver(post_delete, sender=News)
+def news_deleted(sender, instance, **kwargs):
+    """Версия страницы удалённой новости больше не нужна."""
+    touch_on_commit(HOME)
+    transaction.on_commit(partial(forget, instance.pk))
+
+
+@receiver((post_save, post_delete), sender=Comment)
+def comment_changed(sender, instance, **kwargs):
+    """Комментарий виден на странице новости, а их число — на главной."""
+    touch_on_commit(HOME, instance.news_id)
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw=False, **kwargs):
+    """
+    Счётчик и время изменения новости.
+
+    Загрузку фикстур исправляет recount_comments.
+    """
+    if raw:
+        return
+    if created:
+        comments_added([instance])
+    else:
+        comment_edited(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, origin=None, **kwargs):
+    """При удалении самой новости обновлять её счётчик незачем."""
+    if isinstance(origin, News) or getattr(origin, 'model', None) is News:
+        return
+    comment_removed(instance)
+
+
+@receiver(setting_changed)
+def bad_words_changed(setting, **kwargs):
+    """Пересобирает автомат запрещённых слов при смене настроек."""
+    if setting in ('NEWS_BAD_WORDS', 'NEWS_BAD_WORDS_FILE'):
+        get_bad_words_matcher.cache_clear()
@@ -1,16 +1,38 @@
+from django.conf import settings
 from django.urls import path
 
 from news import views
 
 app_name = 'news'
 
+if settings.ASYNC_VIEWS:
+    news_list, news_detail = views.AsyncNewsList, views.AsyncNewsDetailView
+else:
+    news_list, news_detail = views.NewsList, views.NewsDetailView
+
 urlpatterns = [
-    path('', views.NewsList.as_view(), name='home'),
-    path('news/<int:pk>/', views.NewsDetailView.as_view(), name='detail'),
+    path('', news_list.as_view(), name='home'),
+    path('archive/', views.NewsArchive.as_view(), name='archive'),
+    path('search/', views.NewsSearch.as_view(), name='search'),
+    path('news/<int:pk>/', news_detail.as_view(), name='detail'),
+    path(
+        'news/<int:pk>/comments/',
+        views.NewsCommentList.as_view(),
+        name='comments'
+    ),
+    path(
+        'news/<int:pk>/comments/export/',
+        views.CommentExport.as_view(),
+        name='comments_export'
+    ),
     path(
         'delete_comment/<int:pk>/',
         views.CommentDelete.as_view(),
         name='delete'
     ),
     path('edit_comment/<int:pk>/', views.CommentUpdate.as_view(), name='edit'),
+    path(
+        'comments/batch/', views.CommentBatch.as_view(), name='comments_batch'
+    ),
+    path('cache/stats/', views.CacheStats.as_view(), name='cache_stats'),
 ]
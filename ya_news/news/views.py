@@ -1,49 +1,239 @@
+import json
+
+from functools import cached_property
+
+from asgiref.sync import sync_to_async
 from django.conf import settings
-from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.mixins import (
+    LoginRequiredMixin, PermissionRequiredMixin, UserPassesTestMixin
+)
+from django.db import transaction
+from django.http import Http404, JsonResponse, StreamingHttpResponse
+from django.middleware.csrf import get_token
 from django.shortcuts import get_object_or_404
 from django.urls import reverse
 from django.views import generic
 
+from yacommon.pagination import akeyset_page, keyset_page
+from yacommon.replicas import ReplicaReadMixin
+
+from . import export
+from .batch import ingest_comments
+from .cache import (
+    HOME, AnonymousPageCacheMixin, AsyncAnonymousPageCacheMixin,
+    FragmentCacheMixin, get_stats
+)
+from .conditional import AsyncConditionalGetMixin, ConditionalGetMixin
 from .forms import CommentForm
 from .models import Comment, News
+from .search import CommentSearchResults, NewsSearchResults
 
 
-class NewsList(generic.ListView):
+class NewsList(
+        ReplicaReadMixin,
+        AnonymousPageCacheMixin,
+        ConditionalGetMixin,
+        FragmentCacheMixin,
+        generic.ListView,
+):
     """Список новостей."""
     model = News
     template_name = 'news/home.html'
 
-    def get_queryset(self):
+    def get_cache_scope(self):
+        return HOME
+
+    @cached_property
+    def page_news(self):
         """
         Выводим только несколько последних новостей.
 
         Их количество определяется в настройках проекта.
         """
-        return self.model.objects.prefetch_related(
-            'comment_set'
-        )[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        return list(
+            self.model.objects.all()[:settings.NEWS_COUNT_ON_HOME_PAGE]
+        )
+
+    def get_page_news(self):
+        return self.page_news
+
+    def get_queryset(self):
+        return self.page_news
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(news_list=context['object_list'])
+        return context
+
+
+class NewsArchive(generic.ListView):
+    """
+    Архив новостей с переходом по страницам через курсор.
+
+    Сортировка 'discussed' идёт по изменяемому comment_count: если между
+    загрузками страниц у новости появился или пропал комментарий, она
+    может пропасть из выдачи или встретиться на двух страницах. Это
+    принято сознательно: снимок порядка для каждого курсора стоил бы
+    больше, чем неточность в списке самых обсуждаемых. Сортировка по
+    дате от этого не страдает.
+    """
+    model = News
+    template_name = 'news/archive.html'
+    orderings = {
+        'date': ('-date', '-pk'),
+        # Счётчик хранится в строке новости: сортировка идёт по индексу.
+        'discussed': ('-comment_count', '-pk'),
+    }
+
+    def get_queryset(self):
+        self.sort = self.request.GET.get('sort')
+        if self.sort not in self.orderings:
+            self.sort = 'date'
+        news, self.next_cursor = keyset_page(
+            self.model.objects.all(),
+            self.orderings[self.sort],
+            self.request.GET.get('cursor'),
+            settings.NEWS_COUNT_ON_ARCHIVE_PAGE,
+        )
+        return news
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        context['sort'] = self.sort
+        return context
+
+
+class CommentPageMixin:
+    """Постраничный вывод комментариев к новости."""
+    comment_ordering = ('created', 'pk')
+
+    def get_comments(self, news_id):
+        return Comment.objects.filter(news_id=news_id).select_related('author')
+
+    def get_comments_owner(self, comments):
+        """
+        Пользователь, которому в списке видны ссылки правки, или None.
+
+        Остальным список показывается одинаково, фрагмент у них общий.
+        """
+        user_id = self.request.user.pk
+        if any(comment.author_id == user_id for comment in comments):
+            return user_id
+        return None
+
+    def get_comment_page(self, news_id, cursor=None):
+        comments, next_cursor = keyset_page(
+            self.get_comments(news_id),
+            self.comment_ordering,
+            cursor,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        return {
+            'comments': comments,
+            'comments_owner': self.get_comments_owner(comments),
+            'next_cursor': next_cursor,
+            'news_id': news_id,
+        }
+
+    async def aget_comment_page(self, news_id, cursor=None):
+        comments, next_cursor = await akeyset_page(
+            self.get_comments(news_id),
+            self.comment_ordering,
+            cursor,
+            settings.COMMENTS_COUNT_ON_PAGE,
+        )
+        return {
+            'comments': comments,
+            'comments_owner': self.get_comments_owner(comments),
+            'next_cursor': next_cursor,
+            'news_id': news_id,
+        }
+
+
+class NewsSearch(generic.ListView):
+    """Полнотекстовый поиск по новостям или комментариям."""
+    template_name = 'news/search.html'
+    scopes = {
+        'news': NewsSearchResults,
+        'comments': CommentSearchResults,
+    }
+
+    def get_paginate_by(self, queryset):
+        return settings.SEARCH_RESULTS_ON_PAGE
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '')
+        self.scope = self.request.GET.get('scope')
+        if self.scope not in self.scopes:
+            self.scope = 'news'
+        return self.scopes[self.scope](self.query)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        context['scope'] = self.scope
+        return context
 
 
-class NewsDetail(generic.DetailView):
+class NewsDetail(
+        ReplicaReadMixin,
+        AnonymousPageCacheMixin,
+        ConditionalGetMixin,
+        FragmentCacheMixin,
+        CommentPageMixin,
+        generic.DetailView,
+):
     model = News
     template_name = 'news/detail.html'
 
+    def get_cache_scope(self):
+        return self.kwargs['pk']
+
+    @cached_property
+    def story(self):
+        return get_object_or_404(self.model, pk=self.kwargs['pk'])
+
+    def get_page_news(self):
+        return [self.story]
+
     def get_object(self, queryset=None):
-        obj = get_object_or_404(
-            self.model.objects.prefetch_related('comment_set__author'),
-            pk=self.kwargs['pk']
-        )
-        return obj
+        return self.story
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
+        context.update(self.get_comment_page(self.object.pk))
         if self.request.user.is_authenticated:
             context['form'] = CommentForm()
         return context
 
 
+class NewsCommentList(CommentPageMixin, generic.TemplateView):
+    """
+    Очередная страница комментариев для кнопки «Показать ещё».
+
+    Есть ли новость, проверяется только для пустой страницы: раз
+    комментарии нашлись, новость существует.
+    """
+    template_name = 'news/comments.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        page = self.get_comment_page(
+            self.kwargs['pk'], self.request.GET.get('cursor')
+        )
+        if not page['comments'] and not News.objects.filter(
+            pk=self.kwargs['pk']
+        ).exists():
+            raise Http404('Новость не найдена.')
+        context.update(page)
+        return context
+
+
 class NewsComment(
         LoginRequiredMixin,
+        FragmentCacheMixin,
+        CommentPageMixin,
         generic.detail.SingleObjectMixin,
         generic.FormView
 ):
@@ -55,16 +245,26 @@ class NewsComment(
         self.object = self.get_object()
         return super().post(request, *args, **kwargs)
 
+    def get_context_data(self, **kwargs):
+        """Форма с ошибками выводится на странице с теми же комментариями."""
+        context = super().get_context_data(**kwargs)
+        context.update(self.get_comment_page(self.object.pk))
+        return context
+
     def form_valid(self, form):
         comment = form.save(commit=False)
         comment.news = self.object
         comment.author = self.request.user
-        comment.save()
+        # Счётчик новости обновляется в той же транзакции (news.counters).
+        # Откатывать частично нечего, точка сохранения не нужна.
+        with transaction.atomic(savepoint=False):
+            comment.save()
         return super().form_valid(form)
 
     def get_success_url(self):
-        post = self.get_object()
-        return reverse('news:detail', kwargs={'pk': post.pk}) + '#comments'
+        return reverse(
+            'news:detail', kwargs={'pk': self.object.pk}
+        ) + '#comments'
 
 
 class NewsDetailView(generic.View):
@@ -78,14 +278,114 @@ class NewsDetailView(generic.View):
         return view(request, *args, **kwargs)
 
 
+class AsyncTemplateView(
+        generic.base.TemplateResponseMixin,
+        generic.base.ContextMixin,
+        generic.View,
+):
+    """
+    Основа асинхронных страниц для запуска под ASGI.
+
+    Пользователь загружается через request.auser() и подменяет ленивый
+    request.user: проверки в представлении и шаблон больше не ходят
+    в базу из асинхронного кода.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        return await super().dispatch(request, *args, **kwargs)
+
+    async def get_page_context(self, **kwargs):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(await self.get_page_context(**kwargs))
+
+
+class AsyncNewsList(
+        ReplicaReadMixin,
+        AsyncAnonymousPageCacheMixin,
+        AsyncConditionalGetMixin,
+        FragmentCacheMixin,
+        AsyncTemplateView,
+):
+    """Асинхронный вариант NewsList."""
+    model = News
+    template_name = 'news/home.html'
+    news = None
+
+    def get_cache_scope(self):
+        return HOME
+
+    async def get_page_news(self):
+        if self.news is None:
+            self.news = [
+                item async for item in self.model.objects.all()[
+                    :settings.NEWS_COUNT_ON_HOME_PAGE
+                ]
+            ]
+        return self.news
+
+    async def get_page_context(self, **kwargs):
+        news = await self.get_page_news()
+        return self.get_context_data(
+            object_list=news, news_list=news, **kwargs
+        )
+
+
+class AsyncNewsDetail(
+        ReplicaReadMixin,
+        AsyncAnonymousPageCacheMixin,
+        AsyncConditionalGetMixin,
+        FragmentCacheMixin,
+        CommentPageMixin,
+        AsyncTemplateView,
+):
+    """Асинхронный вариант NewsDetail."""
+    model = News
+    template_name = 'news/detail.html'
+    story = None
+
+    def get_cache_scope(self):
+        return self.kwargs['pk']
+
+    async def get_page_news(self):
+        if self.story is None:
+            try:
+                self.story = await self.model.objects.aget(
+                    pk=self.kwargs['pk']
+                )
+            except self.model.DoesNotExist:
+                raise Http404('Новость не найдена.')
+        return [self.story]
+
+    async def get_page_context(self, **kwargs):
+        [news] = await self.get_page_news()
+        context = self.get_context_data(object=news, news=news, **kwargs)
+        context.update(await self.aget_comment_page(news.pk))
+        if self.request.user.is_authenticated:
+            context['form'] = CommentForm()
+        return context
+
+
+class AsyncNewsDetailView(generic.View):
+    """Асинхронная страница новости; комментарий сохраняет NewsComment."""
+
+    async def get(self, request, *args, **kwargs):
+        return await AsyncNewsDetail.as_view()(request, *args, **kwargs)
+
+    async def post(self, request, *args, **kwargs):
+        view = sync_to_async(NewsComment.as_view())
+        return await view(request, *args, **kwargs)
+
+
 class CommentBase(LoginRequiredMixin):
     """Базовый класс для работы с комментариями."""
     model = Comment
 
     def get_success_url(self):
-        comment = self.get_object()
         return reverse(
-            'news:detail', kwargs={'pk': comment.news.pk}
+            'news:detail', kwargs={'pk': self.object.news_id}
         ) + '#comments'
 
     def get_queryset(self):
@@ -102,3 +402,84 @@ class CommentUpdate(CommentBase, generic.UpdateView):
 class CommentDelete(CommentBase, generic.DeleteView):
     """Удаление комментария."""
     template_name = 'news/delete.html'
+
+
+class CacheStats(LoginRequiredMixin, UserPassesTestMixin, generic.View):
+    """Счётчики кеша страниц для проверки его эффективности."""
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse(get_stats())
+
+
+class CommentExport(LoginRequiredMixin, UserPassesTestMixin, generic.View):
+    """
+    Все комментарии новости файлом JSON Lines или CSV для модераторов.
+
+    Ответ потоковый: строки уходят клиенту по мере чтения из базы.
+    Параметр cursor из последней полученной строки продолжает выгрузку.
+    """
+
+    def test_func(self):
+        return self.request.user.is_staff
+
+    def get(self, request, *args, **kwargs):
+        news = get_object_or_404(News.objects.only('pk'), pk=kwargs['pk'])
+        file_format = request.GET.get('format', 'jsonl')
+        if file_format not in export.FORMATS:
+            raise Http404('Неизвестный формат выгрузки.')
+        cursor = request.GET.get('cursor')
+        comments = export.thread_comments(news.pk, cursor)
+        response = StreamingHttpResponse(
+            export.chunks(export.lines(
+                export.records(comments, settings.COMMENTS_EXPORT_CHUNK_SIZE),
+                file_format,
+                header=not cursor,
+            )),
+            content_type=export.CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="news-{news.pk}-comments.{file_format}"'
+        )
+        return response
+
+
+class CommentBatch(PermissionRequiredMixin, generic.View):
+    """
+    Пакетная загрузка комментариев в JSON для импорта и зеркал лент.
+
+    Тело запроса: {"comments": [{"news": <id>, "text": "..."}, ...]}.
+    Автором всех комментариев становится пользователь запроса.
+
+    Вход по сессии, поэтому POST защищён от CSRF, как и формы сайта.
+    Клиент без браузера входит через users:login, берёт токен
+    из ответа на GET этого адреса и передаёт его в заголовке
+    X-CSRFToken вместе с кукой csrftoken из того же ответа.
+    """
+    permission_required = 'news.add_comment'
+    raise_exception = True
+
+    def get(self, request, *args, **kwargs):
+        return JsonResponse({'csrf_token': get_token(request)})
+
+    def post(self, request, *args, **kwargs):
+        try:
+            items = json.loads(request.body)['comments']
+            if not isinstance(items, list):
+                raise TypeError
+        except (ValueError, KeyError, TypeError):
+            return JsonResponse(
+                {'error': 'Ожидается {"comments": [...]}.'}, status=400
+            )
+        if len(items) > settings.COMMENTS_BATCH_SIZE:
+            return JsonResponse(
+                {'error': 'В пакете не больше {} комментариев.'.format(
+                    settings.COMMENTS_BATCH_SIZE
+                )},
+                status=400,
+            )
+        return JsonResponse(
+            {'results': ingest_comments(items, request.user)}
+        )
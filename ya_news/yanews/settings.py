@@ -1,8 +1,12 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+# Общий для обоих проектов пакет yacommon лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
 
 SECRET_KEY = 'django-insecure-7)dgs++2!#==aye4rd=5)c)bw0eokiyqx0hts6#t80!$c&$s+('
 
@@ -21,6 +25,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yacommon.request_stats.RequestStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -28,6 +33,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yacommon.replicas.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'yanews.urls'
@@ -55,8 +61,63 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами и проверяется перед повторным
+        # использованием.
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Транзакция сразу берёт блокировку записи: без этого
+            # повышение блокировки внутри транзакции падает с
+            # «database is locked», не дожидаясь busy_timeout.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
+# Копия базы для чтения. Пока её нет в DATABASE_REPLICAS, она не
+# используется; файл создаёт и обновляет команда sync_replicas.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'db.replica.sqlite3',
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['yacommon.replicas.ReplicaRouter']
+# Базы, с которых читают представления с ReplicaReadMixin.
+DATABASE_REPLICAS = []
+# Сколько секунд после изменения данных клиент читает с default.
+REPLICA_PIN_SECONDS = 60
+
+# Выполняются при открытии каждого соединения с SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша в КиБ.
+    'cache_size': -20000,
+}
+
+# Для нескольких процессов на одной машине подойдёт
+# django.core.cache.backends.filebased.FileBasedCache.
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'yanews',
+    }
+}
+
+
+# Хранилище сессий: 'db' — таблица, 'cached_db' — кеш поверх таблицы,
+# 'cache' — только кеш, 'signed_cookies' — подписанная кука у клиента.
+# Кеш в памяти у каждого процесса свой, и выход в одном процессе
+# не виден другим: 'cached_db' и 'cache' включаются только вместе
+# с общим кешем (yacommon.auth.check_shared_cache).
+SESSION_MODE = 'db'
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_MODE}'
+
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+# Сколько секунд пользователь хранится в кеше; 0 — не кешировать.
+# Больше нуля — только с общим кешем.
+USER_CACHE_TIMEOUT = 0
 
 
 AUTH_PASSWORD_VALIDATORS = []
@@ -80,3 +141,30 @@ LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('news:home')
 
 NEWS_COUNT_ON_HOME_PAGE = 10
+NEWS_COUNT_ON_ARCHIVE_PAGE = 20
+COMMENTS_COUNT_ON_PAGE = 50
+# Наибольший пакет для загрузки комментариев через news:comments_batch.
+COMMENTS_BATCH_SIZE = 500
+# Сколько комментариев выгрузка читает из базы за один раз.
+COMMENTS_EXPORT_CHUNK_SIZE = 2000
+SEARCH_RESULTS_ON_PAGE = 20
+
+# Сколько процессов сервера обслуживают проект. Кеш страниц сбрасывается
+# только в процессе, где изменились данные: при нескольких процессах
+# NEWS_PAGE_CACHE_TIMEOUT больше нуля работает лишь с общим кешем.
+SERVER_PROCESSES = 1
+NEWS_PAGE_CACHE_TIMEOUT = 5 * 60
+# В ключ фрагмента входит время изменения новости из базы, устаревшая
+# копия не отдаётся ни одним процессом; срок лишь освобождает место.
+NEWS_FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+# Асинхронные варианты главной и страницы новости для запуска под ASGI.
+ASYNC_VIEWS = False
+
+# Замер запросов к базе и времени ответа каждого представления.
+REQUEST_STATS_ENABLED = False
+REQUEST_STATS_SAMPLES = 1000
+
+# Файл со списком запрещённых слов, по одному в строке. Вместо файла
+# можно задать сами слова в NEWS_BAD_WORDS.
+NEWS_BAD_WORDS_FILE = None
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.contrib.auth.signals import user_logged_in
+from django.db.backends.signals import connection_created
+from django.db.models.signals import post_delete, post_save
 
 
 class NotesConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'notes'
+
+    def ready(self):
+        from yacommon.auth import (
+            check_shared_cache, forget_user, remember_logged_in
+        )
+        from yacommon.sqlite import apply_pragmas
+
+        check_shared_cache()
+        connection_created.connect(apply_pragmas)
+        user_logged_in.connect(remember_logged_in)
+        post_save.connect(forget_user, sender=settings.AUTH_USER_MODEL)
+        post_delete.connect(forget_user, sender=settings.AUTH_USER_MODEL)
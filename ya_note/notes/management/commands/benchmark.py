@@ -0,0 +1,92 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client
+from django.urls import reverse
+
+from notes import urls as notes_urls
+from notes.models import Note
+from yacommon.benchmark import BenchmarkCommand, case, url_names
+from yanote import urls as project_urls
+
+ROLES = ('anonymous', 'author', 'reader')
+PREFIX = 'Нагрузка'
+
+
+class Command(BenchmarkCommand):
+    data_options = ('users', 'notes', 'random_seed')
+    help = (
+        'Замеряет каждый маршрут notes и users от лица анонима, автора '
+        'и читателя на временной базе с синтетическими данными. Пишет '
+        'перцентили времени, число запросов и память в JSON и падает, '
+        'если маршрут ухудшился по сравнению с эталоном из --baseline.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--notes', type=int, default=20_000)
+
+    def route_names(self):
+        return (
+            url_names(notes_urls.urlpatterns, 'notes')
+            | url_names(project_urls.auth_urls[0], 'users')
+        )
+
+    def prepare(self, options):
+        """
+        Данные, клиенты ролей и запросы к каждому маршруту.
+
+        Автор — самый плодовитый из сгенерированных пользователей,
+        читатель — новый пользователь без заметок.
+        """
+        call_command(
+            'seed', users=options['users'], notes=options['notes'],
+            random_seed=options['random_seed'], prefix=PREFIX,
+            stdout=StringIO(),
+        )
+        users = get_user_model().objects
+        author = users.get(username=f'{PREFIX} 0')
+        reader = users.create_user(username='Читатель')
+        note = Note.objects.filter(author=author).order_by('pk').first()
+        clients = {'anonymous': Client(SERVER_NAME='localhost')}
+        for role, user in (('author', author), ('reader', reader)):
+            clients[role] = Client(SERVER_NAME='localhost')
+            clients[role].force_login(user)
+
+        edit = reverse('notes:edit', args=(note.slug,))
+        delete = reverse('notes:delete', args=(note.slug,))
+        form = {
+            'title': 'Новая заметка',
+            'text': 'Текст новой заметки',
+            'slug': 'new-note',
+        }
+        cases = []
+        for role in ROLES:
+            cases += [
+                case('notes:home', role, reverse('notes:home')),
+                case('notes:add', role, reverse('notes:add')),
+                case('notes:edit', role, edit),
+                case(
+                    'notes:detail', role,
+                    reverse('notes:detail', args=(note.slug,)),
+                ),
+                case('notes:delete', role, delete),
+                case('notes:list', role, reverse('notes:list')),
+                case(
+                    'notes:search', role, reverse('notes:search'),
+                    data={'q': note.title.split()[0]},
+                ),
+                case('notes:success', role, reverse('notes:success')),
+                case('users:login', role, reverse('users:login')),
+                case('users:signup', role, reverse('users:signup')),
+                case('users:logout', role, reverse('users:logout'), 'post'),
+            ]
+        cases += [
+            case('notes:add', 'author', reverse('notes:add'), 'post',
+                 data=form),
+            case('notes:edit', 'author', edit, 'post',
+                 data={**form, 'slug': note.slug}),
+            case('notes:delete', 'author', delete, 'post'),
+        ]
+        return cases, clients
@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from notes.models import Note
+from notes.transfer import FORMATS, guess_format, write_records
+
+
+class Command(BaseCommand):
+    help = 'Выгружает заметки в файл JSON Lines или CSV, не держа их в памяти.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdout.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        self.chunk_size = options['chunk_size']
+        self.started = time.monotonic()
+        if path == '-':
+            exported = write_records(self.stdout, file_format, self.records())
+        else:
+            try:
+                file = open(path, 'w', encoding='utf-8', newline='')
+            except OSError as error:
+                raise CommandError(error)
+            with file:
+                exported = write_records(file, file_format, self.records())
+        self.stderr.write(
+            f'Выгружено заметок: {exported}.', style_func=self.style.SUCCESS
+        )
+
+    def records(self):
+        notes = Note.objects.order_by('pk').values_list(
+            'title', 'text', 'slug', 'author__username'
+        ).iterator(chunk_size=self.chunk_size)
+        for number, (title, text, slug, author) in enumerate(notes, 1):
+            yield {
+                'title': title, 'text': text, 'slug': slug, 'author': author
+            }
+            if number % self.chunk_size == 0:
+                self.report_progress(number)
+
+    def report_progress(self, exported):
+        """Прогресс пишется в stderr, чтобы не смешиваться с выгрузкой."""
+        elapsed = time.monotonic() - self.started
+        self.stderr.write(
+            f'Выгружено {exported} заметок, '
+            f'{exported / elapsed:.0f} в секунду.',
+            style_func=str,
+        )
@@ -0,0 +1,121 @@
+import sys
+import time
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import IntegrityError, transaction
+
+from notes.models import Note
+from notes.transfer import FORMATS, allocate_slugs, guess_format, read_records
+from yacommon.seeding import batched
+
+User = get_user_model()
+
+# Сколько заголовков помнить между пачками: память остаётся ограниченной,
+# а забытые номера просто перебираются заново.
+MAX_REMEMBERED_TITLES = 100_000
+
+
+class Command(BaseCommand):
+    help = (
+        'Загружает заметки из файла JSON Lines или CSV пачками. '
+        'Поле author — имя пользователя; пустой slug подбирается '
+        'по заголовку, как при обычном сохранении.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Файл или - для stdin.')
+        parser.add_argument('--format', choices=FORMATS)
+        parser.add_argument('--batch-size', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options['format'] or guess_format(path)
+        self.imported = self.skipped = 0
+        self.started = time.monotonic()
+        try:
+            if path == '-':
+                self.load(sys.stdin, file_format, options['batch_size'])
+            else:
+                try:
+                    file = open(path, encoding='utf-8', newline='')
+                except OSError as error:
+                    raise CommandError(error)
+                with file:
+                    self.load(file, file_format, options['batch_size'])
+        except ValueError as error:
+            # Предыдущие пачки уже сохранены: по числу загруженных видно,
+            # с какого места продолжать.
+            raise CommandError(
+                f'{error} Загружено заметок: {self.imported}.'
+            ) from error
+        self.stdout.write(self.style.SUCCESS(
+            f'Загружено заметок: {self.imported}, '
+            f'пропущено: {self.skipped}.'
+        ))
+
+    def load(self, file, file_format, batch_size):
+        records = read_records(file, file_format)
+        slug_numbers = {}
+        for batch in batched(records, batch_size):
+            notes = self.build_notes(batch)
+            generated = {id(note) for note in notes if not note.slug}
+            if len(slug_numbers) > MAX_REMEMBERED_TITLES:
+                slug_numbers.clear()
+            allocate_slugs(notes, slug_numbers)
+            self.save(notes, generated)
+            self.report_progress()
+
+    def build_notes(self, records):
+        """Собирает заметки пачки; авторы находятся одним запросом."""
+        authors = dict(User.objects.filter(
+            username__in={record.get('author') for record in records}
+        ).values_list('username', 'id'))
+        notes = []
+        for record in records:
+            author_id = authors.get(record.get('author'))
+            if author_id is None:
+                self.skip(record, 'автор не найден')
+                continue
+            notes.append(Note(
+                title=record.get('title') or Note.title.field.default,
+                text=record.get('text', ''),
+                slug=record.get('slug') or '',
+                author_id=author_id,
+            ))
+        return notes
+
+    def save(self, notes, generated):
+        """
+        Пишет пачку одним bulk_create.
+
+        Если slug успели занять параллельно, пачка сохраняется
+        по одной заметке: Note.save сам подберёт свободный slug.
+        """
+        try:
+            with transaction.atomic():
+                Note.objects.bulk_create(notes)
+            self.imported += len(notes)
+            return
+        except IntegrityError:
+            pass
+        for note in notes:
+            if id(note) in generated:
+                note.slug = ''
+            try:
+                with transaction.atomic():
+                    note.save()
+                self.imported += 1
+            except IntegrityError:
+                self.skip({'slug': note.slug}, 'slug уже занят')
+
+    def skip(self, record, reason):
+        self.skipped += 1
+        self.stderr.write(f'Пропущена запись {record}: {reason}.')
+
+    def report_progress(self):
+        elapsed = time.monotonic() - self.started
+        self.stdout.write(
+            f'Загружено {self.imported} заметок, '
+            f'{self.imported / elapsed:.0f} в секунду.'
+        )
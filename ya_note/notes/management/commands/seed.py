@@ -0,0 +1,32 @@
+from django.core.management.base import CommandError
+
+from notes.models import Note
+from notes.seeding import iter_notes
+from yacommon.seeding import SeedCommand, last_pk
+
+
+class Command(SeedCommand):
+    default_prefix = 'Автор'
+    help = (
+        'Заполняет базу синтетическими пользователями и заметками для '
+        'нагрузочных замеров. Строки пишутся пачками, поэтому память не '
+        'растёт с их числом.'
+    )
+
+    def add_arguments(self, parser):
+        super().add_arguments(parser)
+        parser.add_argument('--notes', type=int, default=100_000)
+
+    def handle(self, *args, **options):
+        if options['notes'] and not options['users']:
+            raise CommandError('Заметкам нужны пользователи.')
+        super().handle(*args, **options)
+
+    def seed(self, rng, options):
+        author_ids = self.save_users(options)
+        # Номера в slug больше всех прежних ключей, поэтому не совпадут
+        # с номерами прошлых запусков.
+        first_number = last_pk(Note) + 2
+        self.save(Note, iter_notes(
+            rng, author_ids, options['notes'], first_number
+        ), options['notes'])
@@ -0,0 +1,5 @@
+from yacommon.replicas import SyncReplicasCommand
+
+
+class Command(SyncReplicasCommand):
+    pass
@@ -0,0 +1,17 @@
+from django.db import migrations
+
+from yacommon.search import drop_sql, index_sql
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            index_sql('notes_note', ('title', 'text')),
+            drop_sql('notes_note'),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.1.1 on 2026-10-18 16:48
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+from yacommon.search import keep_triggers
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('notes', '0002_search'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    # AlterField пересоздаёт таблицу заметок вместе с её триггерами поиска.
+    operations = keep_triggers(
+        [('notes_note', ('title', 'text'))],
+        migrations.AlterField(
+            model_name='note',
+            name='author',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='note',
+            index=models.Index(fields=['author', 'id'], name='notes_author_id_idx'),
+        ),
+    )
@@ -1,8 +1,16 @@
+from itertools import count
+
 from django.conf import settings
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Q
 
 from pytils.translit import slugify
 
+# Самый длинный суффикс, который учитывает Note.next_slug_number.
+MAX_SLUG_SUFFIX = len('-9999999999')
+# Больше любого символа slug: верхняя граница диапазона по префиксу.
+MAX_CHAR = chr(0x10FFFF)
+
 
 class Note(models.Model):
     title = models.CharField(
@@ -26,13 +34,78 @@ class Note(models.Model):
     author = models.ForeignKey(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
+        # Поиск по автору обслуживает составной индекс ниже.
+        db_index=False,
     )
 
+    class Meta:
+        indexes = (
+            models.Index(fields=('author', 'id'), name='notes_author_id_idx'),
+        )
+
     def __str__(self):
         return self.title
 
+    @classmethod
+    def slug_from_title(cls, title):
+        max_slug_length = cls._meta.get_field('slug').max_length
+        return slugify(title)[:max_slug_length]
+
+    @classmethod
+    def suffixed_slug(cls, base, number):
+        """Вариант slug под номером number: base, base-2, base-3, …"""
+        if number == 1:
+            return base
+        suffix = f'-{number}'
+        max_slug_length = cls._meta.get_field('slug').max_length
+        return base[:max_slug_length - len(suffix)] + suffix
+
+    @classmethod
+    def next_slug_number(cls, base, pk=None):
+        """
+        Номер, следующий за наибольшим занятым вариантом slug для base.
+
+        Все варианты начинаются с общего начала base, поэтому читаются
+        одним запросом по диапазону уникального индекса slug, а не
+        перебором номеров по одному. Заметка pk в подсчёт не входит:
+        при правке свой slug ей не мешает.
+        """
+        max_slug_length = cls._meta.get_field('slug').max_length
+        stem = base[:max_slug_length - MAX_SLUG_SUFFIX]
+        if stem == base:
+            stem += '-'
+        slugs = cls.objects.filter(
+            Q(slug=base) | Q(slug__gte=stem, slug__lt=stem + MAX_CHAR)
+        )
+        if pk is not None:
+            slugs = slugs.exclude(pk=pk)
+        slugs = slugs.values_list('slug', flat=True)
+        numbers = [0]
+        for slug in slugs:
+            tail = slug.rpartition('-')[2]
+            if slug == base:
+                numbers.append(1)
+            elif tail.isdigit() and cls.suffixed_slug(base, int(tail)) == slug:
+                numbers.append(int(tail))
+        return max(numbers) + 1
+
     def save(self, *args, **kwargs):
-        if not self.slug:
-            max_slug_length = self._meta.get_field('slug').max_length
-            self.slug = slugify(self.title)[:max_slug_length]
-        super().save(*args, **kwargs)
+        """
+        Сохраняет заметку, подбирая свободный slug по заголовку.
+
+        Подбор начинается после наибольшего занятого номера. Между
+        поиском и записью тот же slug может занять другой запрос: тогда
+        база отвергает запись, и пробуем следующий суффикс.
+        """
+        if self.slug:
+            return super().save(*args, **kwargs)
+        base = self.slug_from_title(self.title)
+        for number in count(self.next_slug_number(base, self.pk)):
+            self.slug = self.suffixed_slug(base, number)
+            try:
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                if not Note.objects.filter(slug=self.slug).exists():
+                    self.slug = ''
+                    raise
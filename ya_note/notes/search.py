@@ -0,0 +1,35 @@
+"""Полнотекстовый поиск по заметкам пользователя (SQLite FTS5)."""
+from yacommon.search import SearchResults
+
+from .models import Note
+
+
+class NoteSearchResults(SearchResults):
+    """
+    Найденные заметки автора; заголовок важнее текста.
+
+    CROSS JOIN не даёт SQLite переставить таблицы: без него планировщик
+    перебирает все заметки автора по индексу и для каждой проверяет
+    MATCH, а начиная с FTS5 он читает только найденные строки.
+    """
+    model = Note
+    fts = 'notes_note_fts'
+    weights = (10.0, 1.0)
+    sql = (
+        'SELECT n.id, n.title, n.slug, '
+        "snippet({fts}, -1, %s, %s, '…', %s) AS snippet "
+        'FROM {fts} CROSS JOIN notes_note n ON n.id = {fts}.rowid '
+        'WHERE {fts} MATCH %s AND n.author_id = %s '
+        'ORDER BY bm25({fts}, {weights})'
+    )
+    count_sql = (
+        'SELECT count(*) FROM {fts} CROSS JOIN notes_note n '
+        'ON n.id = {fts}.rowid WHERE {fts} MATCH %s AND n.author_id = %s'
+    )
+
+    def __init__(self, text, author):
+        super().__init__(text)
+        self.author = author
+
+    def get_params(self):
+        return [self.query, self.author.pk]
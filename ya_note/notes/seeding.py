@@ -0,0 +1,53 @@
+"""
+Быстрое создание больших наборов данных для тестов и замеров.
+
+make_* пишут все строки одним bulk_create, iter_* выдают несохранённые
+объекты по одному для save_in_batches из yacommon. bulk_create не
+вызывает Note.save(), поэтому slug подбирается здесь же.
+"""
+from itertools import cycle
+
+from yacommon.seeding import phrase, skewed
+
+from .models import Note
+
+WORDS = (
+    'покупки', 'съездить', 'жильё', 'объявление', 'щедрый', 'ёлка', 'врач',
+    'подъезд', 'шёпот', 'отчёт', 'юбилей', 'хоккей', 'цифровой', 'план',
+    'встреча', 'школа', 'ремонт', 'дорога', 'идея', 'список', 'книга',
+    'рецепт', 'дача', 'отпуск', 'подарок', 'звонок', 'задача', 'счёт',
+)
+
+
+def make_notes(authors, count, title='Заметка'):
+    """Заметки «title 0», «title 1», … от авторов authors по кругу."""
+    notes = []
+    for index, author in zip(range(count), cycle(authors)):
+        note_title = f'{title} {index}'
+        notes.append(Note(
+            title=note_title,
+            text='Текст заметки',
+            slug=Note.slug_from_title(note_title),
+            author=author,
+        ))
+    return Note.objects.bulk_create(notes)
+
+
+def iter_notes(rng, author_ids, count, first_number):
+    """
+    Заметки с русскими заголовками от авторов с длинным хвостом.
+
+    Заголовки повторяются, как у настоящих заметок, поэтому к slug
+    из заголовка всегда добавляется свой номер, начиная с first_number.
+    """
+    max_length = Note._meta.get_field('title').max_length
+    for index in range(count):
+        title = phrase(rng, WORDS, rng.randint(1, 4))[:max_length]
+        yield Note(
+            title=title,
+            text=phrase(rng, WORDS, rng.randint(5, 60)),
+            slug=Note.suffixed_slug(
+                Note.slug_from_title(title), first_number + index
+            ),
+            author_id=skewed(rng, author_ids),
+        )
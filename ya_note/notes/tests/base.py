@@ -1,19 +1,31 @@
+from importlib import reload
+
 from django.contrib.auth import get_user_model
-from django.test import TestCase
-from django.urls import reverse
+from django.core.cache import cache
+from django.db import connections
+from django.test import TestCase, override_settings
+from django.urls import clear_url_caches, reverse
 
+from notes import urls as notes_urls
 from notes.models import Note
+from yacommon.sqlite import forbid_working_databases
+from yanote import urls as project_urls
 
 User = get_user_model()
 
+forbid_working_databases()
+
 
 NOTE_SLUG = 'slug'
+# Сессия и пользователь авторизованного клиента читаются из базы.
+AUTH_QUERIES = 2
 
 ADD_URL = reverse('notes:add')
 SUCCESS_URL = reverse('notes:success')
 LIST_URL = reverse('notes:list')
 LOGIN_URL = reverse('users:login')
 HOME_URL = reverse('notes:home')
+SEARCH_URL = reverse('notes:search')
 
 NOTES_EDIT = reverse('notes:edit', args=(NOTE_SLUG,))
 NOTES_DETAIL = reverse('notes:detail', args=(NOTE_SLUG,))
@@ -25,6 +37,14 @@ ANON_REDIRECT_SUCCESS = f'{LOGIN_URL}?next={SUCCESS_URL}'
 ANON_REDIRECT_EDIT = f'{LOGIN_URL}?next={NOTES_EDIT}'
 ANON_REDIRECT_DELETE = f'{LOGIN_URL}?next={NOTES_DELETE}'
 ANON_REDIRECT_DETAIL = f'{LOGIN_URL}?next={NOTES_DETAIL}'
+ANON_REDIRECT_SEARCH = f'{LOGIN_URL}?next={SEARCH_URL}'
+
+
+def reload_urls():
+    """Пересобирает маршруты после смены настройки ASYNC_VIEWS."""
+    reload(notes_urls)
+    reload(project_urls)
+    clear_url_caches()
 
 
 class BaseTestCase(TestCase):
@@ -32,6 +52,9 @@ class BaseTestCase(TestCase):
 
     @classmethod
     def setUpTestData(cls):
+        # Откат транзакции не сбрасывает кеш, а ключи пользователей в
+        # следующем классе могут совпасть с прежними.
+        cache.clear()
         cls.author = User.objects.create(username='Олег Роговенко')
         cls.reader = User.objects.create(username='Анна Путилина')
 
@@ -53,3 +76,20 @@ class BaseTestCase(TestCase):
             'text': 'Текст новой заметки',
             'slug': 'new-note',
         }
+
+
+class ReplicaTestCase(BaseTestCase):
+    """
+    Чтение с реплики через соединение default.
+
+    TEST MIRROR направляет реплику в тестовую базу, но отдельное
+    соединение не увидело бы данных из транзакции теста.
+    """
+
+    def setUp(self):
+        super().setUp()
+        self.addCleanup(
+            connections.__setitem__, 'replica', connections['replica']
+        )
+        connections['replica'] = connections['default']
+        self.enterContext(override_settings(DATABASE_REPLICAS=['replica']))
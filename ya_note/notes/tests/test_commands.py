@@ -0,0 +1,208 @@
+import json
+import sqlite3
+import tempfile
+from contextlib import closing
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import CommandError, call_command
+from django.test import TransactionTestCase
+from pytils.translit import slugify
+
+from notes import urls as notes_urls
+from notes.management.commands.benchmark import Command as BenchmarkCommand
+from notes.models import Note
+from yacommon.benchmark import regressions, url_names
+from yacommon.replicas import sync_replica
+from yanote import urls as project_urls
+from .base import BaseTestCase, User
+
+
+class TestTransferCommands(BaseTestCase):
+    """Тестирование загрузки и выгрузки заметок."""
+
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory = Path(directory.name)
+
+    def call(self, *args, **kwargs):
+        call_command(*args, stdout=StringIO(), stderr=StringIO(), **kwargs)
+
+    def test_import_allocates_slugs_like_save(self):
+        """Пустые slug подбираются по заголовку с суффиксами -2, -3."""
+        title = 'Повторяющийся заголовок'
+        base = slugify(title)
+        Note.objects.create(title=title, text='', author=self.reader)
+        records = [
+            {'title': title, 'text': str(i), 'author': self.author.username}
+            for i in range(3)
+        ] + [
+            {'title': 'Свой', 'text': '', 'slug': 'own',
+             'author': self.author.username},
+            {'title': 'Без автора', 'text': '', 'author': 'Никто'},
+        ]
+        path = self.directory / 'notes.jsonl'
+        path.write_text(
+            ''.join(json.dumps(record) + '\n' for record in records),
+            encoding='utf-8',
+        )
+
+        self.call('import_notes', str(path), batch_size=2)
+
+        self.assertEqual(
+            set(Note.objects.filter(
+                title=title
+            ).values_list('slug', flat=True)),
+            {base, f'{base}-2', f'{base}-3', f'{base}-4'},
+        )
+        self.assertTrue(Note.objects.filter(slug='own').exists())
+        self.assertFalse(Note.objects.filter(title='Без автора').exists())
+
+    def test_export_import_round_trip(self):
+        """Выгруженный CSV загружается обратно без потерь."""
+        path = self.directory / 'notes.csv'
+        self.call('export_notes', str(path), chunk_size=1)
+        exported = list(Note.objects.values_list(
+            'title', 'text', 'slug', 'author'
+        ))
+        Note.objects.all().delete()
+
+        self.call('import_notes', str(path))
+
+        self.assertEqual(
+            list(Note.objects.values_list('title', 'text', 'slug', 'author')),
+            exported,
+        )
+
+    def test_export_to_stdout(self):
+        """С путём - выгрузка идёт в stdout команды."""
+        out = StringIO()
+        call_command('export_notes', '-', stdout=out, stderr=StringIO())
+        self.assertEqual(
+            [json.loads(line)['slug'] for line in out.getvalue().splitlines()],
+            list(Note.objects.order_by('pk').values_list('slug', flat=True)),
+        )
+
+    def test_import_reports_broken_line(self):
+        """Битая строка или не объект JSON — ошибка с номером строки."""
+        record = json.dumps({
+            'title': 'Первая', 'text': '', 'author': self.author.username
+        })
+        for broken in ('{"title": ', '["title"]'):
+            with self.subTest(broken=broken):
+                path = self.directory / 'notes.jsonl'
+                path.write_text(
+                    f'{record}\n{broken}\n', encoding='utf-8'
+                )
+                with self.assertRaisesMessage(CommandError, 'Строка 2'):
+                    self.call('import_notes', str(path), batch_size=1)
+        self.assertEqual(Note.objects.filter(title='Первая').count(), 2)
+
+
+class TestSeedCommand(BaseTestCase):
+    """Тестирование генерации синтетических заметок."""
+
+    def seed(self, **options):
+        options = {
+            'users': 10, 'notes': 200, 'batch_size': 7, 'random_seed': 1,
+            **options,
+        }
+        call_command('seed', stdout=StringIO(), **options)
+
+    def test_seed_creates_notes_with_unique_slugs(self):
+        """Повторяющиеся русские заголовки получают разные латинские slug."""
+        notes_before = Note.objects.count()
+        self.seed()
+        self.seed(prefix='Гость')
+
+        seeded = Note.objects.exclude(pk=self.note.pk)
+        self.assertEqual(seeded.count(), notes_before - 1 + 400)
+        titles = list(seeded.values_list('title', 'slug'))
+        self.assertLess(len({title for title, _ in titles}), len(titles))
+        for title, slug in titles:
+            with self.subTest(title=title):
+                self.assertTrue(slug.startswith(slugify(title) + '-'))
+
+    def test_seed_refuses_taken_prefix(self):
+        """Повторный запуск с тем же префиксом не создаёт дублей."""
+        self.seed(notes=0)
+        with self.assertRaises(CommandError):
+            self.seed(notes=0)
+
+
+class TestBenchmarkCommand(BaseTestCase):
+    """Тестирование замера маршрутов."""
+
+    def test_benchmark_covers_every_route_without_side_effects(self):
+        """Замер проходит по всем маршрутам и не меняет данные."""
+        notes_before = Note.objects.count()
+        results = BenchmarkCommand().run({
+            'users': 5, 'notes': 20, 'random_seed': 0,
+            'repeat': 1, 'warmup': 0,
+        })
+        self.assertEqual(
+            {route.split()[1] for route in results},
+            url_names(notes_urls.urlpatterns, 'notes')
+            | url_names(project_urls.auth_urls[0], 'users'),
+        )
+        self.assertEqual(results['POST notes:delete']['author']['status'], 302)
+        self.assertEqual(results['GET notes:edit']['reader']['status'], 404)
+        self.assertEqual(Note.objects.count(), notes_before + 20)
+
+    def test_benchmark_command_leaves_database_untouched(self):
+        """Замер идёт на временной базе, данные и соединение остаются."""
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        output = Path(directory.name) / 'benchmark.json'
+        out = StringIO()
+        call_command(
+            'benchmark', users=3, notes=20, repeat=1, warmup=0,
+            output=output, stdout=out,
+        )
+        self.assertIn('GET notes:list', out.getvalue())
+        report = json.loads(output.read_text())
+        self.assertEqual(report['options']['notes'], 20)
+        self.assertQuerySetEqual(
+            Note.objects.values_list('pk', flat=True), [self.note.pk]
+        )
+        self.assertEqual(User.objects.count(), 2)
+
+    def test_benchmark_reports_regressions(self):
+        """Рост медианы сверх порога, лишний запрос и смена статуса."""
+        old = {'status': 200, 'p50_ms': 10, 'queries': 2, 'alloc_kb': 100}
+        baseline = {'GET notes:list': {'author': old}}
+        self.assertEqual(regressions(
+            {'GET notes:list': {'author': {**old, 'p50_ms': 12}}},
+            baseline, threshold=0.3, min_ms=1,
+        ), [])
+        found = regressions(
+            {'GET notes:list': {'author': {
+                **old, 'status': 500, 'p50_ms': 14, 'queries': 3,
+            }}},
+            baseline, threshold=0.3, min_ms=1,
+        )
+        self.assertEqual(len(found), 3)
+
+
+class TestSyncReplicasCommand(TransactionTestCase):
+    """Тестирование копирования базы в реплику."""
+
+    def test_sync_replica_copies_committed_data(self):
+        """В файле реплики те же заметки, что и в default."""
+        author = User.objects.create(username='Автор')
+        Note.objects.create(title='Заметка', text='', author=author)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory) / 'replica.sqlite3'
+            sync_replica(path)
+            sync_replica(path)
+            with closing(sqlite3.connect(path)) as replica:
+                rows = replica.execute(
+                    'SELECT title FROM notes_note'
+                ).fetchall()
+        self.assertEqual(rows, [('Заметка',)])
+
+    def test_command_requires_replicas(self):
+        """Без DATABASE_REPLICAS и аргументов копировать некуда."""
+        with self.assertRaises(CommandError):
+            call_command('sync_replicas', stdout=StringIO())
@@ -1,5 +1,21 @@
+from http import HTTPStatus
+
+from django.db import connection
+from django.test import override_settings
+from django.urls import resolve, reverse
+
 from notes.forms import NoteForm
-from .base import BaseTestCase, ADD_URL, LIST_URL, NOTES_EDIT
+from notes.models import Note
+from notes.search import NoteSearchResults
+from notes.seeding import make_notes
+from notes.views import AsyncNoteDetail, AsyncNotesList
+from yacommon.pagination import encode_cursor
+from yacommon.request_stats import store
+from yacommon.seeding import make_users
+from .base import (
+    BaseTestCase, ADD_URL, ANON_REDIRECT_DETAIL, AUTH_QUERIES, LIST_URL,
+    NOTES_DETAIL, NOTES_EDIT, SEARCH_URL, reload_urls
+)
 
 
 class TestContent(BaseTestCase):
@@ -10,7 +26,7 @@ class TestContent(BaseTestCase):
         response = self.author_client.get(LIST_URL)
         notes = response.context['object_list']
         self.assertIn(self.note, notes)
-        note = notes.get(pk=self.note.pk)
+        note = notes[notes.index(self.note)]
         self.assertEqual(note.title, self.note.title)
         self.assertEqual(note.text, self.note.text)
         self.assertEqual(note.author, self.note.author)
@@ -21,6 +37,26 @@ class TestContent(BaseTestCase):
         response = self.reader_client.get(LIST_URL)
         self.assertNotIn(self.note, response.context['object_list'])
 
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    def test_note_list_pages(self):
+        """Список идёт страницами, переход по курсору обходит все заметки."""
+        make_notes([self.author], 4)
+        seen = []
+        params = {}
+        while True:
+            response = self.author_client.get(LIST_URL, params)
+            notes = list(response.context['object_list'])
+            self.assertLessEqual(len(notes), 2)
+            seen.extend(note.pk for note in notes)
+            if response.context['next_cursor'] is None:
+                break
+            params = {'cursor': response.context['next_cursor']}
+        self.assertEqual(
+            seen,
+            list(Note.objects.filter(author=self.author)
+                 .order_by('id').values_list('id', flat=True))
+        )
+
     def test_form_on_add_and_edit(self):
         """На страницах добавления и редактирования есть форма NoteForm."""
         for url in (ADD_URL, NOTES_EDIT):
@@ -28,3 +64,139 @@ class TestContent(BaseTestCase):
                 response = self.author_client.get(url)
                 self.assertIn('form', response.context)
                 self.assertIsInstance(response.context['form'], NoteForm)
+
+    def test_search_finds_only_own_notes(self):
+        """Поиск находит заметки автора без учёта регистра и «ё»."""
+        found = Note.objects.create(
+            title='Покупки', text='Купить ЁЛКУ', author=self.author
+        )
+        Note.objects.create(
+            title='Чужие покупки', text='Купить ёлку', author=self.reader
+        )
+        response = self.author_client.get(SEARCH_URL, {'q': 'елк'})
+        notes = response.context['object_list']
+        self.assertEqual([note.pk for note in notes], [found.pk])
+        self.assertIn('<mark>ЕЛКУ</mark>', notes[0].snippet)
+
+    @override_settings(REQUEST_STATS_ENABLED=True)
+    def test_request_stats_for_notes_list(self):
+        """Список заметок попадает в заголовок Server-Timing и сводку."""
+        store.clear()
+        client = self.client_class()
+        client.force_login(self.author)
+        response = client.get(LIST_URL)
+        self.assertIn('queries', response['Server-Timing'])
+
+        self.author.is_staff = True
+        self.author.save()
+        summary = client.get(reverse('request_stats')).json()
+        self.assertEqual(summary['notes:list']['requests'], 1)
+        self.assertGreater(summary['notes:list']['queries']['p50'], 0)
+
+
+class TestManyNotes(BaseTestCase):
+    """Список и поиск при тысячах заметок у многих авторов."""
+
+    AUTHORS = 50
+    NOTES = 5000
+
+    @classmethod
+    def setUpTestData(cls):
+        super().setUpTestData()
+        make_notes(make_users(cls.AUTHORS) + [cls.author], cls.NOTES)
+
+    def test_note_list_page_cost_is_flat(self):
+        """Страница списка — одно и то же число запросов на любой глубине."""
+        notes = Note.objects.filter(author=self.author).order_by('id')
+        middle = encode_cursor(notes[notes.count() // 2], ('pk',))
+        for params in ({}, {'cursor': middle}):
+            with self.subTest(params=params):
+                # Страница вместе с первой заметкой следующей.
+                with self.assertNumQueries(AUTH_QUERIES + 1):
+                    response = self.author_client.get(LIST_URL, params)
+                self.assertTrue(all(
+                    note.author_id == self.author.pk
+                    for note in response.context['object_list']
+                ))
+
+    def test_search_in_many_notes(self):
+        """Поиск находит заметку автора среди тысяч чужих."""
+        response = self.author_client.get(SEARCH_URL, {'q': 'Заметка 50'})
+        found = [note.pk for note in response.context['object_list']]
+        self.assertTrue(found)
+        self.assertTrue(
+            Note.objects.filter(pk__in=found, author=self.author).count()
+            == len(found)
+        )
+
+    def test_search_starts_from_full_text_index(self):
+        """Поиск читает найденные строки FTS5, а не все заметки автора."""
+        results = NoteSearchResults('Заметка', self.author)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'EXPLAIN QUERY PLAN '
+                + results.count_sql.format(fts=results.fts),
+                results.get_params(),
+            )
+            plan = [row[-1] for row in cursor.fetchall()]
+        self.assertTrue(plan[0].startswith(f'SCAN {results.fts}'), plan)
+        self.assertEqual(results.count(), len(results[0:results.count()]))
+
+
+class TestAsyncViews(BaseTestCase):
+    """Асинхронные варианты списка и страницы заметки."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        async_views = override_settings(ASYNC_VIEWS=True)
+        async_views.enable()
+        cls.addClassCleanup(reload_urls)
+        cls.addClassCleanup(async_views.disable)
+        reload_urls()
+
+    def test_async_views_selected(self):
+        """Настройка ASYNC_VIEWS подключает асинхронные представления."""
+        self.assertIs(resolve(LIST_URL).func.view_class, AsyncNotesList)
+        self.assertIs(resolve(NOTES_DETAIL).func.view_class, AsyncNoteDetail)
+
+    @override_settings(NOTES_COUNT_ON_PAGE=2)
+    async def test_async_note_list(self):
+        """Автор видит только свои заметки, список идёт страницами."""
+        await Note.objects.abulk_create(
+            Note(title=f'Заметка {index}', text='Текст',
+                 slug=f'note-{index}', author=self.author)
+            for index in range(2)
+        )
+        await Note.objects.acreate(
+            title='Чужая', text='Текст', slug='other', author=self.reader
+        )
+        await self.async_client.aforce_login(self.author)
+        expected = [
+            pk async for pk in Note.objects.filter(
+                author=self.author
+            ).order_by('id').values_list('id', flat=True)
+        ]
+        response = await self.async_client.get(LIST_URL)
+        first = [note.pk for note in response.context['object_list']]
+        response = await self.async_client.get(
+            LIST_URL, {'cursor': response.context['next_cursor']}
+        )
+        second = [note.pk for note in response.context['object_list']]
+        self.assertEqual(first + second, expected)
+        self.assertIsNone(response.context['next_cursor'])
+
+    async def test_async_note_detail(self):
+        """Заметку видит только автор, аноним уходит на страницу входа."""
+        response = await self.async_client.get(NOTES_DETAIL)
+        self.assertRedirects(
+            response, ANON_REDIRECT_DETAIL, fetch_redirect_response=False
+        )
+
+        await self.async_client.aforce_login(self.reader)
+        response = await self.async_client.get(NOTES_DETAIL)
+        self.assertEqual(response.status_code, HTTPStatus.NOT_FOUND)
+
+        await self.async_client.aforce_login(self.author)
+        response = await self.async_client.get(NOTES_DETAIL)
+        self.assertEqual(response.context['note'], self.note)
@@ -1,7 +1,22 @@
 from http import HTTPStatus
 
+from django.conf import settings
+from django.db import connection
+from django.test import override_settings
+from django.urls import reverse
+from pytils.translit import slugify
+
+from notes.forms import WARNING
 from notes.models import Note
-from .base import BaseTestCase, ADD_URL, SUCCESS_URL, NOTES_EDIT, NOTES_DELETE
+from yacommon.replicas import PIN_COOKIE
+from yacommon.sqlite import get_pragmas
+from .base import (
+    BaseTestCase, ReplicaTestCase, ADD_URL, AUTH_QUERIES, SUCCESS_URL,
+    NOTES_EDIT, NOTES_DELETE, NOTE_SLUG, NOTES_DETAIL, LIST_URL
+)
+
+# Заметка и запись изменения.
+WRITE_QUERIES = 2
 
 
 class TestLogic(BaseTestCase):
@@ -39,6 +54,19 @@ class TestLogic(BaseTestCase):
         self.assertEqual(ids_before, set(
             Note.objects.values_list('id', flat=True)))
 
+    def test_edit_to_taken_slug(self):
+        """Смена slug на занятый даёт ошибку формы, заметка не меняется."""
+        other = Note.objects.create(
+            title='Другая', text='Текст', slug='other', author=self.author
+        )
+        response = self.author_client.post(
+            NOTES_EDIT, {**self.form_data, 'slug': other.slug}
+        )
+        self.assertFormError(
+            response.context['form'], 'slug', other.slug + WARNING
+        )
+        self.assertEqual(Note.objects.get(pk=self.note.pk).slug, NOTE_SLUG)
+
     def test_slug_is_generated_if_not_provided(self):
         """Если slug не указан, он генерируется автоматически."""
         data = {k: v for k, v in self.form_data.items() if k != 'slug'}
@@ -58,6 +86,54 @@ class TestLogic(BaseTestCase):
         # Проверяем, что slug сгенерировался и не равен пустой строке
         self.assertTrue(created.slug)
 
+    def test_generated_slug_gets_numeric_suffix(self):
+        """Одинаковые заголовки получают slug с суффиксами -2, -3, …"""
+        data = {k: v for k, v in self.form_data.items() if k != 'slug'}
+        for _ in range(2):
+            self.assertRedirects(
+                self.author_client.post(ADD_URL, data), SUCCESS_URL
+            )
+        Note.objects.create(title=data['title'], text='', author=self.reader)
+
+        base = slugify(data['title'])
+        self.assertEqual(
+            list(Note.objects.filter(
+                title=data['title']
+            ).order_by('id').values_list('slug', flat=True)),
+            [base, f'{base}-2', f'{base}-3'],
+        )
+
+    def test_generated_slug_skips_taken_suffixes_at_once(self):
+        """Номер подбирается одним запросом, сколько бы вариантов ни было."""
+        title = 'Популярный заголовок'
+        base = slugify(title)
+        long_title = 'Очень длинный заголовок ' * 10
+        long_base = Note.slug_from_title(long_title)
+        Note.objects.bulk_create(
+            Note(title=title, text='', slug=slug, author=self.reader)
+            for slug in [base, f'{base}-x', f'{base}-2', f'{base}-7'] + [
+                Note.suffixed_slug(long_base, number) for number in (1, 12)
+            ]
+        )
+        # Поиск номера, точка сохранения, запись и её освобождение.
+        with self.assertNumQueries(4):
+            note = Note.objects.create(
+                title=title, text='', author=self.author
+            )
+        self.assertEqual(note.slug, f'{base}-8')
+        note = Note.objects.create(
+            title=long_title, text='', author=self.author
+        )
+        self.assertEqual(note.slug, Note.suffixed_slug(long_base, 13))
+
+    def test_suffixed_slug_fits_max_length(self):
+        """Суффикс не выводит slug за пределы допустимой длины."""
+        max_length = Note._meta.get_field('slug').max_length
+        base = 'a' * max_length
+        slug = Note.suffixed_slug(base, 12)
+        self.assertEqual(len(slug), max_length)
+        self.assertTrue(slug.endswith('-12'))
+
     def test_author_can_edit_note(self):
         """Автор может редактировать свою заметку."""
         data = {**self.form_data, 'title': 'Обновлённый заголовок',
@@ -72,6 +148,19 @@ class TestLogic(BaseTestCase):
         self.assertEqual(updated_note.slug, data['slug'])
         self.assertEqual(updated_note.author, self.note.author)
 
+    def test_edit_with_empty_slug_keeps_own_slug(self):
+        """Очищенный при правке slug не уступает место самой заметке."""
+        title = 'Привет, мир'
+        note = Note.objects.create(
+            title=title, text='Текст', author=self.author
+        )
+        response = self.author_client.post(
+            reverse('notes:edit', args=(note.slug,)),
+            {'title': title, 'text': 'Новый текст', 'slug': ''},
+        )
+        self.assertRedirects(response, SUCCESS_URL)
+        self.assertEqual(Note.objects.get(pk=note.pk).slug, slugify(title))
+
     def test_author_can_delete_note(self):
         """Автор может удалить свою заметку."""
         count_before = Note.objects.count()
@@ -83,6 +172,18 @@ class TestLogic(BaseTestCase):
         self.assertEqual(count_after, count_before - 1)
         self.assertFalse(Note.objects.filter(id=self.note.id).exists())
 
+    def test_note_writes_fit_query_budget(self):
+        """Правка без смены slug и удаление: запрос заметки и запись."""
+        cases = (
+            (NOTES_EDIT, {**self.form_data, 'slug': NOTE_SLUG}),
+            (NOTES_DELETE, {}),
+        )
+        for url, data in cases:
+            with self.subTest(url=url):
+                with self.assertNumQueries(AUTH_QUERIES + WRITE_QUERIES):
+                    response = self.author_client.post(url, data)
+                self.assertRedirects(response, SUCCESS_URL)
+
     def test_reader_cannot_edit_foreign_note(self):
         """Чужой пользователь не может редактировать заметку автора."""
         response = self.reader_client.post(NOTES_EDIT, self.form_data)
@@ -110,3 +211,69 @@ class TestLogic(BaseTestCase):
         self.assertEqual(note.text, self.note.text)
         self.assertEqual(note.slug, self.note.slug)
         self.assertEqual(note.author, self.note.author)
+
+    def test_session_modes_cut_auth_queries(self):
+        """Запросы на сессию и пользователя при каждом режиме сессий."""
+        cases = (
+            ('db', 0, 2),
+            ('db', 60, 1),
+            ('cached_db', 60, 0),
+            ('signed_cookies', 60, 0),
+        )
+        for mode, user_timeout, queries in cases:
+            with self.subTest(mode=mode, user_timeout=user_timeout):
+                with override_settings(
+                    SESSION_ENGINE=f'django.contrib.sessions.backends.{mode}',
+                    USER_CACHE_TIMEOUT=user_timeout,
+                ):
+                    client = self.client_class()
+                    client.force_login(self.author)
+                    # Заметка, как и в WRITE_QUERIES, читается всегда.
+                    with self.assertNumQueries(queries + 1):
+                        response = client.get(NOTES_DETAIL)
+                self.assertEqual(response.context['user'], self.author)
+
+    def test_sqlite_pragmas_applied(self):
+        """Соединение с базой открыто с PRAGMA из настроек."""
+        pragmas = get_pragmas(connection, ('synchronous', 'busy_timeout'))
+        self.assertEqual(pragmas['synchronous'], 1)
+        self.assertEqual(
+            pragmas['busy_timeout'], settings.SQLITE_PRAGMAS['busy_timeout']
+        )
+
+    def test_search_triggers_survive_migrations(self):
+        """Миграция индекса по автору возвращает триггеры поиска."""
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'trigger'"
+            )
+            triggers = {row[0] for row in cursor.fetchall()}
+        for event in ('insert', 'update', 'delete'):
+            self.assertIn(f'notes_note_fts_{event}', triggers)
+
+
+class TestReplicas(ReplicaTestCase):
+    """Тестирование чтения с реплики."""
+
+    def test_read_views_use_replica(self):
+        """Список и заметка читаются с реплики, пользователь — с default."""
+        response = self.author_client.get(LIST_URL)
+        self.assertEqual(response.context['object_list'][0]._state.db,
+                         'replica')
+        response = self.author_client.get(NOTES_DETAIL)
+        self.assertEqual(response.context['note']._state.db, 'replica')
+        self.assertEqual(response.context['user']._state.db, 'default')
+
+    def test_writer_reads_primary_after_change(self):
+        """После правки автор читает с default, остальные — с реплики."""
+        response = self.author_client.post(
+            NOTES_EDIT, {**self.form_data, 'slug': NOTE_SLUG}
+        )
+        self.assertIn(PIN_COOKIE, response.cookies)
+        response = self.author_client.get(NOTES_DETAIL)
+        self.assertEqual(response.context['note']._state.db, 'default')
+        Note.objects.create(title='Чужая', text='', author=self.reader)
+        response = self.reader_client.get(LIST_URL)
+        self.assertEqual(
+            response.context['object_list'][0]._state.db, 'replica'
+        )
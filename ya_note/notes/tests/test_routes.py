@@ -5,7 +5,7 @@ from .base import (
     LIST_URL, ADD_URL, SUCCESS_URL, HOME_URL,
     ANON_REDIRECT_LIST, ANON_REDIRECT_ADD, ANON_REDIRECT_SUCCESS,
     ANON_REDIRECT_EDIT, ANON_REDIRECT_DELETE, ANON_REDIRECT_DETAIL,
-    NOTES_EDIT, NOTES_DETAIL, NOTES_DELETE
+    ANON_REDIRECT_SEARCH, NOTES_EDIT, NOTES_DETAIL, NOTES_DELETE, SEARCH_URL
 )
 
 
@@ -39,6 +39,10 @@ class TestNoteRoutes(BaseTestCase):
             (self.reader_client, NOTES_EDIT, HTTPStatus.NOT_FOUND),
             (self.client, NOTES_EDIT, HTTPStatus.FOUND),
 
+            (self.author_client, SEARCH_URL, HTTPStatus.OK),
+            (self.reader_client, SEARCH_URL, HTTPStatus.OK),
+            (self.client, SEARCH_URL, HTTPStatus.FOUND),
+
             (self.author_client, NOTES_DELETE, HTTPStatus.OK),
             (self.reader_client, NOTES_DELETE, HTTPStatus.NOT_FOUND),
             (self.client, NOTES_DELETE, HTTPStatus.FOUND),
@@ -60,9 +64,17 @@ class TestNoteRoutes(BaseTestCase):
             (NOTES_EDIT, ANON_REDIRECT_EDIT),
             (NOTES_DELETE, ANON_REDIRECT_DELETE),
             (NOTES_DETAIL, ANON_REDIRECT_DETAIL),
+            (SEARCH_URL, ANON_REDIRECT_SEARCH),
         ]
         for url, expected_redirect in cases:
             with self.subTest(url=url):
                 self.assertRedirects(
                     self.client.get(url), expected_redirect
                 )
+
+    def test_broken_list_page(self):
+        """Некорректный курсор даёт 404."""
+        self.assertEqual(
+            self.author_client.get(LIST_URL, {'cursor': 'abc'}).status_code,
+            HTTPStatus.NOT_FOUND
+        )
@@ -0,0 +1,88 @@
+"""Потоковый перенос заметок в форматах JSON Lines и CSV."""
+import csv
+import json
+from collections import defaultdict
+
+from .models import Note
+
+FIELDS = ('title', 'text', 'slug', 'author')
+FORMATS = ('jsonl', 'csv')
+
+
+def guess_format(path):
+    return 'csv' if str(path).lower().endswith('.csv') else 'jsonl'
+
+
+def read_records(file, file_format):
+    """
+    Читает записи по одной, не загружая файл целиком.
+
+    На строке JSON Lines, которая не разбирается в объект, выбрасывает
+    ValueError с её номером.
+    """
+    if file_format == 'csv':
+        yield from csv.DictReader(file)
+        return
+    for number, line in enumerate(file, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as error:
+            raise ValueError(f'Строка {number}: {error.msg}.') from error
+        if not isinstance(record, dict):
+            raise ValueError(f'Строка {number}: ожидался объект JSON.')
+        yield record
+
+
+def write_records(file, file_format, records):
+    """Пишет записи по одной; возвращает их количество."""
+    written = 0
+    if file_format == 'csv':
+        writer = csv.DictWriter(file, FIELDS)
+        writer.writeheader()
+        for record in records:
+            writer.writerow(record)
+            written += 1
+        return written
+    for record in records:
+        file.write(json.dumps(record, ensure_ascii=False) + '\n')
+        written += 1
+    return written
+
+
+def allocate_slugs(notes, numbers=None):
+    """
+    Подбирает свободные slug заметкам без slug по правилу Note.save.
+
+    Каждый заход проверяет одним запросом сразу все кандидаты пачки:
+    заметкам с одинаковым заголовком достаются разные номера. Словарь
+    numbers можно передавать между пачками, чтобы не перебирать заново
+    уже занятые номера.
+    """
+    numbers = {} if numbers is None else numbers
+    used = {note.slug for note in notes if note.slug}
+    pending = defaultdict(list)
+    for note in notes:
+        if not note.slug:
+            pending[Note.slug_from_title(note.title)].append(note)
+    for base in pending:
+        numbers.setdefault(base, 1)
+    while pending:
+        candidates = [
+            (Note.suffixed_slug(base, numbers[base] + offset), base, note)
+            for base, waiting in pending.items()
+            for offset, note in enumerate(waiting)
+        ]
+        for base, waiting in pending.items():
+            numbers[base] += len(waiting)
+        taken = set(Note.objects.filter(
+            slug__in=[slug for slug, _, _ in candidates]
+        ).values_list('slug', flat=True))
+        pending = defaultdict(list)
+        for slug, base, note in candidates:
+            if slug in taken or slug in used:
+                pending[base].append(note)
+            else:
+                note.slug = slug
+                used.add(slug)
@@ -1,9 +1,17 @@
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin
+from django.contrib.auth.views import redirect_to_login
+from django.db import IntegrityError, transaction
+from django.http import Http404
 from django.urls import reverse_lazy
 from django.views import generic
 
-from .forms import NoteForm
+from yacommon.pagination import akeyset_page, keyset_page
+from yacommon.replicas import ReplicaReadMixin
+
+from .forms import WARNING, NoteForm
 from .models import Note
+from .search import NoteSearchResults
 
 
 class Home(generic.TemplateView):
@@ -26,22 +34,35 @@ class NoteBase(LoginRequiredMixin):
         return self.model.objects.filter(author=self.request.user)
 
 
-class NoteCreate(NoteBase, generic.CreateView):
-    """Добавление заметки."""
+class NoteFormMixin(NoteBase):
+    """Общая часть создания и редактирования заметки."""
     template_name = 'notes/form.html'
     form_class = NoteForm
 
     def form_valid(self, form):
-        new_note = form.save(commit=False)
-        new_note.author = self.request.user
-        new_note.save()
+        """Занятый slug, найденный базой, превращаем в ошибку формы."""
+        if not form.cleaned_data['slug'] or 'slug' not in form.changed_data:
+            # Прежний slug не конфликтует, а новый подберёт Note.save():
+            # точка сохранения для перехвата ошибки не нужна.
+            return super().form_valid(form)
+        try:
+            with transaction.atomic():
+                return super().form_valid(form)
+        except IntegrityError:
+            form.add_error('slug', form.instance.slug + WARNING)
+            return self.form_invalid(form)
+
+
+class NoteCreate(NoteFormMixin, generic.CreateView):
+    """Добавление заметки."""
+
+    def form_valid(self, form):
+        form.instance.author = self.request.user
         return super().form_valid(form)
 
 
-class NoteUpdate(NoteBase, generic.UpdateView):
+class NoteUpdate(NoteFormMixin, generic.UpdateView):
     """Редактирование заметки."""
-    template_name = 'notes/form.html'
-    form_class = NoteForm
 
 
 class NoteDelete(NoteBase, generic.DeleteView):
@@ -49,11 +70,118 @@ class NoteDelete(NoteBase, generic.DeleteView):
     template_name = 'notes/delete.html'
 
 
-class NotesList(NoteBase, generic.ListView):
-    """Список всех заметок пользователя."""
+class NotesPageMixin:
+    """
+    Страница заметок после курсора, как в архиве новостей.
+
+    Страница и признак следующей читаются одним запросом по индексу
+    (author, id), а из таблицы — только выводимые колонки: стоимость
+    страницы не зависит ни от числа заметок, ни от объёма их текста.
+    """
+    ordering = ('pk',)
+
+    def page_notes(self, notes):
+        return notes.only('id', 'slug', 'title')
+
+    def page_args(self, notes):
+        return (
+            self.page_notes(notes),
+            self.ordering,
+            self.request.GET.get('cursor'),
+            settings.NOTES_COUNT_ON_PAGE,
+        )
+
+
+class NotesList(
+        ReplicaReadMixin, NotesPageMixin, NoteBase, generic.ListView
+):
+    """Список всех заметок пользователя постранично."""
     template_name = 'notes/list.html'
 
+    def get_queryset(self):
+        notes, self.next_cursor = keyset_page(
+            *self.page_args(super().get_queryset())
+        )
+        return notes
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['next_cursor'] = self.next_cursor
+        return context
+
 
-class NoteDetail(NoteBase, generic.DetailView):
+class NoteDetail(ReplicaReadMixin, NoteBase, generic.DetailView):
     """Заметка подробно."""
     template_name = 'notes/detail.html'
+
+
+class AsyncNoteBase(
+        generic.base.TemplateResponseMixin,
+        generic.base.ContextMixin,
+        generic.View,
+):
+    """
+    Основа асинхронных страниц заметок для запуска под ASGI.
+
+    Пользователь загружается через request.auser() и подменяет ленивый
+    request.user; аноним, как и с LoginRequiredMixin, уходит на вход.
+    """
+    model = Note
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if not request.user.is_authenticated:
+            return redirect_to_login(request.get_full_path())
+        return await super().dispatch(request, *args, **kwargs)
+
+    def get_queryset(self):
+        return self.model.objects.filter(author=self.request.user)
+
+    async def get_page_context(self, **kwargs):
+        raise NotImplementedError
+
+    async def get(self, request, *args, **kwargs):
+        return self.render_to_response(await self.get_page_context(**kwargs))
+
+
+class AsyncNotesList(ReplicaReadMixin, NotesPageMixin, AsyncNoteBase):
+    """Асинхронный вариант NotesList."""
+    template_name = 'notes/list.html'
+
+    async def get_page_context(self, **kwargs):
+        notes, next_cursor = await akeyset_page(
+            *self.page_args(self.get_queryset())
+        )
+        return self.get_context_data(
+            object_list=notes, note_list=notes, next_cursor=next_cursor,
+            **kwargs
+        )
+
+
+class AsyncNoteDetail(ReplicaReadMixin, AsyncNoteBase):
+    """Асинхронный вариант NoteDetail."""
+    template_name = 'notes/detail.html'
+
+    async def get_page_context(self, **kwargs):
+        try:
+            note = await self.get_queryset().aget(slug=self.kwargs['slug'])
+        except self.model.DoesNotExist:
+            raise Http404('Заметка не найдена.')
+        return self.get_context_data(object=note, note=note, **kwargs)
+
+
+class NoteSearch(LoginRequiredMixin, generic.ListView):
+    """Полнотекстовый поиск по заметкам пользователя."""
+    template_name = 'notes/search.html'
+
+    def get_paginate_by(self, queryset):
+        return settings.SEARCH_RESULTS_ON_PAGE
+
+    def get_queryset(self):
+        self.query = self.request.GET.get('q', '')
+        return NoteSearchResults(self.query, self.request.user)
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context['query'] = self.query
+        return context
@@ -1,8 +1,12 @@
+import sys
 from pathlib import Path
 
 from django.urls import reverse_lazy
 
 BASE_DIR = Path(__file__).resolve().parent.parent
+# Общий для обоих проектов пакет yacommon лежит в корне репозитория.
+if str(BASE_DIR.parent) not in sys.path:
+    sys.path.append(str(BASE_DIR.parent))
 
 SECRET_KEY = 'django-insecure-yipnj$#j!ajarq%k55z4kuf3x79)91h0h42o9!1ho(z=!%mt=#'
 
@@ -22,6 +26,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yacommon.request_stats.RequestStatsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -29,6 +34,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'yacommon.replicas.PrimaryPinMiddleware',
 ]
 
 ROOT_URLCONF = 'yanote.urls'
@@ -56,8 +62,54 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Соединение живёт между запросами и проверяется перед повторным
+        # использованием.
+        'CONN_MAX_AGE': 60,
+        'CONN_HEALTH_CHECKS': True,
+        'OPTIONS': {
+            # Транзакция сразу берёт блокировку записи: без этого
+            # повышение блокировки внутри транзакции падает с
+            # «database is locked», не дожидаясь busy_timeout.
+            'transaction_mode': 'IMMEDIATE',
+        },
     }
 }
+# Копия базы для чтения. Пока её нет в DATABASE_REPLICAS, она не
+# используется; файл создаёт и обновляет команда sync_replicas.
+DATABASES['replica'] = {
+    **DATABASES['default'],
+    'NAME': BASE_DIR / 'db.replica.sqlite3',
+    'TEST': {'MIRROR': 'default'},
+}
+DATABASE_ROUTERS = ['yacommon.replicas.ReplicaRouter']
+# Базы, с которых читают представления с ReplicaReadMixin.
+DATABASE_REPLICAS = []
+# Сколько секунд после изменения данных клиент читает с default.
+REPLICA_PIN_SECONDS = 60
+
+# Выполняются при открытии каждого соединения с SQLite.
+SQLITE_PRAGMAS = {
+    'journal_mode': 'wal',
+    'synchronous': 'normal',
+    'busy_timeout': 5000,
+    'mmap_size': 256 * 1024 * 1024,
+    # Отрицательное значение — размер кэша в КиБ.
+    'cache_size': -20000,
+}
+
+
+# Хранилище сессий: 'db' — таблица, 'cached_db' — кеш поверх таблицы,
+# 'cache' — только кеш, 'signed_cookies' — подписанная кука у клиента.
+# Кеш в памяти у каждого процесса свой, и выход в одном процессе
+# не виден другим: 'cached_db' и 'cache' включаются только вместе
+# с общим кешем (yacommon.auth.check_shared_cache).
+SESSION_MODE = 'db'
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_MODE}'
+
+AUTHENTICATION_BACKENDS = ['yacommon.auth.CachedModelBackend']
+# Сколько секунд пользователь хранится в кеше; 0 — не кешировать.
+# Больше нуля — только с общим кешем.
+USER_CACHE_TIMEOUT = 0
 
 
 AUTH_PASSWORD_VALIDATORS = [
@@ -87,3 +139,13 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 LOGIN_URL = reverse_lazy('users:login')
 LOGIN_REDIRECT_URL = reverse_lazy('notes:home')
+
+NOTES_COUNT_ON_PAGE = 50
+SEARCH_RESULTS_ON_PAGE = 20
+
+# Асинхронные варианты списка и страницы заметки для запуска под ASGI.
+ASYNC_VIEWS = False
+
+# Замер запросов к базе и времени ответа каждого представления.
+REQUEST_STATS_ENABLED = False
+REQUEST_STATS_SAMPLES = 1000
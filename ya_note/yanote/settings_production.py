@@ -0,0 +1,18 @@
+"""
+Настройки для боевого запуска.
+
+Подключаются через DJANGO_SETTINGS_MODULE=yanote.settings_production.
+Ключ и хосты задаются переменными окружения DJANGO_SECRET_KEY и
+DJANGO_ALLOWED_HOSTS (через запятую).
+"""
+from .settings import *  # noqa: F401, F403
+from .settings import TEMPLATES
+# Пакет yacommon становится доступен после импорта настроек.
+from yacommon.production import allowed_hosts, cached_templates, secret_key
+
+DEBUG = False
+
+SECRET_KEY = secret_key()
+ALLOWED_HOSTS = allowed_hosts()
+
+TEMPLATES = cached_templates(TEMPLATES)
@@ -0,0 +1,6 @@
+"""
+Код, общий для проектов ya_news и ya_note.
+
+Пакет лежит в корне репозитория; настройки каждого проекта добавляют
+этот каталог в sys.path.
+"""
@@ -0,0 +1,94 @@
+"""
+Пользователь из кеша вместо запроса к базе на каждый запрос.
+
+CachedModelBackend.get_user ищет пользователя в кеше и идёт в базу
+только при промахе. Сохранение и удаление пользователя убирают его
+из кеша, а вход кладёт туда заново: смена пароля, блокировка и флаг
+персонала действуют со следующего запроса. Права пользователя и групп
+в кеш не попадают и читаются как прежде. Изменения в обход save(),
+например QuerySet.update, видны по истечении USER_CACHE_TIMEOUT.
+
+Кеш в памяти процесса для этого не годится: выход, смена пароля или
+блокировка в одном процессе не видны остальным, и те продолжают
+пускать пользователя. check_shared_cache не даёт запустить проект
+с кешированием сессий или пользователей поверх такого кеша, а при
+нескольких процессах сервера — и с кешами страниц, которые он назовёт.
+"""
+from copy import copy
+
+from django.conf import settings
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import DEFAULT_CACHE_ALIAS, cache
+from django.core.exceptions import ImproperlyConfigured
+
+USER_KEY = 'auth:user:{}'
+# Кеши, у которых в каждом процессе свои данные.
+LOCAL_CACHES = ('django.core.cache.backends.locmem.LocMemCache',)
+# Сессии, которые читаются из кеша.
+CACHED_SESSIONS = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+# Права, которые ModelBackend запоминает в самом объекте пользователя.
+PERM_CACHES = ('_perm_cache', '_user_perm_cache', '_group_perm_cache')
+
+
+def check_shared_cache(page_timeouts=()):
+    """
+    Отказ запускаться с кешированием авторизации в памяти процесса.
+
+    page_timeouts — настройки сроков кеша страниц. Страницу сбрасывает
+    только процесс, в котором изменились данные, поэтому при
+    SERVER_PROCESSES больше одного ненулевой срок требует общего кеша.
+    """
+    backend = settings.CACHES[DEFAULT_CACHE_ALIAS]['BACKEND']
+    if backend not in LOCAL_CACHES:
+        return
+    if page_timeouts and settings.SERVER_PROCESSES > 1:
+        for name in page_timeouts:
+            if getattr(settings, name):
+                raise ImproperlyConfigured(
+                    f'{name} при нескольких процессах сервера требует '
+                    f'общего кеша, а не {backend}.'
+                )
+    if settings.SESSION_ENGINE in CACHED_SESSIONS:
+        raise ImproperlyConfigured(
+            f'{settings.SESSION_ENGINE} требует общего кеша, а не {backend}.'
+        )
+    if settings.USER_CACHE_TIMEOUT:
+        raise ImproperlyConfigured(
+            f'USER_CACHE_TIMEOUT требует общего кеша, а не {backend}.'
+        )
+
+
+def remember(user):
+    if not settings.USER_CACHE_TIMEOUT:
+        return
+    user = copy(user)
+    for name in PERM_CACHES:
+        user.__dict__.pop(name, None)
+    cache.set(USER_KEY.format(user.pk), user, settings.USER_CACHE_TIMEOUT)
+
+
+def forget_user(sender, instance, **kwargs):
+    """Обработчик post_save и post_delete модели пользователя."""
+    cache.delete(USER_KEY.format(instance.pk))
+
+
+def remember_logged_in(sender, user, **kwargs):
+    """Обработчик user_logged_in: запрос после входа не идёт в базу."""
+    remember(user)
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        if not settings.USER_CACHE_TIMEOUT:
+            return super().get_user(user_id)
+        user = cache.get(USER_KEY.format(user_id))
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                remember(user)
+            return user
+        return user if self.user_can_authenticate(user) else None
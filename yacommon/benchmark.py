@@ -0,0 +1,292 @@
+"""
+Повторяемые замеры маршрутов через тестовый клиент Django.
+
+Каждый запрос выполняется в транзакции, которая затем откатывается,
+а куки клиента восстанавливаются: пишущие маршруты и выход из системы
+не меняют состояние между повторами. Сравнение с сохранённым эталоном
+находит маршруты, которые стали медленнее, тяжелее по памяти или
+делают больше запросов к базе.
+"""
+import copy
+import json
+import logging
+import platform
+import tempfile
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+
+import django
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connection, connections, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from .request_stats import PERCENTILES, percentile
+
+
+@contextmanager
+def temporary_database():
+    """
+    Пустая база во временном каталоге вместо рабочей на время замера.
+
+    Замер идёт через новое соединение: открытое соединение с рабочей
+    базой остаётся как было, а база SQLite в памяти, как в тестах, не
+    пропадает при его закрытии.
+    """
+    original = connections[DEFAULT_DB_ALIAS]
+    database = original.settings_dict
+    old_name = database['NAME']
+    old_test_name = database['TEST'].get('NAME')
+    with tempfile.TemporaryDirectory() as directory:
+        database['TEST']['NAME'] = str(Path(directory) / 'benchmark.sqlite3')
+        temporary = original.__class__(database, DEFAULT_DB_ALIAS)
+        connections[DEFAULT_DB_ALIAS] = temporary
+        try:
+            temporary.creation.create_test_db(verbosity=0, serialize=False)
+            try:
+                yield
+            finally:
+                temporary.creation.destroy_test_db(old_name, verbosity=0)
+        finally:
+            connections[DEFAULT_DB_ALIAS] = original
+            database['TEST']['NAME'] = old_test_name
+
+
+def url_names(patterns, namespace):
+    return {
+        f'{namespace}:{pattern.name}' for pattern in patterns if pattern.name
+    }
+
+
+def case(name, role, path, method='get', **request):
+    """Запрос к маршруту name от лица role; request уходит клиенту."""
+    return {
+        'name': name, 'role': role, 'path': path,
+        'method': method, 'request': request,
+    }
+
+
+def send(client, case, capture=None):
+    """
+    Выполняет запрос без следов в базе и куках, возвращает ответ и время.
+
+    capture охватывает только сам запрос, без открытия транзакции.
+    """
+    if capture is None:
+        capture = nullcontext()
+    cookies = copy.deepcopy(client.cookies)
+    try:
+        with transaction.atomic(), capture:
+            started = time.perf_counter()
+            response = getattr(client, case['method'])(
+                case['path'], **case['request']
+            )
+            if response.streaming:
+                # Тело потокового ответа строится только при чтении.
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+    finally:
+        client.cookies = cookies
+    return response, elapsed
+
+
+def measure(client, case, repeat, warmup):
+    """
+    Перцентили времени по repeat повторам после warmup разогревочных.
+
+    Число запросов к базе и пик выделенной памяти снимаются отдельным
+    прогоном: трассировка памяти замедляет запрос в разы.
+    """
+    for _ in range(warmup):
+        send(client, case)
+    timings = sorted(
+        send(client, case)[1] * 1000 for _ in range(repeat)
+    )
+    queries = CaptureQueriesContext(connection)
+    tracemalloc.start()
+    try:
+        response, _ = send(client, case, queries)
+        allocated = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'status': response.status_code,
+        **{
+            f'p{rank}_ms': round(percentile(timings, rank), 3)
+            for rank in PERCENTILES
+        },
+        'queries': len(queries),
+        'alloc_kb': round(allocated / 1024, 1),
+    }
+
+
+def route_key(case):
+    return f'{case["method"].upper()} {case["name"]}'
+
+
+def run(cases, clients, repeat, warmup):
+    """Результаты по маршрутам и ролям: {'GET news:home': {роль: …}}."""
+    results = {}
+    for item in cases:
+        results.setdefault(route_key(item), {})[item['role']] = measure(
+            clients[item['role']], item, repeat, warmup
+        )
+    return results
+
+
+def regressions(results, baseline, threshold, min_ms):
+    """
+    Ухудшения по сравнению с эталоном.
+
+    Медиана времени и память считаются ухудшившимися, если выросли
+    больше чем в 1 + threshold раз, время — ещё и не меньше чем на
+    min_ms: так шум на быстрых маршрутах не роняет проверку. Лишний
+    запрос к базе или другой статус ответа — ухудшение всегда.
+    """
+    found = []
+    for route, roles in results.items():
+        for role, current in roles.items():
+            old = baseline.get(route, {}).get(role)
+            if old is None:
+                continue
+            label = f'{route} ({role})'
+            if current['status'] != old['status']:
+                found.append(
+                    f'{label}: статус {old["status"]} → {current["status"]}'
+                )
+            if (
+                current['p50_ms'] > old['p50_ms'] * (1 + threshold)
+                and current['p50_ms'] - old['p50_ms'] >= min_ms
+            ):
+                found.append(
+                    f'{label}: p50 {old["p50_ms"]} → {current["p50_ms"]} мс'
+                )
+            if current['queries'] > old['queries']:
+                found.append(
+                    f'{label}: запросов {old["queries"]} → '
+                    f'{current["queries"]}'
+                )
+            if current['alloc_kb'] > old['alloc_kb'] * (1 + threshold):
+                found.append(
+                    f'{label}: память {old["alloc_kb"]} → '
+                    f'{current["alloc_kb"]} КБ'
+                )
+    return found
+
+
+def load(path):
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+def dump(path, report):
+    with open(path, 'w', encoding='utf-8') as file:
+        json.dump(report, file, ensure_ascii=False, indent=2)
+        file.write('\n')
+
+
+def table(results):
+    """Строки сводки для вывода в консоль."""
+    rows = []
+    for route, roles in results.items():
+        for role, metrics in roles.items():
+            rows.append(
+                f'{route:<28} {role:<10} {metrics["status"]:>3} '
+                f'{metrics["p50_ms"]:>8.2f} {metrics["p95_ms"]:>8.2f} '
+                f'{metrics["p99_ms"]:>8.2f} {metrics["queries"]:>4} '
+                f'{metrics["alloc_kb"]:>9.1f}'
+            )
+    header = (
+        f'{"Маршрут":<28} {"Роль":<10} Код   p50 мс   p95 мс   p99 мс '
+        'SQL  Память КБ'
+    )
+    return [header, *rows]
+
+
+class BenchmarkCommand(BaseCommand):
+    """
+    Основа команд benchmark обоих проектов.
+
+    Наследник задаёт аргументы генерации данных и их имена в
+    data_options, маршруты в route_names() и запросы к ним в prepare().
+    """
+    data_options = ()
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeat', type=int, default=50)
+        parser.add_argument('--warmup', type=int, default=5)
+        parser.add_argument('--users', type=int, default=200)
+        parser.add_argument('--random-seed', type=int, default=0)
+        parser.add_argument('--output', help='Файл для результатов в JSON.')
+        parser.add_argument('--baseline', help='Эталонный JSON для сравнения.')
+        parser.add_argument(
+            '--threshold', type=float, default=0.3,
+            help='Допустимый относительный рост медианы и памяти.',
+        )
+        parser.add_argument(
+            '--min-ms', type=float, default=1.0,
+            help='Рост медианы меньше этого не считается ухудшением.',
+        )
+
+    def handle(self, *args, **options):
+        # Эталон читаем до замера, чтобы не ждать его ради ошибки в пути.
+        baseline = load(options['baseline']) if options['baseline'] else None
+        # Ответы 404 и 403 ожидаемы для части ролей, в лог их не пишем.
+        logging.disable(logging.WARNING)
+        try:
+            with (
+                temporary_database(),
+                override_settings(**self.overrides(options)),
+            ):
+                cache.clear()
+                results = self.run(options)
+        finally:
+            logging.disable(logging.NOTSET)
+        self.stdout.write('\n'.join(table(results)))
+        report = {
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'options': {
+                name: options[name]
+                for name in ('repeat', 'warmup', *self.data_options)
+            },
+            'results': results,
+        }
+        if options['output']:
+            dump(options['output'], report)
+        if baseline is None:
+            return
+        found = regressions(
+            results, baseline['results'], options['threshold'],
+            options['min_ms'],
+        )
+        if found:
+            raise CommandError(
+                'Маршруты ухудшились:\n' + '\n'.join(found)
+            )
+        self.stdout.write('Ухудшений нет.', self.style.SUCCESS)
+
+    def overrides(self, options):
+        """Настройки на время замера."""
+        return {}
+
+    def route_names(self):
+        raise NotImplementedError
+
+    def prepare(self, options):
+        """Данные, клиенты ролей и запросы к каждому маршруту."""
+        raise NotImplementedError
+
+    def run(self, options):
+        cases, clients = self.prepare(options)
+        missing = self.route_names() - {item['name'] for item in cases}
+        if missing:
+            raise CommandError(
+                'Нет замеров для маршрутов: ' + ', '.join(sorted(missing))
+            )
+        return run(cases, clients, options['repeat'], options['warmup'])
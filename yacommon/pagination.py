@@ -0,0 +1,94 @@
+"""Постраничный вывод по ключу (keyset) с непрозрачными курсорами."""
+import base64
+import json
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from django.http import Http404
+
+
+def _get_field(model, name):
+    return model._meta.pk if name == 'pk' else model._meta.get_field(name)
+
+
+def encode_cursor(obj, fields):
+    """Запаковывает значения ключа записи в строку для URL."""
+    values = [
+        _get_field(type(obj), name).value_to_string(obj) for name in fields
+    ]
+    raw = json.dumps(values, separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, model, fields):
+    """Распаковывает курсор; некорректный курсор даёт 404."""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        values = json.loads(raw)
+        if not isinstance(values, list) or len(values) != len(fields):
+            raise ValueError
+        return [
+            _get_field(model, name).to_python(value)
+            for name, value in zip(fields, values)
+        ]
+    except (ValueError, TypeError, ValidationError):
+        raise Http404('Некорректный курсор.')
+
+
+def after_cursor(ordering, values):
+    """
+    Условие «строго после» записи с ключом values.
+
+    Для ('-date', '-pk') это date <= d AND (date < d OR pk < p):
+    нестрогая граница по первому полю даёт базе начать чтение индекса
+    прямо с нужного места.
+    """
+    bounds = []
+    for name, value in zip(ordering, values):
+        field = name.lstrip('-')
+        lookup = 'lt' if name.startswith('-') else 'gt'
+        bounds.append((field, lookup, value))
+    field, lookup, value = bounds[-1]
+    condition = Q(**{f'{field}__{lookup}': value})
+    for field, lookup, value in reversed(bounds[:-1]):
+        condition = Q(**{f'{field}__{lookup}': value}) | (
+            Q(**{field: value}) & condition
+        )
+    field, lookup, value = bounds[0]
+    return Q(**{f'{field}__{lookup}e': value}) & condition
+
+
+def _page_queryset(queryset, ordering, cursor):
+    queryset = queryset.order_by(*ordering)
+    if cursor:
+        values = decode_cursor(
+            cursor, queryset.model, [name.lstrip('-') for name in ordering]
+        )
+        queryset = queryset.filter(after_cursor(ordering, values))
+    return queryset
+
+
+def _cut_page(items, ordering, size):
+    if len(items) <= size:
+        return items, None
+    items = items[:size]
+    fields = [name.lstrip('-') for name in ordering]
+    return items, encode_cursor(items[-1], fields)
+
+
+def keyset_page(queryset, ordering, cursor, size):
+    """
+    Возвращает страницу записей после курсора и курсор следующей страницы.
+
+    Стоимость страницы не зависит от её номера: вместо OFFSET
+    используется условие по индексируемому ключу упорядочивания.
+    """
+    queryset = _page_queryset(queryset, ordering, cursor)
+    return _cut_page(list(queryset[:size + 1]), ordering, size)
+
+
+async def akeyset_page(queryset, ordering, cursor, size):
+    """Асинхронный вариант keyset_page."""
+    queryset = _page_queryset(queryset, ordering, cursor)
+    items = [item async for item in queryset[:size + 1]]
+    return _cut_page(items, ordering, size)
@@ -0,0 +1,55 @@
+"""
+Общее для боевых настроек обоих проектов.
+
+Секретный ключ и разрешённые хосты берутся из окружения: без них
+процесс не запускается, а не работает молча с ключом из репозитория.
+"""
+import os
+
+from django.core.exceptions import ImproperlyConfigured
+
+
+def environ(name):
+    value = os.environ.get(name, '').strip()
+    if not value:
+        raise ImproperlyConfigured(
+            f'Не задана переменная окружения {name}.'
+        )
+    return value
+
+
+def secret_key():
+    return environ('DJANGO_SECRET_KEY')
+
+
+def allowed_hosts():
+    """Хосты из DJANGO_ALLOWED_HOSTS через запятую."""
+    return [
+        host.strip()
+        for host in environ('DJANGO_ALLOWED_HOSTS').split(',')
+        if host.strip()
+    ]
+
+
+def cached_templates(templates):
+    """
+    Те же шаблоны с кеширующим загрузчиком.
+
+    Шаблоны компилируются один раз на процесс: загрузчик задан явно и
+    без DEBUG не перечитывает файлы при изменении.
+    """
+    return [{
+        **templates[0],
+        # С явным списком загрузчиков APP_DIRS должен быть выключен.
+        'APP_DIRS': False,
+        'OPTIONS': {
+            **templates[0]['OPTIONS'],
+            'loaders': [(
+                'django.template.loaders.cached.Loader',
+                [
+                    'django.template.loaders.filesystem.Loader',
+                    'django.template.loaders.app_directories.Loader',
+                ],
+            )],
+        },
+    }]
@@ -0,0 +1,183 @@
+"""
+Чтение с реплик базы.
+
+Представления с ReplicaReadMixin читают с одной из баз настройки
+DATABASE_REPLICAS, весь остальной код — с default; запись всегда идёт
+в default. Клиент, только что изменивший данные, получает куку и,
+пока она жива, читает тоже с default: реплика могла ещё не получить
+его запись. По той же причине построенное по реплике не кешируется
+под текущей версией данных: см. reading_replica.
+
+Локально реплики — копии файла SQLite, которые обновляет команда
+sync_replicas (SyncReplicasCommand). В тестах у них TEST MIRROR, и они
+смотрят в тестовую базу default.
+"""
+import random
+import sqlite3
+import time
+from contextlib import closing
+from contextvars import ContextVar
+
+from asgiref.sync import (
+    iscoroutinefunction, markcoroutinefunction, sync_to_async
+)
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+
+PIN_COOKIE = 'primary_pin'
+SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS', 'TRACE')
+
+current_replica = ContextVar('current_replica', default=None)
+
+
+def reading_replica():
+    """Читает ли текущий запрос с реплики."""
+    return current_replica.get() is not None
+
+
+def choose_replica(request):
+    """Реплика для чтения или None, если читать нужно с default."""
+    replicas = settings.DATABASE_REPLICAS
+    if not replicas or PIN_COOKIE in request.COOKIES:
+        return None
+    return random.choice(replicas)
+
+
+class ReplicaRouter:
+    """Чтение внутри ReplicaReadMixin — с реплики, остальное — с default."""
+
+    def db_for_read(self, model, **hints):
+        return current_replica.get()
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Реплики — копии default, объекты с разных баз одни и те же.
+        return True
+
+    def allow_migrate(self, db, app_label, **hints):
+        """Реплики получают схему вместе с данными из default."""
+        return db == DEFAULT_DB_ALIAS
+
+
+class ReplicaReadMixin:
+    """
+    Представление только для чтения, работающее с репликой.
+
+    Сессия и пользователь загружаются с default до переключения: после
+    входа их может ещё не быть на реплике. Ответ рендерится внутри,
+    иначе ленивые запросы шаблона ушли бы в default.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        alias = choose_replica(request)
+        if alias is None:
+            return super().dispatch(request, *args, **kwargs)
+        if self.view_is_async:
+            return self.adispatch_on(alias, request, *args, **kwargs)
+        request.user.is_authenticated  # Загружает ленивого пользователя.
+        token = current_replica.set(alias)
+        try:
+            response = super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                response.render()
+            return response
+        finally:
+            current_replica.reset(token)
+
+    async def adispatch_on(self, alias, request, *args, **kwargs):
+        request.user = await request.auser()
+        token = current_replica.set(alias)
+        try:
+            response = await super().dispatch(request, *args, **kwargs)
+            if hasattr(response, 'render'):
+                await sync_to_async(response.render)()
+            return response
+        finally:
+            current_replica.reset(token)
+
+
+class PrimaryPinMiddleware:
+    """
+    После изменяющего запроса ставит куку чтения с default.
+
+    Срок куки REPLICA_PIN_SECONDS должен перекрывать отставание реплик.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        return self.pin(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.pin(request, await self.get_response(request))
+
+    def pin(self, request, response):
+        if (
+            settings.DATABASE_REPLICAS
+            and request.method not in SAFE_METHODS
+            and response.status_code < 400
+        ):
+            response.set_cookie(
+                PIN_COOKIE, '1', max_age=settings.REPLICA_PIN_SECONDS,
+                httponly=True, samesite='Lax',
+            )
+        return response
+
+
+def sync_replica(path):
+    """
+    Копирует базу default в файл реплики path.
+
+    Резервное копирование SQLite пишет в файл реплики на месте под его
+    блокировкой: открытые соединения реплики после копии видят новые
+    данные, а не смесь старых и новых страниц.
+    """
+    connection = connections[DEFAULT_DB_ALIAS]
+    connection.ensure_connection()
+    with closing(sqlite3.connect(path)) as replica:
+        connection.connection.backup(replica)
+
+
+class SyncReplicasCommand(BaseCommand):
+    """Основа команды sync_replicas обоих проектов."""
+    help = (
+        'Копирует базу default в файлы реплик SQLite. Без аргументов '
+        'обновляет все базы из DATABASE_REPLICAS.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'aliases', nargs='*', help='Имена реплик из DATABASES.'
+        )
+
+    def handle(self, *args, **options):
+        aliases = options['aliases'] or settings.DATABASE_REPLICAS
+        if not aliases:
+            raise CommandError(
+                'DATABASE_REPLICAS пуст, укажите имена реплик явно.'
+            )
+        for alias in aliases:
+            if alias == DEFAULT_DB_ALIAS or alias not in settings.DATABASES:
+                raise CommandError(f'Нет реплики {alias} в DATABASES.')
+            if connections[alias].vendor != 'sqlite':
+                raise CommandError(
+                    f'{alias}: копировать можно только файлы SQLite, '
+                    'другие СУБД реплицируют данные сами.'
+                )
+        for alias in aliases:
+            started = time.monotonic()
+            sync_replica(connections[alias].settings_dict['NAME'])
+            self.stdout.write(
+                f'{alias}: обновлена за {time.monotonic() - started:.2f} с.',
+                self.style.SUCCESS,
+            )
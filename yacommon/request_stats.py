@@ -0,0 +1,167 @@
+"""
+Замер стоимости запросов к каждому представлению.
+
+Включается настройкой REQUEST_STATS_ENABLED. Для каждого запроса
+считаются число SQL-запросов, время в базе, время рендеринга шаблона
+и размер ответа; итог отдаётся в заголовке Server-Timing и копится
+по именам URL для сводки с перцентилями.
+"""
+import math
+import threading
+import time
+from collections import defaultdict, deque
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.contrib.auth.decorators import user_passes_test
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, JsonResponse
+
+METRICS = ('total_ms', 'db_ms', 'render_ms', 'queries', 'size')
+PERCENTILES = (50, 95, 99)
+
+current_stats = ContextVar('current_stats', default=None)
+
+
+class RequestStats:
+    """Показатели одного запроса."""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+
+
+def record_query(execute, sql, params, many, context):
+    """Обёртка выполнения SQL: считает запросы текущего HTTP-запроса."""
+    stats = current_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.queries += 1
+        stats.db_time += time.perf_counter() - started
+
+
+def instrument(connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+def percentile(values, rank):
+    """Перцентиль по ближайшему рангу для отсортированных значений."""
+    return values[max(math.ceil(rank / 100 * len(values)) - 1, 0)]
+
+
+class StatsStore:
+    """Последние замеры по каждому имени URL в памяти процесса."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.samples = defaultdict(
+            lambda: deque(maxlen=settings.REQUEST_STATS_SAMPLES)
+        )
+
+    def add(self, view_name, sample):
+        with self.lock:
+            self.samples[view_name].append(sample)
+
+    def clear(self):
+        with self.lock:
+            self.samples.clear()
+
+    def summary(self):
+        with self.lock:
+            samples = {name: list(rows) for name, rows in self.samples.items()}
+        summary = {}
+        for name, rows in sorted(samples.items()):
+            summary[name] = {'requests': len(rows)}
+            for metric in METRICS:
+                values = sorted(row[metric] for row in rows)
+                summary[name][metric] = {
+                    f'p{rank}': percentile(values, rank)
+                    for rank in PERCENTILES
+                }
+        return summary
+
+
+store = StatsStore()
+
+
+class RequestStatsMiddleware:
+    """Собирает показатели запроса; без настройки не подключается."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.REQUEST_STATS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        for connection in connections.all():
+            instrument(connection)
+        connection_created.connect(instrument)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    async def __acall__(self, request):
+        stats = RequestStats()
+        token = current_stats.set(stats)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_stats.reset(token)
+        return self.finish(request, response, stats)
+
+    def process_template_response(self, request, response):
+        """Засекает рендеринг: он идёт сразу после этого метода."""
+        stats = current_stats.get()
+        started = time.perf_counter()
+
+        def rendered(response):
+            stats.render_time += time.perf_counter() - started
+
+        response.add_post_render_callback(rendered)
+        return response
+
+    def finish(self, request, response, stats):
+        total = time.perf_counter() - stats.started
+        match = request.resolver_match
+        sample = {
+            'total_ms': total * 1000,
+            'db_ms': stats.db_time * 1000,
+            'render_ms': stats.render_time * 1000,
+            'queries': stats.queries,
+            'size': 0 if response.streaming else len(response.content),
+        }
+        store.add(match.view_name if match else '<unresolved>', sample)
+        response.headers['Server-Timing'] = (
+            f'db;dur={sample["db_ms"]:.2f};desc="{stats.queries} queries", '
+            f'render;dur={sample["render_ms"]:.2f}, '
+            f'total;dur={sample["total_ms"]:.2f}'
+        )
+        return response
+
+
+@user_passes_test(lambda user: user.is_staff)
+def request_stats(request):
+    """Сводка p50/p95/p99 по представлениям этого процесса."""
+    if not settings.REQUEST_STATS_ENABLED:
+        raise Http404
+    return JsonResponse(store.summary())
@@ -0,0 +1,157 @@
+"""
+Полнотекстовый поиск SQLite FTS5, общий для новостей и заметок.
+
+Для таблицы создаётся таблица FTS5 с копией индексируемых колонок и
+триггеры, которые держат копию в согласии с оригиналом. Поиск не
+различает «е» и «ё»: в индекс и в запрос текст попадает с заменой.
+Выдачу для Paginator строят подклассы SearchResults.
+"""
+import re
+
+from django.db import connections, migrations
+from django.utils.html import escape
+from django.utils.safestring import mark_safe
+
+WORD = re.compile(r'\w+')
+# Служебные символы вместо тегов: текст экранируется уже после snippet().
+MARK_START, MARK_END = '\x02', '\x03'
+SNIPPET_TOKENS = 16
+NORMALIZE = "replace(replace({}, 'ё', 'е'), 'Ё', 'Е')"
+TOKENIZE = "tokenize = 'unicode61 remove_diacritics 2'"
+
+
+def trigger_sql(table, columns):
+    """Триггеры, которые держат таблицу FTS5 в согласии с table."""
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    new = ', '.join(NORMALIZE.format(f'new.{column}') for column in columns)
+    assignments = ', '.join(
+        f'{column} = {NORMALIZE.format(f"new.{column}")}'
+        for column in columns
+    )
+    return [
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_insert AFTER INSERT ON {table} '
+        f'BEGIN INSERT INTO {fts}(rowid, {names}) VALUES (new.id, {new}); '
+        'END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_update '
+        f'AFTER UPDATE OF {names} ON {table} '
+        f'BEGIN UPDATE {fts} SET {assignments} WHERE rowid = new.id; END',
+        f'CREATE TRIGGER IF NOT EXISTS {fts}_delete AFTER DELETE ON {table} '
+        f'BEGIN DELETE FROM {fts} WHERE rowid = old.id; END',
+    ]
+
+
+def index_sql(table, columns):
+    """Таблица FTS5 с копией колонок table и триггеры синхронизации."""
+    fts = f'{table}_fts'
+    names = ', '.join(columns)
+    current = ', '.join(NORMALIZE.format(column) for column in columns)
+    return [
+        f'CREATE VIRTUAL TABLE {fts} USING fts5({names}, {TOKENIZE})',
+        f'INSERT INTO {fts}(rowid, {names}) SELECT id, {current} FROM {table}',
+        *trigger_sql(table, columns),
+    ]
+
+
+def drop_sql(table):
+    fts = f'{table}_fts'
+    return [
+        f'DROP TRIGGER {fts}_insert',
+        f'DROP TRIGGER {fts}_update',
+        f'DROP TRIGGER {fts}_delete',
+        f'DROP TABLE {fts}',
+    ]
+
+
+def keep_triggers(indexed, *operations):
+    """
+    Операции миграции, после которых триггеры поиска остаются на месте.
+
+    SQLite пересоздаёт таблицу при AlterField и при AddField со значением
+    по умолчанию, и триггеры удаляются вместе со старой таблицей.
+    indexed — пары (таблица, колонки); триггеры создаются заново после
+    operations, а при откате — после их отмены.
+    """
+    sql = [
+        statement
+        for table, columns in indexed
+        for statement in trigger_sql(table, columns)
+    ]
+    return [
+        migrations.RunSQL(migrations.RunSQL.noop, sql),
+        *operations,
+        migrations.RunSQL(sql, migrations.RunSQL.noop),
+    ]
+
+
+def normalize(text):
+    return text.replace('ё', 'е').replace('Ё', 'Е')
+
+
+def build_query(text):
+    """
+    Запрос FTS5 из слов пользователя.
+
+    Каждое слово ищется как префикс, чтобы находились другие падежи
+    и формы русских слов; синтаксис FTS5 из ввода не пропускается.
+    """
+    return ' '.join(f'"{word}"*' for word in WORD.findall(normalize(text)))
+
+
+def highlight(snippet):
+    """Экранирует фрагмент и размечает найденные слова тегом mark."""
+    return mark_safe(
+        escape(snippet)
+        .replace(MARK_START, '<mark>')
+        .replace(MARK_END, '</mark>')
+    )
+
+
+class SearchResults:
+    """
+    Ленивая выборка результатов поиска для Paginator.
+
+    Число совпадений и каждая страница считаются отдельными запросами;
+    результаты упорядочены по релевантности (bm25). В sql и count_sql
+    подставляются {fts} и {weights}; параметры после MATCH и дополнительных
+    условий отдаёт get_params.
+    """
+    model = None
+    fts = ''
+    sql = ''
+    count_sql = 'SELECT count(*) FROM {fts} WHERE {fts} MATCH %s'
+    weights = ()
+
+    def __init__(self, text):
+        self.query = build_query(text)
+        # Число и страницы читаются с одной базы, иначе при чтении с
+        # реплики они могли бы разойтись.
+        self.db = self.model.objects.db
+
+    def get_params(self):
+        """Запрос MATCH и значения дополнительных условий WHERE."""
+        return [self.query]
+
+    def count(self):
+        if not self.query:
+            return 0
+        with connections[self.db].cursor() as cursor:
+            cursor.execute(
+                self.count_sql.format(fts=self.fts), self.get_params()
+            )
+            return cursor.fetchone()[0]
+
+    def __getitem__(self, page):
+        if not self.query:
+            return []
+        weights = ', '.join(str(weight) for weight in self.weights)
+        results = list(self.model.objects.raw(
+            self.sql.format(fts=self.fts, weights=weights)
+            + ' LIMIT %s OFFSET %s',
+            [MARK_START, MARK_END, SNIPPET_TOKENS, *self.get_params(),
+             page.stop - page.start, page.start],
+            using=self.db,
+        ))
+        for result in results:
+            result.snippet = highlight(result.snippet)
+        return results
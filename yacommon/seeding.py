@@ -0,0 +1,125 @@
+"""
+Общие части генерации больших наборов данных обоих проектов.
+
+iter_* выдают несохранённые объекты по одному для save_in_batches: так
+в памяти не больше одной пачки, сколько бы строк ни создавалось.
+"""
+import random
+import time
+from itertools import islice
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import reset_queries, transaction
+from django.db.models import Max
+
+# Чем больше степень, тем сильнее перекос к первым элементам списка:
+# при 3 первый процент авторов пишет около пятой части записей.
+AUTHOR_SKEW = 3
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def phrase(rng, words, count):
+    """Фраза из count случайных слов words с заглавной буквы."""
+    return ' '.join(rng.choice(words) for _ in range(count)).capitalize()
+
+
+def skewed(rng, items, power=AUTHOR_SKEW):
+    """Случайный элемент, первые элементы items выпадают чаще."""
+    return items[int(len(items) * rng.random() ** power)]
+
+
+def save_in_batches(model, objects, batch_size):
+    """
+    Сохраняет объекты пачками по batch_size, каждую в своей транзакции.
+
+    Выдаёт число сохранённых объектов после каждой пачки.
+    """
+    saved = 0
+    for batch in batched(objects, batch_size):
+        with transaction.atomic():
+            model.objects.bulk_create(batch)
+        saved += len(batch)
+        yield saved
+
+
+def iter_users(count, prefix):
+    password = make_password(None)
+    for index in range(count):
+        yield get_user_model()(username=f'{prefix} {index}', password=password)
+
+
+def make_users(count, prefix='Пользователь'):
+    """Пользователи с именами «prefix 0», «prefix 1», … без пароля."""
+    return get_user_model().objects.bulk_create(iter_users(count, prefix))
+
+
+def last_pk(model):
+    return model.objects.aggregate(last=Max('pk'))['last'] or 0
+
+
+class SeedCommand(BaseCommand):
+    """
+    Основа команд seed обоих проектов.
+
+    Проверяет, что пользователей с таким префиксом ещё нет, и пишет
+    строки пачками с отчётом о скорости.
+    """
+    default_prefix = 'Пользователь'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--prefix', default=self.default_prefix)
+        parser.add_argument(
+            '--random-seed', type=int,
+            help='Зерно генератора для повторяемых наборов.',
+        )
+
+    def handle(self, *args, **options):
+        prefix = options['prefix']
+        users = get_user_model().objects
+        if users.filter(username__startswith=f'{prefix} ').exists():
+            raise CommandError(
+                f'Пользователи «{prefix} …» уже есть, задайте другой --prefix.'
+            )
+        self.batch_size = options['batch_size']
+        self.seed(random.Random(options['random_seed']), options)
+
+    def seed(self, rng, options):
+        raise NotImplementedError
+
+    def save_users(self, options):
+        """Сохраняет пользователей, возвращает их ключи по порядку."""
+        return self.new_ids(get_user_model(), self.save(
+            get_user_model(), iter_users(options['users'], options['prefix']),
+            options['users'],
+        ))
+
+    def save(self, model, objects, total):
+        """Сохраняет объекты пачками, возвращает прежний наибольший ключ."""
+        name = model._meta.verbose_name_plural
+        previous = last_pk(model)
+        started = time.monotonic()
+        for saved in save_in_batches(model, objects, self.batch_size):
+            # При DEBUG журнал запросов хранит SQL каждой пачки.
+            reset_queries()
+            elapsed = time.monotonic() - started
+            self.stdout.write(
+                f'{name}: {saved} из {total}, '
+                f'{saved / max(elapsed, 1e-6):.0f} в секунду.'
+            )
+        self.stdout.write(f'{name}: готово.', self.style.SUCCESS)
+        return previous
+
+    def new_ids(self, model, previous):
+        """Ключи строк, созданных после previous, в порядке создания."""
+        return list(model.objects.filter(pk__gt=previous).order_by(
+            'pk'
+        ).values_list('pk', flat=True))
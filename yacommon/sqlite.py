@@ -0,0 +1,51 @@
+"""
+Настройка соединений SQLite.
+
+При открытии каждого соединения выполняются PRAGMA из настройки
+SQLITE_PRAGMAS: журнал WAL, чтобы чтение не блокировало запись,
+ожидание блокировки вместо ошибки, mmap и кэш страниц.
+"""
+from django.conf import settings
+from django.db.backends.signals import connection_created
+
+
+def apply_pragmas(sender, connection, **kwargs):
+    """Обработчик connection_created: PRAGMA из SQLITE_PRAGMAS."""
+    if connection.vendor != 'sqlite':
+        return
+    pragmas = getattr(settings, 'SQLITE_PRAGMAS', {})
+    with connection.cursor() as cursor:
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name} = {value}')
+
+
+def get_pragmas(connection, names):
+    """Текущие значения PRAGMA соединения."""
+    with connection.cursor() as cursor:
+        values = {}
+        for name in names:
+            cursor.execute(f'PRAGMA {name}')
+            values[name] = cursor.fetchone()[0]
+    return values
+
+
+def forbid_working_databases():
+    """
+    Запрещает тестам соединяться с рабочими базами.
+
+    Вызывается до создания тестовых баз, пока в DATABASES ещё рабочие
+    имена. Соединение с рабочей базой падает с ошибкой: иначе PRAGMA
+    молча перевели бы её файл в режим WAL.
+    """
+    names = {
+        str(database['NAME']) for database in settings.DATABASES.values()
+    }
+
+    def refuse(sender, connection, **kwargs):
+        if str(connection.settings_dict['NAME']) in names:
+            connection.close()
+            raise RuntimeError(
+                f'Тест открыл рабочую базу {connection.settings_dict["NAME"]}.'
+            )
+
+    connection_created.connect(refuse, weak=False)